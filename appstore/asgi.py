@@ -5,6 +5,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Mit DOWNLOAD_ASYNC=True werden Downloads hier asynchron gestreamt
+(store/async_downloads.py), z.B. mit ``uvicorn appstore.asgi:application``.
 """
 
 import os
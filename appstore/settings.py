@@ -43,6 +43,24 @@ ALLOWED_HOSTS = ['jds-appstore.onrender.com',
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads schon beim Empfang hashen (inhaltsadressierter Speicher, siehe store/artifacts.py)
+FILE_UPLOAD_HANDLERS = [
+    'store.artifacts.HashingMemoryFileUploadHandler',
+    'store.artifacts.HashingTemporaryFileUploadHandler',
+]
+
+# Download-Auslieferung über den Webserver (siehe store/sendfile.py):
+# '' = Django streamt selbst, 'nginx' = X-Accel-Redirect, 'sendfile' = X-Sendfile
+DOWNLOAD_OFFLOAD = env('DOWNLOAD_OFFLOAD', default='')
+# Interne nginx-Location, die auf MEDIA_ROOT zeigt
+DOWNLOAD_ACCEL_PREFIX = env('DOWNLOAD_ACCEL_PREFIX', default='/protected-media/')
+# Ohne vorgeschalteten Webserver die Header in Django selbst auflösen (Entwicklung/Tests)
+DOWNLOAD_OFFLOAD_EMULATE = env.bool('DOWNLOAD_OFFLOAD_EMULATE', default=False)
+# Asynchrone Downloads (nur unter ASGI, siehe store/async_downloads.py) und ihre Limits
+DOWNLOAD_ASYNC = env.bool('DOWNLOAD_ASYNC', default=False)
+DOWNLOAD_MAX_CONCURRENT = env.int('DOWNLOAD_MAX_CONCURRENT', default=50)
+DOWNLOAD_MAX_PER_USER = env.int('DOWNLOAD_MAX_PER_USER', default=2)
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -65,6 +83,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+if DOWNLOAD_OFFLOAD_EMULATE:
+    MIDDLEWARE.insert(0, 'store.sendfile.SendfileEmulationMiddleware')
 
 ROOT_URLCONF = 'appstore.urls'
 
@@ -94,6 +114,12 @@ DATABASES = {
     'default': env.db(),  # Liest die DATABASE_URL aus der .env Datei
 }
 
+# Cache (z.B. CACHE_URL=rediscache://localhost:6379/1 in der .env).
+# Ohne Angabe pro Prozess im Speicher – Invalidierung gilt dann nur für diesen Prozess.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -157,6 +183,53 @@ CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 
+# Redis für die Write-behind-Downloadzähler (store/counters.py), z.B. redis://localhost:6379/2.
+# Ohne Angabe wird jeder Download sofort in die Datenbank geschrieben (kein Write-behind).
+DOWNLOAD_COUNTER_URL = env('DOWNLOAD_COUNTER_URL', default='')
+# gzip-CSV-Archive alter VersionDownload-Zeilen (siehe store/archive.py)
+DOWNLOAD_ARCHIVE_DIR = env('DOWNLOAD_ARCHIVE_DIR', default=os.path.join(BASE_DIR, 'archive', 'downloads'))
+
+# clamd für den Virenscan (store/clamav.py). Die Dateien werden per INSTREAM
+# geschickt, clamd braucht keinen Zugriff auf MEDIA_ROOT. Offline/Lasttests:
+# python manage.py fake_clamd
+CLAMAV_HOST = env('CLAMAV_HOST', default='127.0.0.1')
+CLAMAV_PORT = env.int('CLAMAV_PORT', default=3310)
+CLAMAV_POOL_SIZE = env.int('CLAMAV_POOL_SIZE', default=4)
+CLAMAV_CONNECT_TIMEOUT = env.float('CLAMAV_CONNECT_TIMEOUT', default=5)
+CLAMAV_TIMEOUT = env.float('CLAMAV_TIMEOUT', default=120)
+
+# Periodische Jobs (celery -A appstore beat)
+CELERY_BEAT_SCHEDULE = {
+    'flush-download-events': {
+        'task': 'store.tasks.flush_download_events',
+        'schedule': 30,  # alle 30 Sekunden
+    },
+    'flush-download-counts': {
+        'task': 'store.tasks.flush_download_counts',
+        'schedule': 30,  # alle 30 Sekunden
+    },
+    'archive-version-downloads': {
+        'task': 'store.tasks.archive_version_downloads',
+        'schedule': 24 * 60 * 60,  # täglich
+    },
+    'refresh-trending-snapshot': {
+        'task': 'store.tasks.refresh_trending_snapshot',
+        'schedule': 5 * 60,  # alle 5 Minuten
+    },
+    'rebuild-app-neighbours': {
+        'task': 'store.tasks.rebuild_app_neighbours',
+        'schedule': 6 * 60 * 60,  # alle 6 Stunden
+    },
+    'refresh-similar-apps': {
+        'task': 'store.tasks.refresh_similar_apps',
+        'schedule': 24 * 60 * 60,  # täglich
+    },
+    'refresh-category-matrix': {
+        'task': 'store.tasks.refresh_category_matrix',
+        'schedule': 10 * 60,  # alle 10 Minuten
+    },
+}
+
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'mail.gmx.net'
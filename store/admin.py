@@ -4,7 +4,7 @@ from django.conf import settings
 import json
 from pywebpush import webpush, WebPushException
 
-from .models import App, AppWarning, Notification, PushSubscription, Version, Developer, AppScreenshot, VersionDownload, AppUpdate, AppInfo, RoadmapItem, EmailVerificationCode
+from .models import App, AppWarning, Notification, PushSubscription, Version, Developer, AppScreenshot, VersionDownload, AppUpdate, AppInfo, RoadmapItem, EmailVerificationCode, TrendingSnapshot, CheckVerdict
 
 # Normale Admin-Registrierungen:
 admin.site.register(App)
@@ -17,6 +17,8 @@ admin.site.register(AppInfo)
 admin.site.register(AppUpdate)
 admin.site.register(RoadmapItem)
 admin.site.register(EmailVerificationCode)
+admin.site.register(TrendingSnapshot)
+admin.site.register(CheckVerdict)
 
 # Eigene Admin-Klasse für PushSubscription:
 @admin.register(PushSubscription)
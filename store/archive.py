@@ -0,0 +1,86 @@
+# archive.py
+# Archivierung alter VersionDownload-Zeilen.
+# Zeilen älter als VERSION_DOWNLOAD_RETENTION_DAYS werden zu Tagessummen pro
+# Version (VersionDownloadDay) verdichtet, als gzip-CSV pro Monat unter
+# DOWNLOAD_ARCHIVE_DIR abgelegt und aus der Tabelle gelöscht.
+# Die Archivdatei wird vor dem Löschen geschrieben: bricht ein Lauf ab, können
+# Zeilen doppelt im Archiv stehen, aber keine verloren gehen.
+# Ob ein Nutzer eine Version schon geladen hat, steht dauerhaft in
+# VersionDownloadMarker (downloads.py); das Archivieren ändert daran nichts.
+import csv
+import gzip
+import io
+import os
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import VersionDownload, VersionDownloadDay
+
+VERSION_DOWNLOAD_RETENTION_DAYS = 180
+ARCHIVE_BATCH_SIZE = 10000
+ARCHIVE_COLUMNS = ('id', 'user_id', 'version_id', 'downloaded_at')
+
+
+def archive_path(month):
+    return os.path.join(settings.DOWNLOAD_ARCHIVE_DIR, f'version_downloads_{month}.csv.gz')
+
+
+def _append(month, rows):
+    path = archive_path(month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    new_file = not os.path.exists(path)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if new_file:
+        writer.writerow(ARCHIVE_COLUMNS)
+    writer.writerows(rows)
+    # Angehängte gzip-Member ergeben zusammen wieder eine gültige .gz-Datei
+    with gzip.open(path, 'at', encoding='utf-8', newline='') as f:
+        f.write(buffer.getvalue())
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _roll_up(rows):
+    days = Counter((version_id, downloaded_at.date()) for _, _, version_id, downloaded_at in rows)
+    for (version_id, day), downloads in days.items():
+        updated = VersionDownloadDay.objects.filter(
+            version_id=version_id, day=day
+        ).update(downloads=F('downloads') + downloads)
+        if not updated:
+            VersionDownloadDay.objects.create(version_id=version_id, day=day, downloads=downloads)
+
+
+def archive_version_downloads(retention_days=VERSION_DOWNLOAD_RETENTION_DAYS):
+    """
+    Archiviert alle VersionDownload-Zeilen vor dem Aufbewahrungszeitraum.
+    Gibt die Anzahl archivierter Zeilen zurück.
+    """
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    archived = 0
+    while True:
+        rows = list(
+            VersionDownload.objects.filter(downloaded_at__lt=cutoff)
+            .order_by('id')
+            .values_list(*ARCHIVE_COLUMNS)[:ARCHIVE_BATCH_SIZE]
+        )
+        if not rows:
+            return archived
+
+        by_month = defaultdict(list)
+        for row in rows:
+            by_month[row[3].strftime('%Y-%m')].append(
+                (row[0], row[1], row[2], row[3].isoformat())
+            )
+        for month, month_rows in by_month.items():
+            _append(month, month_rows)
+
+        with transaction.atomic():
+            _roll_up(rows)
+            VersionDownload.objects.filter(id__in=[row[0] for row in rows]).delete()
+        archived += len(rows)
@@ -0,0 +1,155 @@
+# artifacts.py
+# Inhaltsadressierter Speicher für Versionsdateien.
+# Uploads werden schon beim Empfang gehasht (HashingUploadHandler) und unter
+# artifacts/<aa>/<bb>/<sha256><endung> abgelegt. Identische Dateien liegen nur
+# einmal auf der Platte; Artifact.ref_count zählt die Versionen, die sie nutzen.
+# Die Endung bleibt Teil des Pfads, weil die Prüfung nach Dateityp unterscheidet.
+import hashlib
+import os
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.db import transaction
+from django.db.models import F
+
+from .models import Artifact, Version
+from .sendfile import artifact_content_type
+
+ARTIFACT_DIR = 'artifacts'
+# Felder, die store_upload() an der Version setzt
+ARTIFACT_FIELDS = ('file', 'artifact', 'original_filename', 'file_size', 'sha256', 'content_type')
+
+
+class _HashingMixin:
+    """Berechnet SHA-256 und Größe, während der Upload eintrifft."""
+
+    def new_file(self, *args, **kwargs):
+        self._sha256 = hashlib.sha256()
+        return super().new_file(*args, **kwargs)
+
+    def _hash_chunk(self, raw_data):
+        self._sha256.update(raw_data)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        if uploaded is not None:
+            uploaded.sha256 = self._sha256.hexdigest()
+        return uploaded
+
+
+class HashingMemoryFileUploadHandler(_HashingMixin, MemoryFileUploadHandler):
+    def receive_data_chunk(self, raw_data, start):
+        # Große Dateien reicht der Handler nur weiter – dann hasht der nächste
+        if self.activated:
+            self._hash_chunk(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+
+class HashingTemporaryFileUploadHandler(_HashingMixin, TemporaryFileUploadHandler):
+    def receive_data_chunk(self, raw_data, start):
+        self._hash_chunk(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+
+def file_extension(name):
+    name = name.lower()
+    if name.endswith('.tar.gz'):
+        return '.tar.gz'
+    return os.path.splitext(name)[1]
+
+
+def artifact_path(sha256, extension):
+    return f'{ARTIFACT_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}'
+
+
+def _hash_file(f):
+    # Fallback, falls der Upload nicht über die Hashing-Handler kam
+    digest = hashlib.sha256()
+    for chunk in f.chunks():
+        digest.update(chunk)
+    f.seek(0)
+    return digest.hexdigest()
+
+
+def ingest_file(f, original_filename):
+    """
+    Legt eine Datei inhaltsadressiert ab (bzw. findet die vorhandene) und
+    erhöht ihren Referenzzähler. Muss in einer Transaktion laufen.
+    """
+    sha256 = getattr(f, 'sha256', None) or _hash_file(f)
+    path = artifact_path(sha256, file_extension(original_filename))
+
+    artifact, created = Artifact.objects.select_for_update().get_or_create(
+        path=path,
+        defaults={
+            'sha256': sha256,
+            'size': f.size,
+            'content_type': artifact_content_type(original_filename),
+        }
+    )
+    if not default_storage.exists(path):
+        saved = default_storage.save(path, f)
+        if saved != path:
+            # Paralleler Upload derselben Datei war schneller
+            default_storage.delete(saved)
+    Artifact.objects.filter(id=artifact.id).update(ref_count=F('ref_count') + 1)
+    return artifact
+
+
+def store_upload(version):
+    """
+    Ersetzt den frischen Upload an version.file durch das passende Artifact.
+    Wird von Version.save() aufgerufen.
+    """
+    uploaded = version.file.file
+    original_filename = os.path.basename(version.file.name)
+    previous_id = None
+    if version.pk:
+        previous_id = Version.objects.filter(pk=version.pk).values_list('artifact_id', flat=True).first()
+
+    artifact = ingest_file(uploaded, original_filename)
+    _attach(version, artifact, original_filename)
+    if previous_id and previous_id != artifact.id:
+        release_artifact(previous_id)
+
+
+def _attach(version, artifact, original_filename):
+    version.file = artifact.path
+    version.artifact = artifact
+    version.original_filename = original_filename
+    version.file_size = artifact.size
+    version.sha256 = artifact.sha256
+    version.content_type = artifact.content_type
+
+
+def release_artifact(artifact_id):
+    """
+    Verringert den Referenzzähler; die letzte Referenz löscht auch die Datei
+    (erst nach dem Commit, damit ein Rollback nichts verliert).
+    """
+    with transaction.atomic():
+        Artifact.objects.filter(id=artifact_id, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+        artifact = Artifact.objects.select_for_update().filter(id=artifact_id).first()
+        if artifact is None or artifact.ref_count > 0 or artifact.versions.exists():
+            return
+        path = artifact.path
+        artifact.delete()
+        transaction.on_commit(lambda: default_storage.delete(path))
+
+
+def migrate_version_file(version):
+    """
+    Überführt eine vorhandene Datei (z.B. unter app_files/) in den
+    inhaltsadressierten Speicher. Gibt den alten Pfad zurück, falls er frei wurde.
+    """
+    old_name = version.file.name
+    original_filename = version.original_filename or os.path.basename(old_name)
+    with transaction.atomic():
+        with version.file.open('rb') as f:
+            artifact = ingest_file(f, original_filename)
+        _attach(version, artifact, original_filename)
+        Version.objects.filter(pk=version.pk).update(**{
+            field: getattr(version, field) for field in ARTIFACT_FIELDS
+        })
+    still_used = Version.objects.filter(file=old_name).exists()
+    return None if still_used or old_name == artifact.path else old_name
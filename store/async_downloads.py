@@ -0,0 +1,147 @@
+# async_downloads.py
+# Asynchrone Downloads unter ASGI (DOWNLOAD_ASYNC in settings.py).
+# Die Datei wird in Blöcken gestreamt, gelesen wird in einem Thread, damit
+# langsame Clients keinen Worker blockieren. Gleichzeitige Übertragungen sind
+# begrenzt: insgesamt DOWNLOAD_MAX_CONCURRENT, pro Nutzer DOWNLOAD_MAX_PER_USER.
+# Wer keinen Platz bekommt, erhält sofort 429/503 mit Retry-After, statt zu
+# warten und Seitenaufrufe auszubremsen.
+#
+# Die Plätze sind Cache-Schlüssel mit Ablaufzeit (Lease), die während der
+# Übertragung verlängert werden. Bricht ein Prozess ab, werden sie nach
+# SLOT_LEASE von selbst frei. Mit dem lokalen Speicher-Cache gilt das Limit
+# nur pro Prozess – für ein globales Limit CACHE_URL auf Redis setzen.
+import asyncio
+import os
+import random
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.http import HttpResponseNotFound, JsonResponse
+from django.shortcuts import aget_object_or_404
+
+from .downloads import record_download
+from .models import Version
+from .sendfile import artifact_etag, artifact_response, is_resumed_transfer
+
+STREAM_CHUNK_SIZE = 256 * 1024
+SLOT_LEASE = 60
+SLOT_RENEW_INTERVAL = 20
+RETRY_AFTER = 15
+
+GLOBAL_SLOT_PREFIX = 'download_slot'
+
+
+def _user_slot_prefix(user_id):
+    return f'download_user_slot_{user_id}'
+
+
+async def _claim(prefix, limit):
+    keys = [f'{prefix}_{i}' for i in range(limit)]
+    taken = await cache.aget_many(keys)
+    free = [key for key in keys if key not in taken]
+    # Zufällige Reihenfolge, damit parallele Requests nicht alle um denselben Platz konkurrieren
+    random.shuffle(free)
+    for key in free:
+        if await cache.aadd(key, True, timeout=SLOT_LEASE):
+            return key
+    return None
+
+
+async def acquire_slots(user_id):
+    """
+    Reserviert einen Platz für den Nutzer und einen globalen Platz.
+    Gibt (schlüssel, None) oder (None, status) mit 429 bzw. 503 zurück.
+    """
+    user_key = await _claim(_user_slot_prefix(user_id), settings.DOWNLOAD_MAX_PER_USER)
+    if user_key is None:
+        return None, 429
+    global_key = await _claim(GLOBAL_SLOT_PREFIX, settings.DOWNLOAD_MAX_CONCURRENT)
+    if global_key is None:
+        await cache.adelete(user_key)
+        return None, 503
+    return [user_key, global_key], None
+
+
+async def release_slots(keys):
+    await cache.adelete_many(keys)
+
+
+async def _renew_slots(keys):
+    for key in keys:
+        await cache.atouch(key, SLOT_LEASE)
+
+
+def _busy_response(status):
+    if status == 429:
+        message = f'Maximal {settings.DOWNLOAD_MAX_PER_USER} gleichzeitige Downloads pro Nutzer.'
+    else:
+        message = 'Gerade laufen zu viele Downloads. Bitte gleich noch einmal versuchen.'
+    response = JsonResponse({'error': message, 'retry_after': RETRY_AFTER}, status=status)
+    response['Retry-After'] = RETRY_AFTER
+    return response
+
+
+def _stream(keys):
+    async def chunks(file_path, start, length):
+        try:
+            with open(file_path, 'rb') as f:
+                await asyncio.to_thread(f.seek, start)
+                renewed_at = time.monotonic()
+                while length > 0:
+                    chunk = await asyncio.to_thread(f.read, min(STREAM_CHUNK_SIZE, length))
+                    if not chunk:
+                        break
+                    length -= len(chunk)
+                    yield chunk
+                    if time.monotonic() - renewed_at > SLOT_RENEW_INTERVAL:
+                        await _renew_slots(keys)
+                        renewed_at = time.monotonic()
+        finally:
+            # Auch bei Verbindungsabbruch (CancelledError) freigeben
+            await release_slots(keys)
+    return chunks
+
+
+@login_required
+async def download_file_async(request, version_id):
+    """
+    Asynchrone Variante von download_file_view (gleiche URL, siehe urls.py).
+    """
+    version = await aget_object_or_404(Version, id=version_id, approved=True)
+    user = await request.auser()
+
+    file_path = version.file.path
+    if not os.path.exists(file_path):
+        return HttpResponseNotFound("Datei nicht gefunden.")
+
+    etag = artifact_etag(version)
+    offloaded = bool(getattr(settings, 'DOWNLOAD_OFFLOAD', ''))
+    keys = None
+    if not offloaded:
+        # Überträgt der Webserver die Bytes, braucht es kein Limit in Django
+        keys, status = await acquire_slots(user.id)
+        if keys is None:
+            return _busy_response(status)
+
+    try:
+        if request.method == 'GET' and not is_resumed_transfer(request, etag):
+            await sync_to_async(record_download)(user, version)
+        response = artifact_response(
+            request, file_path,
+            filename=version.original_filename or None,
+            content_type=version.content_type or None,
+            etag=etag,
+            chunks=_stream(keys) if keys else None,
+        )
+    except BaseException:
+        if keys:
+            await release_slots(keys)
+        raise
+
+    # 304/416 usw. streamen nichts – Plätze sofort freigeben
+    if keys and not response.streaming:
+        await release_slots(keys)
+    return response
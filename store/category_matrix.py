@@ -0,0 +1,55 @@
+# category_matrix.py
+# Top- und Neu-Listen für jede Kombination aus Kategorie und Plattform
+# (21 Kategorien x (alle + 5 Plattformen)). Ein Celery-beat-Job berechnet die
+# ganze Matrix mit vier Fensterfunktions-Abfragen und legt sie als fertige
+# Kartendaten in den Cache; die Kategorieseiten lesen nur noch den Cache.
+from collections import defaultdict
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .facets import published_apps
+from .fragments import get_section, store_section
+from .pagination import serialize_app_card
+
+MATRIX_SECTION = 'category_matrix'
+MATRIX_LIST_SIZE = 12
+# Der Job läuft alle 10 Minuten, der Eintrag hält etwas länger
+MATRIX_TIMEOUT = 15 * 60
+
+ALL_PLATFORMS = ''
+
+LISTS = {
+    'top': (F('download_count').desc(), F('id').desc()),
+    'new': (F('published_at').desc(), F('id').desc()),
+}
+
+
+def _ranked(partition_by, order_by):
+    return published_apps().select_related('developer').annotate(
+        row=Window(RowNumber(), partition_by=partition_by, order_by=order_by)
+    ).filter(row__lte=MATRIX_LIST_SIZE).order_by(*partition_by, 'row')
+
+
+def build_category_matrix():
+    """
+    {(plattform oder '', kategorie): {'top': [karte, ...], 'new': [...]}}
+    """
+    matrix = defaultdict(lambda: {'top': [], 'new': []})
+    for name, order_by in LISTS.items():
+        for app in _ranked(['category'], order_by):
+            matrix[(ALL_PLATFORMS, app.category)][name].append(serialize_app_card(app))
+        for app in _ranked(['platform', 'category'], order_by):
+            matrix[(app.platform, app.category)][name].append(serialize_app_card(app))
+    return dict(matrix)
+
+
+def refresh_category_matrix():
+    matrix = build_category_matrix()
+    store_section(MATRIX_SECTION, matrix, timeout=MATRIX_TIMEOUT)
+    return len(matrix)
+
+
+def category_lists(category, platform=ALL_PLATFORMS):
+    matrix = get_section(MATRIX_SECTION, build_category_matrix, timeout=MATRIX_TIMEOUT)
+    return matrix.get((platform, category), {'top': [], 'new': []})
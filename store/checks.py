@@ -0,0 +1,197 @@
+# checks.py
+# Prüfschritte für hochgeladene Versionen. Die Celery-Stufen in tasks.py rufen
+# sie nacheinander auf; jede Funktion schreibt ins Protokoll (log) und gibt bei
+# einem Befund die Fehlermeldung zurück, sonst None.
+#
+# Archivprüfung und Virenscan hängen nur vom Dateiinhalt ab. Ihr Ergebnis wird
+# als CheckVerdict unter SHA-256 + Analyzer-Version gespeichert: derselbe Inhalt
+# (erneuter Upload, erneute Prüfung) übernimmt das Ergebnis, und nur Stufen mit
+# neuer Version laufen wieder – z.B. der Virenscan nach einem Signatur-Update.
+import mimetypes
+import os
+
+import pefile
+
+from .artifacts import file_extension
+from .clamav import ClamdError, get_scanner
+from .inspection import ArchiveViolation, inspect_gz, inspect_tar_gz, inspect_zip
+from .models import CheckVerdict
+from .utils import update_file_metadata
+
+MAX_FILE_SIZE = 500 * 1024 * 1024
+ALLOWED_EXTENSIONS = ('.exe', '.ipa', '.apk', '.aab', '.tar.gz', '.tgz', '.gz')
+ZIP_EXTENSIONS = ('.ipa', '.apk', '.aab')
+# Erhöhen, wenn sich die Archivprüfung ändert – alte Ergebnisse gelten dann nicht mehr
+ARCHIVE_ANALYZER_VERSION = '2'
+
+
+def version_extension(version):
+    # Der Artifact-Pfad behält die Endung des Uploads, inkl. ".tar.gz"
+    return file_extension(version.original_filename or version.file.name)
+
+
+def _cached_verdict(version, log, stage, analyzer_version, run):
+    """
+    Liefert das gespeicherte Ergebnis der Stufe für den Dateiinhalt oder führt
+    run(stage_log) -> (fehler, speicherbar) aus und speichert das Ergebnis.
+    """
+    if not version.sha256:
+        error, _ = run(log)
+        return error
+    cached = CheckVerdict.objects.filter(
+        sha256=version.sha256, stage=stage, analyzer_version=analyzer_version
+    ).first()
+    if cached:
+        log.append(f"Ergebnis vom {cached.checked_at:%d.%m.%Y %H:%M} übernommen ({analyzer_version}).")
+        log.extend(cached.log.splitlines())
+        return cached.error or None
+
+    stage_log = []
+    error, cacheable = run(stage_log)
+    log.extend(stage_log)
+    if cacheable:
+        CheckVerdict.objects.get_or_create(
+            sha256=version.sha256, stage=stage, analyzer_version=analyzer_version,
+            defaults={'error': error or '', 'log': "\n".join(stage_log)},
+        )
+        # Ergebnisse älterer Analyzer-Versionen werden nicht mehr gebraucht
+        CheckVerdict.objects.filter(sha256=version.sha256, stage=stage).exclude(
+            analyzer_version=analyzer_version
+        ).delete()
+    return error
+
+
+def check_metadata(version, log):
+    file_path = version.file.path
+    log.append(f"Starte Prüfung für Datei: {version.original_filename or file_path}")
+
+    mime_type, encoding = mimetypes.guess_type(version.original_filename or file_path)
+    log.append(f"Ermittelter MIME-Typ (per mimetypes): {mime_type or 'unbekannt'}")
+
+    ext = version_extension(version)
+    log.append(f"Dateiendung: {ext}")
+    if ext not in ALLOWED_EXTENSIONS:
+        return f"Unbekannter oder nicht erlaubter Dateityp: {ext}"
+
+    size = os.path.getsize(file_path)
+    log.append(f"Dateigröße: {size} Bytes")
+    if size > MAX_FILE_SIZE:
+        return "Datei ist größer als 500MB."
+
+    update_file_metadata(version)
+    log.append(f"SHA-256: {version.sha256}")
+    return None
+
+
+def _inspect_exe(file_path, log):
+    log.append("Prüfe EXE-Datei (PE-Analyse).")
+    try:
+        pe = pefile.PE(file_path)
+        log.append(f"PE EntryPoint: {hex(pe.OPTIONAL_HEADER.AddressOfEntryPoint)}")
+        if hasattr(pe, 'DIRECTORY_ENTRY_SECURITY') and pe.DIRECTORY_ENTRY_SECURITY:
+            log.append("Digitales Zertifikat gefunden.")
+        else:
+            log.append("Kein digitales Zertifikat gefunden.")
+        pe.close()
+    except pefile.PEFormatError as e:
+        return f"Ungültige EXE-Datei: {e}"
+    return None
+
+
+def _inspect_zip(version, ext, log):
+    log.append(f"Prüfe ZIP-Archiv mit Endung {ext}.")
+    if ext == '.ipa':
+        required, missing = (lambda n: n.startswith('Payload/')), "Fehlender Payload-Ordner in IPA."
+    else:
+        required, missing = (lambda n: n == 'AndroidManifest.xml'), "Fehlende AndroidManifest.xml in APK/AAB."
+    try:
+        summary = inspect_zip(version.file.path, required=required)
+    except ArchiveViolation as e:
+        return str(e)
+    log.append(f"ZIP-Archiv enthält {summary['entries']} Dateien.")
+    log.append(f"Komprimierte Größe: {summary['compressed_size']}, Unkomprimierte Größe: {summary['size']}")
+    if not summary['found_required']:
+        return missing
+    return None
+
+
+def _inspect_tar_gz(file_path, log):
+    log.append("Prüfe tar.gz-Archiv.")
+    try:
+        summary = inspect_tar_gz(file_path)
+    except ArchiveViolation as e:
+        return str(e)
+    log.append(f"tar.gz enthält {summary['entries']} Einträge, entpackt {summary['size']} Bytes.")
+    return None
+
+
+def _inspect_gz(file_path, log):
+    log.append(".gz-Datei, prüfe entpackten Inhalt.")
+    try:
+        summary = inspect_gz(file_path, required=lambda n: n.startswith('Payload/'))
+    except ArchiveViolation as e:
+        return str(e)
+    log.append(f".gz entpackt: {summary['size']} Bytes.")
+    if not summary['is_zip']:
+        log.append("Keine ZIP-Struktur erkannt.")
+        return None
+    log.append(f"Entpacktes Archiv enthält {summary['entries']} Dateien.")
+    if not summary['found_required']:
+        return "Entpackte IPA fehlt Payload-Ordner."
+    return None
+
+
+def _inspect_file(file_path, version, ext, log):
+    if ext == '.exe':
+        return _inspect_exe(file_path, log)
+    if ext in ZIP_EXTENSIONS:
+        return _inspect_zip(version, ext, log)
+    if ext in ('.tar.gz', '.tgz'):
+        return _inspect_tar_gz(file_path, log)
+    if ext == '.gz':
+        return _inspect_gz(file_path, log)
+    return f"Unbekannter oder nicht erlaubter Dateityp: {ext}"
+
+
+def inspect_archive(version, log):
+    ext = version_extension(version)
+    # Die Prüfung unterscheidet nach Endung, deshalb gehört sie zur Version des Ergebnisses
+    return _cached_verdict(
+        version, log, 'archive', f'{ARCHIVE_ANALYZER_VERSION}{ext}',
+        lambda stage_log: (_inspect_file(version.file.path, version, ext, stage_log), True),
+    )
+
+
+def signature_version(version_reply):
+    # "ClamAV 1.0.5/27480/Mon Nov 18 09:30:00 2024" -> "ClamAV 1.0.5/27480"
+    return version_reply.rsplit('/', 1)[0] if version_reply.count('/') >= 2 else version_reply
+
+
+def _scan(scanner, version, log):
+    log.append("Starte Virenscan mit ClamAV (INSTREAM).")
+    try:
+        signature = scanner.scan_file(version.file.path)
+    except ClamdError as e:
+        # Ohne Scan gibt es kein Ergebnis, das gespeichert werden dürfte
+        log.append(f"Warnung: Virenscan fehlgeschlagen: {e}")
+        return None, False
+    if signature:
+        return f"Malware erkannt: {signature}", True
+    log.append("Kein Malware-Fund im Scan.")
+    return None, True
+
+
+def scan_for_malware(version, log):
+    try:
+        scanner = get_scanner()
+        engine = signature_version(scanner.version())
+        log.append(f"ClamAV-Version: {engine}")
+        return _cached_verdict(
+            version, log, 'virus_scan', engine,
+            lambda stage_log: _scan(scanner, version, stage_log),
+        )
+    except ClamdError as e:
+        log.append(f"Warnung: ClamAV nicht erreichbar: {e}")
+    except Exception as e:
+        log.append(f"Virenscan-Fehler: {e}")
+    return None
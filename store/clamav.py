@@ -0,0 +1,229 @@
+# clamav.py
+# Virenscan über clamd mit INSTREAM.
+# Die Datei wird in Blöcken an clamd geschickt (einmal gelesen, kein gemeinsames
+# Dateisystem nötig). Verbindungen laufen als IDSESSION und kommen aus einem
+# Pool, damit nicht jede Prüfung einen neuen Verbindungsaufbau bezahlt.
+# clamd schließt Sitzungen nach IdleTimeout (Standard 30s), deshalb werden
+# länger ungenutzte Verbindungen verworfen und ein Fehler auf einer alten
+# Verbindung einmal mit einer frischen wiederholt.
+#
+# Wichtig: StreamMaxLength in clamd.conf muss mindestens so groß sein wie
+# MAX_FILE_SIZE (checks.py), sonst antwortet clamd mit "size limit exceeded".
+import socket
+import struct
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+CHUNK_SIZE = 256 * 1024
+# Kürzer als IdleTimeout von clamd
+POOL_IDLE_TIMEOUT = 20
+
+ScanResult = namedtuple('ScanResult', ['path', 'signature', 'error'])
+
+
+class ClamdError(Exception):
+    pass
+
+
+class ClamdConnection:
+    """Eine IDSESSION-Verbindung zu clamd."""
+
+    def __init__(self, host, port, connect_timeout, timeout):
+        self._sock = socket.create_connection((host, port), timeout=connect_timeout)
+        self._sock.settimeout(timeout)
+        self._buffer = b''
+        self._next_id = 1
+        self.used_at = time.monotonic()
+        self._sock.sendall(b'zIDSESSION\0')
+
+    def _reply(self):
+        while b'\0' not in self._buffer:
+            data = self._sock.recv(4096)
+            if not data:
+                raise ClamdError("clamd hat die Verbindung geschlossen.")
+            self._buffer += data
+        raw, self._buffer = self._buffer.split(b'\0', 1)
+        reply = raw.decode('utf-8', errors='replace')
+        # Antworten in der Sitzung beginnen mit "<id>: "
+        request_id, _, reply = reply.partition(': ')
+        if request_id != str(self._next_id):
+            raise ClamdError(f"Unerwartete Antwort von clamd: {raw!r}")
+        self._next_id += 1
+        self.used_at = time.monotonic()
+        return reply
+
+    def command(self, name):
+        self._sock.sendall(b'z' + name.encode('ascii') + b'\0')
+        return self._reply()
+
+    def instream(self, f, chunk_size=CHUNK_SIZE):
+        self._sock.sendall(b'zINSTREAM\0')
+        try:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                self._sock.sendall(struct.pack('>L', len(chunk)) + chunk)
+            self._sock.sendall(struct.pack('>L', 0))
+        except OSError:
+            # clamd bricht bei StreamMaxLength ab und hat die Antwort schon geschickt
+            try:
+                return self._reply()
+            except (OSError, ClamdError):
+                pass
+            raise
+        return self._reply()
+
+    def close(self):
+        try:
+            self._sock.sendall(b'zEND\0')
+        except OSError:
+            pass
+        self._sock.close()
+
+
+def parse_scan_reply(reply):
+    """Gibt den Signaturnamen oder None zurück; wirft ClamdError bei ERROR."""
+    if reply.endswith(' ERROR'):
+        raise ClamdError(reply[:-len(' ERROR')])
+    if reply.endswith(' FOUND'):
+        return reply[:-len(' FOUND')].split(': ', 1)[-1]
+    if reply.endswith(' OK'):
+        return None
+    raise ClamdError(f"Unbekannte Antwort von clamd: {reply}")
+
+
+class ClamdScanner:
+    """
+    Scanner mit Verbindungspool. Threadsicher; scan_files() prüft mehrere
+    Dateien parallel mit höchstens pool_size Verbindungen.
+    """
+
+    def __init__(self, host='127.0.0.1', port=3310, pool_size=4, connect_timeout=5, timeout=120,
+                 chunk_size=CHUNK_SIZE):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self._idle = []
+        self._open = 0
+        self._available = threading.Condition()
+
+    def _connect(self):
+        try:
+            return ClamdConnection(self.host, self.port, self.connect_timeout, self.timeout)
+        except OSError as e:
+            raise ClamdError(f"clamd nicht erreichbar ({self.host}:{self.port}): {e}")
+
+    def _acquire(self, fresh=False):
+        deadline = time.monotonic() + self.timeout
+        with self._available:
+            while True:
+                if fresh:
+                    # Nach einem Fehler sind die übrigen alten Verbindungen meist auch tot
+                    for conn in self._idle:
+                        conn.close()
+                    self._open -= len(self._idle)
+                    self._idle = []
+                while self._idle:
+                    conn = self._idle.pop()
+                    if time.monotonic() - conn.used_at < POOL_IDLE_TIMEOUT:
+                        return conn, True
+                    conn.close()
+                    self._open -= 1
+                if self._open < self.pool_size:
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ClamdError("Keine freie clamd-Verbindung im Pool.")
+                self._available.wait(remaining)
+        try:
+            return self._connect(), False
+        except ClamdError:
+            self._discard(None)
+            raise
+
+    def _release(self, conn):
+        with self._available:
+            self._idle.append(conn)
+            self._available.notify()
+
+    def _discard(self, conn):
+        if conn is not None:
+            conn.close()
+        with self._available:
+            self._open -= 1
+            self._available.notify()
+
+    def _run(self, action, retry=True):
+        conn, reused = self._acquire(fresh=not retry)
+        try:
+            result = action(conn)
+        except (OSError, ClamdError) as e:
+            self._discard(conn)
+            if reused and retry:
+                # Verbindung war vermutlich von clamd geschlossen – einmal frisch versuchen
+                return self._run(action, retry=False)
+            if isinstance(e, ClamdError):
+                raise
+            raise ClamdError(f"Fehler bei der Kommunikation mit clamd: {e}")
+        self._release(conn)
+        return result
+
+    def ping(self):
+        return self._run(lambda conn: conn.command('PING')) == 'PONG'
+
+    def version(self):
+        """z.B. "ClamAV 1.0.5/27480/Mon Nov 18 09:30:00 2024" – enthält die Signaturversion."""
+        return self._run(lambda conn: conn.command('VERSION'))
+
+    def scan_file(self, path):
+        """Gibt den Signaturnamen bei einem Fund zurück, sonst None."""
+        with open(path, 'rb') as f:
+            def scan(conn):
+                f.seek(0)
+                return conn.instream(f, self.chunk_size)
+            return parse_scan_reply(self._run(scan))
+
+    def scan_files(self, paths, max_workers=None):
+        """Scannt mehrere Dateien parallel. Gibt eine Liste von ScanResult zurück."""
+        def scan(path):
+            try:
+                return ScanResult(path, self.scan_file(path), None)
+            except (OSError, ClamdError) as e:
+                return ScanResult(path, None, str(e))
+
+        with ThreadPoolExecutor(max_workers=max_workers or self.pool_size) as executor:
+            return list(executor.map(scan, paths))
+
+    def close(self):
+        with self._available:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn in idle:
+            conn.close()
+
+
+_scanner = None
+_scanner_lock = threading.Lock()
+
+
+def get_scanner():
+    global _scanner
+    with _scanner_lock:
+        if _scanner is None:
+            _scanner = ClamdScanner(
+                host=getattr(settings, 'CLAMAV_HOST', '127.0.0.1'),
+                port=getattr(settings, 'CLAMAV_PORT', 3310),
+                pool_size=getattr(settings, 'CLAMAV_POOL_SIZE', 4),
+                connect_timeout=getattr(settings, 'CLAMAV_CONNECT_TIMEOUT', 5),
+                timeout=getattr(settings, 'CLAMAV_TIMEOUT', 120),
+            )
+        return _scanner
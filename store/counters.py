@@ -0,0 +1,260 @@
+# counters.py
+# Write-behind Download-Zähler und gepufferte Download-Protokollierung.
+# Ein Download schreibt nichts in die Datenbank: claim_download() setzt in einem
+# Lua-Skript einen Merker für (Nutzer, Version), hängt ein Ereignis an eine
+# Redis-Liste und erhöht den Zähler der App – alles oder nichts.
+# flush_download_counts() schreibt die Zähler gebündelt nach App.download_count,
+# flush_download_events() die Ereignisse per bulk_create nach VersionDownload und
+# VersionDownloadMarker und aktualisiert UserInstalledApp. So serialisieren
+# beliebte Apps nicht jeden Download über dieselbe Zeilensperre, und Lastspitzen
+# kosten keine einzelnen INSERTs.
+#
+# Der Puffer muss für Web-Prozesse und Celery-Worker derselbe sein, deshalb
+# gibt es Write-behind nur mit DOWNLOAD_COUNTER_URL (Redis). Ein prozesslokaler
+# Ersatz ist bewusst nicht vorgesehen: den leert kein Celery-Job, und was bis zum
+# Neustart im Speicher liegt, geht verloren. Ohne Redis schreibt downloads.py
+# jeden Download sofort in die Datenbank (eine Zeilensperre auf App pro Download).
+#
+# Jeder Flush läuft unter einer Redis-Sperre, damit überlappende Läufe (langsamer
+# Flush, mehrere Worker) denselben Stapel nicht zweimal anwenden.
+import json
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+FLUSH_BATCH_SIZE = 500
+# Länger als jeder Flush; läuft die Sperre ab, darf ein neuer Lauf beginnen
+FLUSH_LOCK_TIMEOUT = 5 * 60
+# Solange der Merker in Redis lebt, muss der Flush den VersionDownloadMarker
+# geschrieben haben; danach entscheidet die Datenbank
+DOWNLOAD_SEEN_TIMEOUT = 24 * 60 * 60
+
+REDIS_KEY = 'download_counts'
+REDIS_FLUSH_KEY = 'download_counts_flushing'
+REDIS_EVENTS_KEY = 'download_events'
+REDIS_EVENTS_FLUSH_KEY = 'download_events_flushing'
+REDIS_SEEN_PREFIX = 'download_seen'
+
+# KEYS: Merker, Ereignisliste, Zählerhash; ARGV: Ablaufzeit, Ereignis, App-ID
+CLAIM_SCRIPT = """
+if redis.call('SET', KEYS[1], '1', 'NX', 'EX', ARGV[1]) then
+    redis.call('RPUSH', KEYS[2], ARGV[2])
+    redis.call('HINCRBY', KEYS[3], ARGV[3], 1)
+    return 1
+end
+return 0
+"""
+
+
+class CounterStoreUnavailable(Exception):
+    pass
+
+
+class RedisCounterStore:
+    def __init__(self, url):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._claim = self._redis.register_script(CLAIM_SCRIPT)
+
+    def _take(self, key, flush_key):
+        # Reste eines abgebrochenen Flushs zuerst, sonst würde RENAME sie überschreiben
+        if not self._redis.exists(flush_key):
+            # RENAME ist atomar: neue Werte landen sofort wieder unter einem frischen Schlüssel
+            try:
+                self._redis.rename(key, flush_key)
+            except Exception as e:
+                if 'no such key' in str(e).lower():
+                    return False
+                raise
+        return True
+
+    def claim(self, user_id, version_id, app_id, event):
+        """Vermerkt den Download, falls (Nutzer, Version) noch nicht gezählt ist."""
+        from redis.exceptions import RedisError
+
+        try:
+            return bool(self._claim(
+                keys=[f'{REDIS_SEEN_PREFIX}:{user_id}:{version_id}', REDIS_EVENTS_KEY, REDIS_KEY],
+                args=[DOWNLOAD_SEEN_TIMEOUT, json.dumps(event), app_id],
+            ))
+        except RedisError as e:
+            raise CounterStoreUnavailable(str(e))
+
+    @contextmanager
+    def flushing(self, flush_key):
+        """Sperre für einen Flush; liefert False, wenn gerade ein anderer läuft."""
+        from redis.exceptions import LockError
+
+        lock = self._redis.lock(f'{flush_key}_lock', timeout=FLUSH_LOCK_TIMEOUT)
+        if not lock.acquire(blocking=False):
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            try:
+                lock.release()
+            except LockError:
+                # Abgelaufen – ein anderer Lauf hat sie inzwischen
+                pass
+
+    def _read_and_delete(self, read, flush_key):
+        # MULTI/EXEC: Lesen und Löschen in einem Schritt
+        pipe = self._redis.pipeline()
+        read(pipe)
+        pipe.delete(flush_key)
+        return pipe.execute()[0]
+
+    def take(self):
+        if not self._take(REDIS_KEY, REDIS_FLUSH_KEY):
+            return {}
+        raw = self._read_and_delete(lambda pipe: pipe.hgetall(REDIS_FLUSH_KEY), REDIS_FLUSH_KEY)
+        return {int(app_id): int(amount) for app_id, amount in raw.items()}
+
+    def restore(self, counts):
+        pipe = self._redis.pipeline()
+        for app_id, amount in counts.items():
+            pipe.hincrby(REDIS_KEY, app_id, amount)
+        pipe.execute()
+
+    def pending(self):
+        return {int(k): int(v) for k, v in self._redis.hgetall(REDIS_KEY).items()}
+
+    def take_events(self):
+        if not self._take(REDIS_EVENTS_KEY, REDIS_EVENTS_FLUSH_KEY):
+            return []
+        raw = self._read_and_delete(lambda pipe: pipe.lrange(REDIS_EVENTS_FLUSH_KEY, 0, -1), REDIS_EVENTS_FLUSH_KEY)
+        return [json.loads(item) for item in raw]
+
+    def restore_events(self, events):
+        if events:
+            self._redis.lpush(REDIS_EVENTS_KEY, *[json.dumps(e) for e in reversed(events)])
+
+    def pending_events(self):
+        return [json.loads(item) for item in self._redis.lrange(REDIS_EVENTS_KEY, 0, -1)]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def write_behind_enabled():
+    return bool(getattr(settings, 'DOWNLOAD_COUNTER_URL', ''))
+
+
+def get_counter_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            if not write_behind_enabled():
+                raise ImproperlyConfigured("Write-behind-Downloadzähler brauchen DOWNLOAD_COUNTER_URL (Redis).")
+            _store = RedisCounterStore(settings.DOWNLOAD_COUNTER_URL)
+        return _store
+
+
+def claim_download(user_id, version_id, app_id):
+    """
+    Merkt einen Download für den nächsten Flush vor (statt sofortigem INSERT).
+    Gibt False zurück, wenn (Nutzer, Version) schon gepuffert ist; wirft
+    CounterStoreUnavailable, wenn Redis nicht erreichbar ist.
+    """
+    event = [user_id, version_id, app_id, timezone.now().isoformat()]
+    return get_counter_store().claim(user_id, version_id, app_id, event)
+
+
+def flush_download_counts(store=None):
+    """
+    Schreibt alle ausstehenden Zähler gebündelt in die Datenbank.
+    Schlägt das Schreiben fehl, gehen die Werte zurück in den Zähler.
+    """
+    if store is None and not write_behind_enabled():
+        return 0
+    store = store or get_counter_store()
+    with store.flushing(REDIS_FLUSH_KEY) as acquired:
+        if not acquired:
+            return 0
+        return _flush_counts(store)
+
+
+def _flush_counts(store):
+    from .models import App
+
+    counts = store.take()
+    if not counts:
+        return 0
+    try:
+        items = sorted(counts.items())
+        with transaction.atomic():
+            for i in range(0, len(items), FLUSH_BATCH_SIZE):
+                batch = items[i:i + FLUSH_BATCH_SIZE]
+                # Ein UPDATE pro Batch statt einem pro App
+                App.objects.filter(id__in=[app_id for app_id, _ in batch]).update(
+                    download_count=F('download_count') + Case(
+                        *[When(id=app_id, then=Value(amount)) for app_id, amount in batch],
+                        default=Value(0),
+                    )
+                )
+    except Exception:
+        store.restore(counts)
+        raise
+    return sum(counts.values())
+
+
+def flush_download_events(store=None):
+    """
+    Schreibt gepufferte Downloads per bulk_create nach VersionDownload und
+    VersionDownloadMarker und aktualisiert UserInstalledApp.
+    Doppelte (Nutzer, Version) werden von der Datenbank verworfen.
+    """
+    from .recommendations import invalidate_recommendations
+
+    if store is None and not write_behind_enabled():
+        return 0
+    store = store or get_counter_store()
+    with store.flushing(REDIS_EVENTS_FLUSH_KEY) as acquired:
+        if not acquired:
+            return 0
+        events = _flush_events(store)
+
+    # bulk_create löst keine post_save-Signale aus
+    for user_id in {event[0] for event in events}:
+        invalidate_recommendations(user_id)
+    return len(events)
+
+
+def _flush_events(store):
+    from .downloads import update_installed_app
+    from .models import Version, VersionDownload, VersionDownloadMarker
+
+    events = store.take_events()
+    if not events:
+        return []
+    try:
+        with transaction.atomic():
+            versions = Version.objects.only('id', 'app_id', 'version_sort_key', 'uploaded_at').in_bulk(
+                {event[1] for event in events}
+            )
+            # Inzwischen gelöschte Versionen würden den ganzen Stapel am Fremdschlüssel scheitern lassen
+            kept = [event for event in events if event[1] in versions]
+            for i in range(0, len(kept), FLUSH_BATCH_SIZE):
+                batch = kept[i:i + FLUSH_BATCH_SIZE]
+                VersionDownloadMarker.objects.bulk_create([
+                    VersionDownloadMarker(user_id=user_id, version_id=version_id)
+                    for user_id, version_id, _, _ in batch
+                ], ignore_conflicts=True)
+                VersionDownload.objects.bulk_create([
+                    VersionDownload(user_id=user_id, version_id=version_id, downloaded_at=datetime.fromisoformat(at))
+                    for user_id, version_id, _, at in batch
+                ], ignore_conflicts=True)
+            for user_id, version_id, _, _ in kept:
+                update_installed_app(user_id, versions[version_id])
+    except Exception:
+        store.restore_events(events)
+        raise
+    return events
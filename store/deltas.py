@@ -0,0 +1,95 @@
+# deltas.py
+# Binäre Delta-Updates (bsdiff) zwischen Versionen einer App.
+# Nach erfolgreicher Prüfung erzeugt ein Celery-Task Patches von den letzten
+# DELTA_SOURCE_VERSIONS freigegebenen Versionen auf die neue. Clients laden dann
+# nur den Patch und wenden ihn lokal an (Ergebnis per SHA-256 prüfen);
+# ohne passenden Patch gibt es die vollständige Datei.
+import os
+import tempfile
+
+from django.core.files import File
+from django.db import IntegrityError
+
+from .models import Version, VersionDelta
+from .utils import file_sha256
+
+DELTA_SOURCE_VERSIONS = 3
+# Patch nur behalten, wenn er deutlich kleiner als die ganze Datei ist
+DELTA_MAX_RATIO = 0.5
+# bsdiff braucht ein Vielfaches der Dateigröße an Arbeitsspeicher
+DELTA_MAX_FILE_SIZE = 200 * 1024 * 1024
+
+
+def delta_sources(target):
+    """
+    Die letzten freigegebenen Vorgängerversionen derselben App.
+    """
+    return Version.objects.filter(
+        app_id=target.app_id,
+        approved=True,
+        version_sort_key__lt=target.version_sort_key,
+    ).exclude(id=target.id).order_by('-version_sort_key', '-uploaded_at')[:DELTA_SOURCE_VERSIONS]
+
+
+def _usable(version):
+    return (
+        version.file
+        and os.path.exists(version.file.path)
+        and os.path.getsize(version.file.path) <= DELTA_MAX_FILE_SIZE
+    )
+
+
+def generate_deltas(version_id):
+    """
+    Erzeugt fehlende Patches auf die angegebene Version. Gibt die Anzahl neuer Patches zurück.
+    """
+    import bsdiff4
+
+    target = Version.objects.filter(id=version_id, approved=True).first()
+    if target is None or not target.version_sort_key or not _usable(target):
+        return 0
+
+    existing = set(VersionDelta.objects.filter(target=target).values_list('source_id', flat=True))
+    target_size = os.path.getsize(target.file.path)
+    created = 0
+    for source in delta_sources(target):
+        if source.id in existing or not _usable(source):
+            continue
+        if source.sha256 and source.sha256 == target.sha256:
+            continue
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            patch_path = os.path.join(tmp_dir, 'patch.bsdiff')
+            bsdiff4.file_diff(source.file.path, target.file.path, patch_path)
+            size = os.path.getsize(patch_path)
+            if size > target_size * DELTA_MAX_RATIO:
+                continue
+
+            delta = VersionDelta(source=source, target=target, size=size, sha256=file_sha256(patch_path))
+            with open(patch_path, 'rb') as f:
+                delta.file.save(f'{target.app_id}/{source.id}-{target.id}.bsdiff', File(f), save=False)
+            try:
+                delta.save()
+            except IntegrityError:
+                # Parallel schon erzeugt
+                delta.file.delete(save=False)
+                continue
+        created += 1
+    return created
+
+
+def find_delta(target, source_id=None, source_version=None):
+    """
+    Patch von der installierten Version (per ID oder Versionsnummer) auf target, falls vorhanden.
+    """
+    deltas = VersionDelta.objects.filter(target=target).select_related('source')
+    if source_id:
+        deltas = deltas.filter(source_id=source_id)
+    elif source_version:
+        deltas = deltas.filter(source__version_number=source_version)
+    else:
+        return None
+    delta = deltas.first()
+    if delta is None or not os.path.exists(delta.file.path):
+        return None
+    return delta
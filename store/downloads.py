@@ -0,0 +1,63 @@
+# downloads.py
+# Gemeinsames Download-Tracking für alle Download-Views.
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .counters import CounterStoreUnavailable, claim_download, write_behind_enabled
+from .models import App, VersionDownload, VersionDownloadMarker, UserInstalledApp
+
+
+def update_installed_app(user_id, version):
+    """
+    Hält UserInstalledApp aktuell: pro Nutzer und App die neueste heruntergeladene Version.
+    """
+    # Alte Versionen ohne Sortierschlüssel (nicht interpretierbare Nummer) nach Upload-Zeitpunkt
+    by_upload = Q(version__version_sort_key='') & Q(version__uploaded_at__lte=version.uploaded_at)
+    if version.version_sort_key:
+        not_newer = Q(version__version_sort_key__lte=version.version_sort_key) | by_upload
+    else:
+        not_newer = Q(version__uploaded_at__lte=version.uploaded_at)
+    updated = UserInstalledApp.objects.filter(
+        not_newer,
+        user_id=user_id,
+        app_id=version.app_id,
+    ).update(version=version, installed_at=timezone.now())
+    if not updated:
+        # Neu anlegen – existiert schon eine neuere Version, bleibt sie stehen
+        UserInstalledApp.objects.get_or_create(
+            user_id=user_id,
+            app_id=version.app_id,
+            defaults={'version': version}
+        )
+
+
+def record_download(user, version):
+    """
+    Idempotent: pro Nutzer und Version wird nur der erste Download gezählt.
+    Maßgeblich ist VersionDownloadMarker – VersionDownload wird archiviert und
+    eignet sich deshalb nicht als Gedächtnis.
+    Mit DOWNLOAD_COUNTER_URL schreibt der Download nichts: claim_download()
+    vermerkt ihn atomar in Redis, Marker, VersionDownload, Zähler und
+    UserInstalledApp schreibt der nächste Flush gebündelt (counters.py).
+    Ohne Redis, oder wenn es nicht erreichbar ist, wird sofort geschrieben.
+    """
+    if write_behind_enabled():
+        if VersionDownloadMarker.objects.filter(user=user, version=version).exists():
+            return False
+        try:
+            return claim_download(user.id, version.id, version.app_id)
+        except CounterStoreUnavailable:
+            # Lieber eine Zeilensperre als ein verlorener Download
+            pass
+    return _record_now(user, version)
+
+
+def _record_now(user, version):
+    with transaction.atomic():
+        _, counted = VersionDownloadMarker.objects.get_or_create(user=user, version=version)
+        if counted:
+            VersionDownload.objects.get_or_create(user=user, version=version)
+            App.objects.filter(id=version.app_id).update(download_count=F('download_count') + 1)
+    update_installed_app(user.id, version)
+    return counted
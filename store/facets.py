@@ -0,0 +1,130 @@
+# facets.py
+# Facettierte Suche (Plattform, Kategorie, Unterkategorie, Altersfreigabe,
+# Sprache, Warnhinweis).
+# Alle Zählungen kommen aus zwei gruppierten Abfragen über die veröffentlichten
+# Apps, die als Abschnitt 'facets' gecacht werden (siehe fragments.py). Die
+# Zahlen für jede Filterkombination werden daraus im Speicher berechnet.
+from collections import Counter
+from urllib.parse import urlencode
+
+from django.db.models import Count
+from django.utils import timezone
+
+from .fragments import get_section, FACET_SECTION
+from .models import (
+    App, AppWarning, PLATFORM_CHOICES, CATEGORY_CHOICES, SUB_CATEGORY_CHOICES,
+    AGE_RATINGS, LANGUAGES, WARNING_TYPES,
+)
+
+# Facetten, die direkt Felder von App sind – Reihenfolge = Position im Grid-Tupel
+APP_FACETS = ('platform', 'category', 'subcategory', 'age_rating', 'language')
+
+FACETS = (
+    ('platform', 'Plattform', PLATFORM_CHOICES),
+    ('category', 'Kategorie', CATEGORY_CHOICES),
+    ('subcategory', 'Unterkategorie', SUB_CATEGORY_CHOICES),
+    ('age_rating', 'Altersfreigabe', AGE_RATINGS),
+    ('language', 'Sprache', LANGUAGES),
+    ('warning', 'Warnhinweis', WARNING_TYPES),
+)
+
+
+def published_apps():
+    return App.objects.filter(published=True, published_at__lte=timezone.now())
+
+
+def _build_grid():
+    apps = published_apps()
+    return {
+        # (plattform, kategorie, ...) -> Anzahl Apps
+        'apps': [
+            (tuple(row[f] for f in APP_FACETS), row['n'])
+            for row in apps.values(*APP_FACETS).annotate(n=Count('id')).order_by()
+        ],
+        # dasselbe zusätzlich nach Warnhinweis aufgeteilt (eine App pro Typ genau einmal)
+        'warnings': [
+            (tuple(row[f] for f in APP_FACETS), row['warnings__warning_type'], row['n'])
+            for row in apps.filter(warnings__isnull=False).values(
+                *APP_FACETS, 'warnings__warning_type'
+            ).annotate(n=Count('id', distinct=True)).order_by()
+        ],
+    }
+
+
+def facet_grid():
+    return get_section(FACET_SECTION, _build_grid)
+
+
+def parse_filters(params):
+    """
+    Übernimmt nur gültige Werte aus request.GET (pro Facette ein Wert).
+    """
+    filters = {}
+    for name, _, choices in FACETS:
+        value = params.get(name)
+        if value and value in dict(choices):
+            filters[name] = value
+    return filters
+
+
+def filter_apps(queryset, filters):
+    app_filters = {f: filters[f] for f in APP_FACETS if f in filters}
+    queryset = queryset.filter(**app_filters)
+    if 'warning' in filters:
+        queryset = queryset.filter(
+            id__in=AppWarning.objects.filter(warning_type=filters['warning']).values('app_id')
+        )
+    return queryset
+
+
+def _matches(dims, filters, skip=None):
+    return all(
+        dims[i] == filters[name]
+        for i, name in enumerate(APP_FACETS)
+        if name in filters and name != skip
+    )
+
+
+def facet_counts(filters):
+    """
+    Zählungen pro Facettenwert. Wie üblich gilt für jede Facette die Auswahl
+    aller *anderen* Facetten, damit man innerhalb einer Facette wechseln kann.
+    """
+    grid = facet_grid()
+    counts = {name: Counter() for name, _, _ in FACETS}
+    warning = filters.get('warning')
+
+    if warning:
+        rows = [(dims, n) for dims, warning_type, n in grid['warnings'] if warning_type == warning]
+    else:
+        rows = grid['apps']
+    for i, name in enumerate(APP_FACETS):
+        for dims, n in rows:
+            if _matches(dims, filters, skip=name):
+                counts[name][dims[i]] += n
+
+    for dims, warning_type, n in grid['warnings']:
+        if _matches(dims, filters):
+            counts['warning'][warning_type] += n
+
+    facets = []
+    for name, label, choices in FACETS:
+        options = []
+        for value, value_label in choices:
+            selected = filters.get(name) == value
+            if not counts[name][value] and not selected:
+                continue
+            toggled = dict(filters)
+            if selected:
+                toggled.pop(name)
+            else:
+                toggled[name] = value
+            options.append({
+                'value': value,
+                'label': value_label,
+                'count': counts[name][value],
+                'selected': selected,
+                'query': urlencode(toggled),
+            })
+        facets.append({'name': name, 'label': label, 'options': options})
+    return facets
@@ -0,0 +1,134 @@
+# fake_clamd.py
+# Minimaler clamd-Ersatz für Tests und Lasttests ohne ClamAV.
+# Versteht PING, VERSION, INSTREAM, IDSESSION und END (mit z- oder n-Präfix)
+# und meldet einen Fund, wenn der Datenstrom eine der Signaturen enthält
+# (standardmäßig die EICAR-Testdatei). Mit delay lässt sich die Scandauer
+# von clamd nachstellen. Start: python manage.py fake_clamd
+import socketserver
+import struct
+import threading
+import time
+
+EICAR = b'X5O!P%@AP[4\\PZX54(P^)7CC)7}$EICAR-STANDARD-ANTIVIRUS-TEST-FILE!H+H*'
+DEFAULT_SIGNATURES = {'Eicar-Test-Signature': EICAR}
+DEFAULT_VERSION = 'ClamAV 1.0.0/1/Fake'
+DEFAULT_STREAM_MAX_LENGTH = 1024 * 1024 * 1024
+
+
+class _Handler(socketserver.BaseRequestHandler):
+
+    def setup(self):
+        self._buffer = b''
+        self._session = None
+
+    def _read_exact(self, size):
+        while len(self._buffer) < size:
+            data = self.request.recv(65536)
+            if not data:
+                raise EOFError
+            self._buffer += data
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def _read_command(self):
+        prefix = self._read_exact(1)
+        end = {b'z': b'\0', b'n': b'\n'}.get(prefix)
+        if end is None:
+            # Befehl ohne Präfix (veraltet): bis Zeilenende lesen
+            end = b'\n'
+            self._buffer = prefix + self._buffer
+        while end not in self._buffer:
+            data = self.request.recv(65536)
+            if not data:
+                raise EOFError
+            self._buffer += data
+        command, self._buffer = self._buffer.split(end, 1)
+        return command.decode('ascii', errors='replace'), end
+
+    def _send(self, reply, end):
+        if self._session is not None:
+            self._session += 1
+            reply = f'{self._session}: {reply}'
+        self.request.sendall(reply.encode('utf-8') + end)
+
+    def _instream(self):
+        server = self.server
+        signatures = server.signatures
+        overlap = max((len(s) for s in signatures.values()), default=1) - 1
+        tail = b''
+        total = 0
+        found = None
+        while True:
+            (length,) = struct.unpack('>L', self._read_exact(4))
+            if length == 0:
+                break
+            chunk = self._read_exact(length)
+            total += length
+            if total > server.stream_max_length:
+                # clamd liest danach nicht weiter und antwortet sofort
+                return 'INSTREAM size limit exceeded. ERROR', True
+            if found is None:
+                window = tail + chunk
+                for name, pattern in signatures.items():
+                    if pattern in window:
+                        found = name
+                        break
+                tail = window[-overlap:] if overlap else b''
+        if server.delay:
+            time.sleep(server.delay)
+        server.record_scan(total)
+        if found:
+            return f'stream: {found} FOUND', False
+        return 'stream: OK', False
+
+    def handle(self):
+        try:
+            while True:
+                command, end = self._read_command()
+                if command == 'IDSESSION':
+                    self._session = 0
+                elif command == 'END':
+                    return
+                elif command == 'PING':
+                    self._send('PONG', end)
+                elif command == 'VERSION':
+                    self._send(self.server.version, end)
+                elif command == 'INSTREAM':
+                    reply, close = self._instream()
+                    self._send(reply, end)
+                    if close:
+                        return
+                else:
+                    self._send('UNKNOWN COMMAND', end)
+                if self._session is None:
+                    # Ohne Sitzung beantwortet clamd nur einen Befehl pro Verbindung
+                    return
+        except (EOFError, ConnectionError):
+            return
+
+
+class FakeClamdServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 3310), signatures=None, version=DEFAULT_VERSION,
+                 delay=0, stream_max_length=DEFAULT_STREAM_MAX_LENGTH):
+        super().__init__(address, _Handler)
+        self.signatures = DEFAULT_SIGNATURES if signatures is None else signatures
+        self.version = version
+        self.delay = delay
+        self.stream_max_length = stream_max_length
+        self._lock = threading.Lock()
+        self.scans = 0
+        self.scanned_bytes = 0
+
+    def record_scan(self, size):
+        with self._lock:
+            self.scans += 1
+            self.scanned_bytes += size
+
+    def start(self):
+        """Startet den Server in einem Hintergrund-Thread (für Tests)."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self.server_address
@@ -3,6 +3,7 @@ from .models import App, AppWarning, Version, Developer, CATEGORY_CHOICES, SUB_C
 from django.utils import timezone
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
+from .versioning import validate_version_number
 
 class CustomUserCreationForm(UserCreationForm):
     email = forms.EmailField(
@@ -68,6 +69,11 @@ class VersionForm(forms.ModelForm):
         model = Version
         fields = ['version_number', 'file', 'release_notes']
 
+    def clean_version_number(self):
+        version_number = self.cleaned_data['version_number']
+        validate_version_number(version_number)
+        return version_number
+
 class DeveloperForm(forms.ModelForm):
     class Meta:
         model = Developer
@@ -117,7 +123,7 @@ class DeveloperForm(forms.ModelForm):
         }
 
 class AppWithVersionForm(forms.ModelForm):
-    version_number = forms.CharField(max_length=50)
+    version_number = forms.CharField(max_length=50, validators=[validate_version_number])
     file = forms.FileField()
     release_notes = forms.CharField(widget=forms.Textarea, required=False)
     published_at = forms.DateTimeField(
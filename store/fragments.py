@@ -0,0 +1,79 @@
+# fragments.py
+# Gecachte Abschnitte der Startseite (Top Downloads, Trending, Neue Apps, Katalog,
+# Plattformlisten). Invalidiert wird über Signale (siehe signals.py).
+#
+# Ein invalidierter oder abgelaufener Abschnitt wird nur von einem Request neu
+# berechnet (Lock per cache.add); alle anderen bekommen solange den alten Stand
+# bzw. warten kurz, statt gleichzeitig die Datenbank zu belasten.
+import time
+
+from django.core.cache import cache
+
+from .models import PLATFORM_CHOICES
+
+SECTION_TIMEOUT = 5 * 60
+# Der alte Stand bleibt deutlich länger liegen, um ihn während der Neuberechnung auszuliefern
+SECTION_STALE_TIMEOUT = 60 * 60
+SECTION_LOCK_TIMEOUT = 30
+SECTION_WAIT_STEPS = 40
+SECTION_WAIT_INTERVAL = 0.05
+
+HOME_SECTIONS = ('top_downloads', 'trending', 'new_apps', 'catalog')
+# Zählungs-Grid der facettierten Suche (facets.py)
+FACET_SECTION = 'facets'
+
+
+def platform_section(platform_name):
+    return f'platform_{platform_name.lower()}'
+
+
+ALL_SECTIONS = HOME_SECTIONS + (FACET_SECTION,) + tuple(platform_section(p) for p, _ in PLATFORM_CHOICES)
+
+
+def _section_key(name):
+    return f'home_section_{name}'
+
+
+def get_section(name, builder, timeout=SECTION_TIMEOUT):
+    """
+    Liefert den gecachten Abschnitt oder berechnet ihn (single-flight) mit builder() neu.
+    """
+    key = _section_key(name)
+    entry = cache.get(key)
+    if entry is not None and entry[0] > time.time():
+        return entry[1]
+
+    lock_key = key + '_lock'
+    if cache.add(lock_key, True, timeout=SECTION_LOCK_TIMEOUT):
+        try:
+            value = builder()
+            store_section(name, value, timeout)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    # Ein anderer Request rechnet gerade – alten Stand ausliefern, falls vorhanden
+    if entry is not None:
+        return entry[1]
+    for _ in range(SECTION_WAIT_STEPS):
+        time.sleep(SECTION_WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[1]
+    return builder()
+
+
+def store_section(name, value, timeout=SECTION_TIMEOUT):
+    """
+    Schreibt einen von einem Hintergrundjob berechneten Abschnitt direkt in den Cache.
+    """
+    cache.set(_section_key(name), (time.time() + timeout, value), timeout=SECTION_STALE_TIMEOUT)
+
+
+def invalidate_sections(*names):
+    """
+    Markiert Abschnitte als veraltet. Der alte Stand bleibt bis zur Neuberechnung sichtbar.
+    """
+    keys = [_section_key(name) for name in (names or ALL_SECTIONS)]
+    for key, entry in cache.get_many(keys).items():
+        cache.set(key, (0, entry[1]), timeout=SECTION_STALE_TIMEOUT)
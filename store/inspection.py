@@ -0,0 +1,404 @@
+# inspection.py
+# Streaming-Prüfung von Archiven (APK/IPA/AAB, .tar.gz, .gz).
+# Statt zipfile.ZipFile (lädt das komplette Inhaltsverzeichnis als ZipInfo-
+# Objekte in den Speicher) wird das zentrale Verzeichnis Eintrag für Eintrag
+# gelesen. Jeder Eintrag wird sofort gegen die Grenzwerte geprüft; beim ersten
+# Verstoß wird abgebrochen. Der Speicherbedarf bleibt auch bei 100k+ Einträgen
+# konstant.
+#
+# .gz und .tar.gz werden beim Lesen entpackt, ohne temporäre Dateien. Die Menge
+# entpackter Bytes ist gedeckelt (Gzip-Bomben); unsichere Pfade brechen sofort ab.
+import gzip
+import struct
+import tarfile
+import zlib
+from collections import namedtuple
+
+ZIP_MAX_ENTRIES = 200000
+# Einzelner Eintrag: ab ZIP_RATIO_MIN_SIZE zählt das Kompressionsverhältnis
+ZIP_MAX_ENTRY_SIZE = 1024 * 1024 * 1024
+ZIP_MAX_ENTRY_RATIO = 200
+ZIP_RATIO_MIN_SIZE = 1024 * 1024
+# Gesamtes Archiv
+ZIP_MAX_TOTAL_SIZE = 4 * 1024 * 1024 * 1024
+ZIP_MAX_TOTAL_RATIO = 100
+
+# .gz/.tar.gz: höchstens so viele entpackte Bytes (absolut und relativ zur Dateigröße)
+GZ_MAX_DECOMPRESSED_SIZE = 2 * 1024 * 1024 * 1024
+GZ_MAX_RATIO = 100
+# Bis zu dieser entpackten Größe gilt die Ratio nicht (kleine Textdateien packen sehr gut)
+GZ_RATIO_MIN_SIZE = 8 * 1024 * 1024
+TAR_MAX_ENTRIES = 200000
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+ZipEntry = namedtuple('ZipEntry', 'path compressed_size size crc')
+
+
+class ArchiveViolation(Exception):
+    """Das Archiv ist beschädigt oder verletzt einen Grenzwert."""
+
+
+_EOCD = struct.Struct('<4s4H2LH')
+_ZIP64_LOCATOR = struct.Struct('<4sLQL')
+_ZIP64_EOCD = struct.Struct('<4sQ2H2L4Q')
+_CENTRAL_HEADER = struct.Struct('<4s4B4HL2L5H2L')
+_EXTRA_HEADER = struct.Struct('<2H')
+
+_EOCD_SIGNATURE = b'PK\x05\x06'
+_ZIP64_LOCATOR_SIGNATURE = b'PK\x06\x07'
+_ZIP64_EOCD_SIGNATURE = b'PK\x06\x06'
+_CENTRAL_SIGNATURE = b'PK\x01\x02'
+_LOCAL_SIGNATURE = b'PK\x03\x04'
+_DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+_ZIP64_EXTRA_ID = 0x0001
+_MAX_COMMENT = 0xFFFF
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+
+
+def _read_exact(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise ArchiveViolation("Archiv ist abgeschnitten.")
+    return data
+
+
+def _find_central_directory(f):
+    """
+    Liefert (Offset, Anzahl Einträge) des zentralen Verzeichnisses, inkl. ZIP64.
+    """
+    f.seek(0, 2)
+    file_size = f.tell()
+    tail_size = min(file_size, _EOCD.size + _MAX_COMMENT)
+    f.seek(file_size - tail_size)
+    tail = f.read(tail_size)
+    pos = tail.rfind(_EOCD_SIGNATURE)
+    if pos < 0 or len(tail) - pos < _EOCD.size:
+        raise ArchiveViolation("Kein ZIP-Archiv (Verzeichnisende fehlt).")
+    eocd_offset = file_size - tail_size + pos
+    _, _, _, _, entries, cd_size, cd_offset, _ = _EOCD.unpack(tail[pos:pos + _EOCD.size])
+
+    if entries == 0xFFFF or 0xFFFFFFFF in (cd_size, cd_offset):
+        # ZIP64: Locator direkt vor dem Verzeichnisende, der ZIP64-Datensatz direkt davor
+        zip64_offset = eocd_offset - _ZIP64_LOCATOR.size - _ZIP64_EOCD.size
+        if zip64_offset < 0:
+            raise ArchiveViolation("ZIP64-Verzeichnis fehlt.")
+        f.seek(zip64_offset)
+        record = _ZIP64_EOCD.unpack(_read_exact(f, _ZIP64_EOCD.size))
+        locator = _ZIP64_LOCATOR.unpack(_read_exact(f, _ZIP64_LOCATOR.size))
+        if record[0] != _ZIP64_EOCD_SIGNATURE or locator[0] != _ZIP64_LOCATOR_SIGNATURE:
+            raise ArchiveViolation("Ungültiges ZIP64-Verzeichnis.")
+        entries, cd_size, cd_offset = record[7], record[8], record[9]
+        eocd_offset = zip64_offset
+
+    # Vorangestellte Daten (z.B. selbstentpackende Archive) verschieben alle Offsets
+    prefix = eocd_offset - cd_size - cd_offset
+    if prefix < 0:
+        raise ArchiveViolation("Ungültiger Offset des ZIP-Verzeichnisses.")
+    return cd_offset + prefix, entries
+
+
+def _zip64_sizes(extra, compressed_size, size):
+    pos = 0
+    while pos + _EXTRA_HEADER.size <= len(extra):
+        header_id, length = _EXTRA_HEADER.unpack_from(extra, pos)
+        pos += _EXTRA_HEADER.size
+        if header_id == _ZIP64_EXTRA_ID:
+            # Nur die Felder stehen drin, die im Header 0xFFFFFFFF sind – zuerst die Originalgröße
+            values = struct.unpack_from(f'<{length // 8}Q', extra, pos)
+            i = 0
+            if size == 0xFFFFFFFF and i < len(values):
+                size, i = values[i], i + 1
+            if compressed_size == 0xFFFFFFFF and i < len(values):
+                compressed_size = values[i]
+            break
+        pos += length
+    return compressed_size, size
+
+
+def _has_zip64_extra(extra):
+    pos = 0
+    while pos + _EXTRA_HEADER.size <= len(extra):
+        header_id, length = _EXTRA_HEADER.unpack_from(extra, pos)
+        if header_id == _ZIP64_EXTRA_ID:
+            return True
+        pos += _EXTRA_HEADER.size + length
+    return False
+
+
+def iter_zip_entries(f):
+    """
+    Liest das zentrale Verzeichnis Eintrag für Eintrag (konstanter Speicher).
+    """
+    offset, count = _find_central_directory(f)
+    if count > ZIP_MAX_ENTRIES:
+        raise ArchiveViolation(f"Zu viele Einträge im Archiv ({count}).")
+    f.seek(offset)
+    for _ in range(count):
+        header = _CENTRAL_HEADER.unpack(_read_exact(f, _CENTRAL_HEADER.size))
+        if header[0] != _CENTRAL_SIGNATURE:
+            raise ArchiveViolation("Beschädigtes ZIP-Verzeichnis.")
+        flags, crc, compressed_size, size = header[5], header[9], header[10], header[11]
+        name_length, extra_length, comment_length = header[12], header[13], header[14]
+        raw_name = _read_exact(f, name_length)
+        extra = _read_exact(f, extra_length)
+        f.seek(comment_length, 1)
+
+        path = raw_name.decode('utf-8' if flags & 0x800 else 'cp437', errors='replace')
+        if 0xFFFFFFFF in (compressed_size, size):
+            compressed_size, size = _zip64_sizes(extra, compressed_size, size)
+        yield ZipEntry(path, compressed_size, size, crc)
+
+
+def unsafe_path(path):
+    normalized = path.replace('\\', '/')
+    return (
+        normalized.startswith('/')
+        or (len(normalized) > 1 and normalized[1] == ':')
+        or '..' in normalized.split('/')
+    )
+
+
+def inspect_zip(file_path, required=None):
+    """
+    Prüft ein ZIP-Archiv in einem Durchgang über das zentrale Verzeichnis.
+    required(path) -> bool markiert Pflichteinträge (z.B. AndroidManifest.xml).
+    Wirft ArchiveViolation beim ersten Verstoß, sonst Rückgabe einer Zusammenfassung.
+    """
+    entries = 0
+    total_compressed = 0
+    total_size = 0
+    found_required = False
+
+    with open(file_path, 'rb') as f:
+        archive_size = f.seek(0, 2)
+        for entry in iter_zip_entries(f):
+            entries += 1
+            if unsafe_path(entry.path):
+                raise ArchiveViolation(f"Unsichere Pfad-Referenz im Archiv: {entry.path}")
+            if entry.size > ZIP_MAX_ENTRY_SIZE:
+                raise ArchiveViolation(f"Eintrag zu groß: {entry.path} ({entry.size} Bytes)")
+            if entry.size > ZIP_RATIO_MIN_SIZE and (
+                not entry.compressed_size or entry.size / entry.compressed_size > ZIP_MAX_ENTRY_RATIO
+            ):
+                raise ArchiveViolation(f"Verdacht auf ZIP-Bombe: Eintrag {entry.path} extrem stark komprimiert.")
+
+            total_compressed += entry.compressed_size
+            total_size += entry.size
+            if total_size > ZIP_MAX_TOTAL_SIZE:
+                raise ArchiveViolation("Verdacht auf ZIP-Bombe: entpackte Gesamtgröße zu hoch.")
+            # Die komprimierten Daten passen in die Datei – so greift das Limit schon während des Durchlaufs
+            if archive_size and total_size / archive_size > ZIP_MAX_TOTAL_RATIO:
+                raise ArchiveViolation("Verdacht auf ZIP-Bombe: Verhältnis unkomprimiert zu komprimiert zu hoch.")
+
+            if required and not found_required and required(entry.path):
+                found_required = True
+
+    return {
+        'entries': entries,
+        'compressed_size': total_compressed,
+        'size': total_size,
+        'found_required': found_required,
+    }
+
+
+class _CappedReader:
+    """
+    Liest entpackte Bytes aus einer gzip-Datei und bricht ab, sobald mehr als
+    limit Bytes entstanden sind. Unterstützt das Zurücklegen gelesener Daten.
+    """
+
+    def __init__(self, raw, limit):
+        self._gzip = gzip.GzipFile(fileobj=raw, mode='rb')
+        self._limit = limit
+        self._pending = b''
+        self.total = 0
+
+    def read(self, size=-1):
+        if self._pending:
+            data = self._pending[:size] if size >= 0 else self._pending
+            self._pending = self._pending[len(data):]
+            return data
+        data = self._gzip.read(STREAM_CHUNK_SIZE if size < 0 else size)
+        self.total += len(data)
+        if self.total > self._limit:
+            raise ArchiveViolation("Verdacht auf Gzip-Bombe: entpackte Größe zu hoch.")
+        return data
+
+    def read_exact(self, size):
+        chunks = []
+        while size > 0:
+            data = self.read(size)
+            if not data:
+                raise ArchiveViolation("Archiv ist abgeschnitten.")
+            chunks.append(data)
+            size -= len(data)
+        return b''.join(chunks)
+
+    def skip(self, size):
+        while size > 0:
+            data = self.read(min(size, STREAM_CHUNK_SIZE))
+            if not data:
+                raise ArchiveViolation("Archiv ist abgeschnitten.")
+            size -= len(data)
+
+    def unread(self, data):
+        self._pending = data + self._pending
+
+    def drain(self):
+        while self.read(STREAM_CHUNK_SIZE):
+            pass
+
+    def close(self):
+        self._gzip.close()
+
+
+def _decompressed_limit(file_path):
+    with open(file_path, 'rb') as f:
+        size = f.seek(0, 2)
+    return min(GZ_MAX_DECOMPRESSED_SIZE, max(size * GZ_MAX_RATIO, GZ_RATIO_MIN_SIZE))
+
+
+def _skip_deflate(stream):
+    """Überspringt einen Deflate-Datenstrom unbekannter Länge (Datendeskriptor)."""
+    decompressor = zlib.decompressobj(-15)
+    while not decompressor.eof:
+        data = stream.read(STREAM_CHUNK_SIZE)
+        if not data:
+            raise ArchiveViolation("Archiv ist abgeschnitten.")
+        try:
+            decompressor.decompress(data, STREAM_CHUNK_SIZE)
+            while decompressor.unconsumed_tail and not decompressor.eof:
+                decompressor.decompress(decompressor.unconsumed_tail, STREAM_CHUNK_SIZE)
+        except zlib.error as e:
+            raise ArchiveViolation(f"Beschädigter Eintrag im Archiv: {e}")
+    stream.unread(decompressor.unused_data)
+
+
+def _skip_stored(stream, zip64):
+    """
+    Überspringt unkomprimierte Daten unbekannter Länge: das Ende ist der
+    Datendeskriptor, dessen CRC und Größe zu den Bytes davor passen.
+    """
+    descriptor = struct.Struct('<4sLQQ' if zip64 else '<4sLLL')
+    crc = 0
+    consumed = 0
+    data = b''
+    while True:
+        chunk = stream.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            raise ArchiveViolation("Archiv ist abgeschnitten.")
+        data += chunk
+        pos = data.find(_DESCRIPTOR_SIGNATURE)
+        while pos != -1 and pos + descriptor.size <= len(data):
+            _, expected_crc, compressed_size, _ = descriptor.unpack_from(data, pos)
+            if compressed_size == consumed + pos and zlib.crc32(data[:pos], crc) == expected_crc:
+                stream.unread(data[pos + descriptor.size:])
+                return
+            pos = data.find(_DESCRIPTOR_SIGNATURE, pos + 1)
+        # Ende behalten, falls der Deskriptor über die Blockgrenze reicht
+        keep = pos if pos != -1 else max(len(data) - descriptor.size, 0)
+        crc = zlib.crc32(data[:keep], crc)
+        consumed += keep
+        data = data[keep:]
+
+
+def iter_zip_stream(stream):
+    """
+    Liest ein ZIP-Archiv ohne Seek über die lokalen Header (z.B. aus einer .gz).
+    Liefert die Pfade der Einträge; stoppt am zentralen Verzeichnis.
+    """
+    while True:
+        signature = stream.read_exact(4)
+        if signature != _LOCAL_SIGNATURE:
+            # Zentrales Verzeichnis oder Ende erreicht
+            return
+        header = _LOCAL_HEADER.unpack(signature + stream.read_exact(_LOCAL_HEADER.size - 4))
+        flags, method = header[2], header[3]
+        compressed_size, size = header[7], header[8]
+        raw_name = stream.read_exact(header[9])
+        extra = stream.read_exact(header[10])
+        path = raw_name.decode('utf-8' if flags & 0x800 else 'cp437', errors='replace')
+        yield path
+
+        if 0xFFFFFFFF in (compressed_size, size):
+            compressed_size, size = _zip64_sizes(extra, compressed_size, size)
+        if flags & 0x08:
+            # Größe steht erst im Datendeskriptor hinter den Daten
+            zip64 = _has_zip64_extra(extra)
+            if method == 8:
+                _skip_deflate(stream)
+                descriptor = stream.read_exact(4)
+                if descriptor != _DESCRIPTOR_SIGNATURE:
+                    stream.unread(descriptor)
+                # CRC + Größen (ZIP64: 8 Byte pro Größe)
+                stream.skip(20 if zip64 else 12)
+            elif method == 0:
+                _skip_stored(stream, zip64)
+            else:
+                raise ArchiveViolation(f"Nicht unterstützter ZIP-Eintrag: {path}")
+        else:
+            stream.skip(compressed_size)
+
+
+def inspect_gz(file_path, required=None):
+    """
+    Entpackt eine .gz-Datei im Speicher-Stream. Enthält sie ein ZIP (z.B. IPA),
+    werden dessen Einträge geprüft. Rückgabe: Zusammenfassung, wirft ArchiveViolation.
+    """
+    is_zip = False
+    entries = 0
+    found_required = False
+    with open(file_path, 'rb') as raw:
+        stream = _CappedReader(raw, _decompressed_limit(file_path))
+        try:
+            head = stream.read(4)
+            stream.unread(head)
+            if head == _LOCAL_SIGNATURE:
+                is_zip = True
+                for path in iter_zip_stream(stream):
+                    entries += 1
+                    if unsafe_path(path):
+                        raise ArchiveViolation(f"Unsichere Pfad-Referenz im Archiv: {path}")
+                    if required and not found_required and required(path):
+                        found_required = True
+            # Rest lesen, damit gzip die Prüfsumme kontrolliert
+            stream.drain()
+        except (OSError, EOFError, zlib.error) as e:
+            raise ArchiveViolation(f"Fehler beim Entpacken der .gz-Datei: {e}")
+        finally:
+            stream.close()
+    return {
+        'is_zip': is_zip,
+        'entries': entries,
+        'size': stream.total,
+        'found_required': found_required,
+    }
+
+
+def inspect_tar_gz(file_path):
+    """
+    Prüft ein .tar.gz sequenziell (Stream-Modus), ohne alle Header zu sammeln.
+    """
+    entries = 0
+    with open(file_path, 'rb') as raw:
+        stream = _CappedReader(raw, _decompressed_limit(file_path))
+        try:
+            with tarfile.open(fileobj=stream, mode='r|') as tar:
+                for member in tar:
+                    entries += 1
+                    if entries > TAR_MAX_ENTRIES:
+                        raise ArchiveViolation(f"Zu viele Einträge im Archiv (> {TAR_MAX_ENTRIES}).")
+                    if unsafe_path(member.name):
+                        raise ArchiveViolation(f"Unsichere Pfad-Referenz im tar.gz: {member.name}")
+                    if (member.issym() or member.islnk()) and unsafe_path(member.linkname):
+                        raise ArchiveViolation(f"Unsicherer Link im tar.gz: {member.name} -> {member.linkname}")
+                    if member.isdev():
+                        raise ArchiveViolation(f"Gerätedatei im tar.gz: {member.name}")
+                    # TarFile merkt sich sonst jeden Header
+                    tar.members = []
+            stream.drain()
+        except (tarfile.TarError, OSError, EOFError, zlib.error) as e:
+            raise ArchiveViolation(f"Fehler beim Entpacken des tar.gz: {e}")
+        finally:
+            stream.close()
+    return {'entries': entries, 'size': stream.total}
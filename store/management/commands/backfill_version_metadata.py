@@ -0,0 +1,20 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from store.models import Version
+from store.utils import update_file_metadata
+
+
+class Command(BaseCommand):
+    help = "Ermittelt Dateigröße und SHA-256 für Versionen, bei denen sie noch fehlen."
+
+    def handle(self, *args, **options):
+        done = 0
+        for version in Version.objects.filter(sha256='').exclude(file=''):
+            if not os.path.exists(version.file.path):
+                self.stdout.write(self.style.WARNING(f"Datei fehlt: {version}"))
+                continue
+            update_file_metadata(version)
+            done += 1
+        self.stdout.write(self.style.SUCCESS(f"{done} Versionen aktualisiert."))
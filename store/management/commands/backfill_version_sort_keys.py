@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from store.models import App, Version
+from store.versioning import version_sort_key
+
+
+class Command(BaseCommand):
+    help = "Berechnet version_sort_key für alle Versionen und aktualisiert die latest_version-Zeiger."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch = []
+        changed = 0
+        unparsed = 0
+        for version in Version.objects.only('id', 'version_number', 'version_sort_key').iterator():
+            key = version_sort_key(version.version_number)
+            if not key:
+                # Neue Uploads lehnt das Formular ab; alte vergleicht update_installed_app nach Upload-Zeitpunkt
+                unparsed += 1
+                self.stdout.write(self.style.WARNING(
+                    f"Nicht interpretierbare Versionsnummer (ID {version.id}): {version.version_number!r}"
+                ))
+            if key != version.version_sort_key:
+                version.version_sort_key = key
+                batch.append(version)
+            if len(batch) >= options['batch_size']:
+                changed += Version.objects.bulk_update(batch, ['version_sort_key'])
+                batch = []
+        if batch:
+            changed += Version.objects.bulk_update(batch, ['version_sort_key'])
+
+        # "Neueste Version" hängt jetzt vom Schlüssel ab
+        for app in App.objects.only('id'):
+            app.refresh_latest_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{changed} Versionen aktualisiert, {unparsed} ohne Sortierschlüssel."
+        ))
@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from store.clamav import ClamdScanner
+from store.fake_clamd import FakeClamdServer
+
+
+class Command(BaseCommand):
+    help = "Misst den Durchsatz des Virenscans (INSTREAM mit Verbindungspool)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help="Zu scannende Dateien.")
+        parser.add_argument('--repeat', type=int, default=10, help="Wie oft jede Datei gescannt wird.")
+        parser.add_argument('--pool-size', type=int, default=getattr(settings, 'CLAMAV_POOL_SIZE', 4))
+        parser.add_argument('--fake', action='store_true',
+                            help="Gegen einen lokalen clamd-Ersatz statt CLAMAV_HOST testen.")
+        parser.add_argument('--fake-delay', type=float, default=0)
+
+    def handle(self, *args, **options):
+        server = None
+        host = getattr(settings, 'CLAMAV_HOST', '127.0.0.1')
+        port = getattr(settings, 'CLAMAV_PORT', 3310)
+        if options['fake']:
+            server = FakeClamdServer(('127.0.0.1', 0), delay=options['fake_delay'])
+            host, port = server.start()
+
+        scanner = ClamdScanner(
+            host=host,
+            port=port,
+            pool_size=options['pool_size'],
+            connect_timeout=getattr(settings, 'CLAMAV_CONNECT_TIMEOUT', 5),
+            timeout=getattr(settings, 'CLAMAV_TIMEOUT', 120),
+        )
+        paths = options['files'] * options['repeat']
+        try:
+            started = time.monotonic()
+            results = scanner.scan_files(paths)
+            elapsed = time.monotonic() - started
+        finally:
+            scanner.close()
+            if server:
+                server.shutdown()
+                server.server_close()
+
+        errors = [r for r in results if r.error]
+        found = [r for r in results if r.signature]
+        for r in errors[:5]:
+            self.stdout.write(self.style.WARNING(f"{r.path}: {r.error}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(results)} Scans in {elapsed:.2f}s ({len(results) / elapsed:.1f}/s), "
+            f"{len(found)} Funde, {len(errors)} Fehler."
+        ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from store.fake_clamd import DEFAULT_VERSION, FakeClamdServer
+
+
+class Command(BaseCommand):
+    help = "Startet einen clamd-Ersatz (INSTREAM, EICAR-Erkennung) für Tests und Lasttests."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=3310)
+        parser.add_argument('--delay', type=float, default=0, help="Künstliche Scandauer in Sekunden.")
+        parser.add_argument('--clamd-version', default=DEFAULT_VERSION,
+                            help="Antwort auf VERSION (enthält die Signaturversion).")
+
+    def handle(self, *args, **options):
+        server = FakeClamdServer(
+            (options['host'], options['port']),
+            version=options['clamd_version'],
+            delay=options['delay'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Fake-clamd läuft auf {options['host']}:{options['port']}."))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"{server.scans} Scans, {server.scanned_bytes} Bytes.")
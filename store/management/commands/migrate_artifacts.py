@@ -0,0 +1,25 @@
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from store.artifacts import migrate_version_file
+from store.models import Version
+
+
+class Command(BaseCommand):
+    help = "Überführt vorhandene Versionsdateien in den inhaltsadressierten Artifact-Speicher."
+
+    def handle(self, *args, **options):
+        done = 0
+        freed = 0
+        for version in Version.objects.filter(artifact__isnull=True).exclude(file=''):
+            if not os.path.exists(version.file.path):
+                self.stdout.write(self.style.WARNING(f"Datei fehlt: {version}"))
+                continue
+            old_name = migrate_version_file(version)
+            done += 1
+            if old_name:
+                default_storage.delete(old_name)
+                freed += 1
+        self.stdout.write(self.style.SUCCESS(f"{done} Versionen übernommen, {freed} alte Dateien gelöscht."))
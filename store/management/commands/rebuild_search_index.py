@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from store.search import reindex_apps, search_backend
+
+
+class Command(BaseCommand):
+    help = "Baut den Volltext-Suchindex für alle Apps neu auf."
+
+    def handle(self, *args, **options):
+        backend = search_backend()
+        if backend is None:
+            self.stdout.write(self.style.WARNING("Keine Volltextsuche für diese Datenbank verfügbar."))
+            return
+        reindex_apps()
+        self.stdout.write(self.style.SUCCESS(f"Suchindex neu aufgebaut ({backend})."))
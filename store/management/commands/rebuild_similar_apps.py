@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from store.models import App
+from store.similar import rebuild_similar_apps
+
+
+class Command(BaseCommand):
+    help = "Berechnet die vorberechneten 'Ähnliche Apps' und die latest_version-Zeiger neu."
+
+    def handle(self, *args, **options):
+        for app in App.objects.only('id'):
+            app.refresh_latest_version()
+        rows = rebuild_similar_apps()
+        self.stdout.write(self.style.SUCCESS(f"{rows} Einträge für 'Ähnliche Apps' geschrieben."))
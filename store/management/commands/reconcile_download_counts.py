@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from collections import Counter
+
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from store.counters import flush_download_counts, flush_download_events, get_counter_store, write_behind_enabled
+from store.models import App, VersionDownload, VersionDownloadDay
+
+
+class Command(BaseCommand):
+    help = "Berechnet App.download_count neu aus VersionDownload und den archivierten Tagessummen."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Nur Abweichungen anzeigen.")
+
+    def handle(self, *args, **options):
+        # Ausstehende Zähler zuerst schreiben, sonst würden sie beim nächsten Flush doppelt gezählt
+        if not options['dry_run']:
+            flush_download_events()
+            flush_download_counts()
+
+        downloads = VersionDownload.objects.filter(
+            version__app=OuterRef('pk')
+        ).order_by().values('version__app').annotate(n=Count('id')).values('n')
+        archived = VersionDownloadDay.objects.filter(
+            version__app=OuterRef('pk')
+        ).order_by().values('version__app').annotate(n=Sum('downloads')).values('n')
+        apps = App.objects.annotate(
+            tracked=Coalesce(Subquery(downloads), Value(0)) + Coalesce(Subquery(archived), Value(0))
+        ).only('id', 'name', 'download_count')
+
+        # Was seit dem Flush schon im Zähler steht, kommt mit dem nächsten Flush dazu;
+        # gepufferte Downloads fehlen dagegen noch in VersionDownload
+        pending = {}
+        pending_events = Counter()
+        if write_behind_enabled():
+            store = get_counter_store()
+            pending = store.pending()
+            pending_events = Counter(event[2] for event in store.pending_events())
+        changed = []
+        for app in apps:
+            expected = app.tracked + pending_events[app.id] - pending.get(app.id, 0)
+            if app.download_count != expected:
+                self.stdout.write(f"{app.name}: {app.download_count} -> {expected}")
+                app.download_count = expected
+                changed.append(app)
+
+        if not options['dry_run'] and changed:
+            App.objects.bulk_update(changed, ['download_count'], batch_size=500)
+
+        self.stdout.write(self.style.SUCCESS(f"{len(changed)} Apps korrigiert."))
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0015_emailverificationcode'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='app',
+            index=models.Index(fields=['published', '-download_count', '-published_at', '-id'], name='app_catalog_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='app',
+            index=models.Index(fields=['platform', 'published', '-download_count', '-published_at', '-id'], name='app_platform_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0016_app_catalog_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AppDownloadDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('downloads', models.PositiveIntegerField(default=0)),
+                ('app', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='download_days', to='store.app')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='appdownloadday_day_idx')],
+                'unique_together': {('app', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('downloads_last_week', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('app', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trending_snapshot', to='store.app')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-downloads_last_week'], name='trending_downloads_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0017_trendingsnapshot_appdownloadday_ingestwatermark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppNeighbour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('app', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='store.app')),
+                ('neighbour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.app')),
+            ],
+            options={
+                'unique_together': {('app', 'neighbour')},
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:02
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS store_app_fts USING fts5("
+            "name, developer, description, "
+            "tokenize = 'porter unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            "INSERT INTO store_app_fts (rowid, name, developer, description) "
+            "SELECT a.id, a.name, d.name, a.description FROM store_app a "
+            "JOIN store_developer d ON d.id = a.developer_id"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE IF NOT EXISTS store_app_search ("
+            "app_id bigint PRIMARY KEY REFERENCES store_app (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS store_app_search_document_idx "
+            "ON store_app_search USING GIN (document)"
+        )
+        schema_editor.execute(
+            "INSERT INTO store_app_search (app_id, document) "
+            "SELECT a.id, "
+            "setweight(to_tsvector('german', a.name), 'A') || "
+            "setweight(to_tsvector('english', a.name), 'A') || "
+            "setweight(to_tsvector('german', d.name), 'B') || "
+            "setweight(to_tsvector('english', d.name), 'B') || "
+            "setweight(to_tsvector('german', a.description), 'C') || "
+            "setweight(to_tsvector('english', a.description), 'C') "
+            "FROM store_app a JOIN store_developer d ON d.id = a.developer_id"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS store_app_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP TABLE IF EXISTS store_app_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0018_appneighbour'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
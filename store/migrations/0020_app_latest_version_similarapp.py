@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_latest_version(apps, schema_editor):
+    App = apps.get_model('store', 'App')
+    Version = apps.get_model('store', 'Version')
+    for app in App.objects.all():
+        latest = Version.objects.filter(
+            app=app, approved=True, new_version=True
+        ).order_by('-uploaded_at').first()
+        if latest:
+            App.objects.filter(id=app.id).update(latest_version=latest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0019_app_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='app',
+            name='latest_version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='store.version'),
+        ),
+        migrations.CreateModel(
+            name='SimilarApp',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('app', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_apps', to='store.app')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.app')),
+            ],
+            options={
+                'ordering': ['position'],
+                'unique_together': {('app', 'similar')},
+            },
+        ),
+        migrations.RunPython(backfill_latest_version, migrations.RunPython.noop),
+    ]
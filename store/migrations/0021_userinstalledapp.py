@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_installed_apps(apps, schema_editor):
+    VersionDownload = apps.get_model('store', 'VersionDownload')
+    UserInstalledApp = apps.get_model('store', 'UserInstalledApp')
+
+    # Wie bisher in my_installed_apps: pro Nutzer und App die neueste Version
+    downloads = VersionDownload.objects.order_by(
+        'user_id', 'version__app_id', '-version__uploaded_at'
+    ).values_list('user_id', 'version__app_id', 'version_id', 'downloaded_at')
+
+    seen = set()
+    batch = []
+    for user_id, app_id, version_id, downloaded_at in downloads.iterator():
+        if (user_id, app_id) in seen:
+            continue
+        seen.add((user_id, app_id))
+        batch.append(UserInstalledApp(
+            user_id=user_id, app_id=app_id, version_id=version_id, installed_at=downloaded_at
+        ))
+    UserInstalledApp.objects.bulk_create(batch, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0020_app_latest_version_similarapp'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserInstalledApp',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('installed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('app', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installations', to='store.app')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installed_apps', to=settings.AUTH_USER_MODEL)),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installations', to='store.version')),
+            ],
+            options={
+                'unique_together': {('user', 'app')},
+            },
+        ),
+        migrations.RunPython(backfill_installed_apps, migrations.RunPython.noop),
+    ]
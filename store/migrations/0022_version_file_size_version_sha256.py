@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0021_userinstalledapp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
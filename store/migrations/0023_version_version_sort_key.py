@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0022_version_file_size_version_sha256'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='version_sort_key',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='version',
+            index=models.Index(fields=['app', 'version_sort_key'], name='version_app_sort_key_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0024_artifact_version_artifact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='deltas/')),
+                ('size', models.BigIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.version')),
+                ('target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deltas', to='store.version')),
+            ],
+            options={
+                'unique_together': {('source', 'target')},
+            },
+        ),
+    ]
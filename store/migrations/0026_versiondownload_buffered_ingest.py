@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0025_versiondelta'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='versiondownload',
+            name='downloaded_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='versiondownload',
+            index=models.Index(fields=['downloaded_at'], name='versiondownload_at_idx'),
+        ),
+        migrations.CreateModel(
+            name='VersionDownloadDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('downloads', models.PositiveIntegerField(default=0)),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='download_days', to='store.version')),
+            ],
+            options={
+                'unique_together': {('version', 'day')},
+            },
+        ),
+    ]
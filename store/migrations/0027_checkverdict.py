@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0026_versiondownload_buffered_ingest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckVerdict',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64)),
+                ('stage', models.CharField(max_length=20)),
+                ('analyzer_version', models.CharField(max_length=100)),
+                ('error', models.TextField(blank=True)),
+                ('log', models.TextField(blank=True)),
+                ('checked_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('sha256', 'stage', 'analyzer_version')},
+            },
+        ),
+    ]
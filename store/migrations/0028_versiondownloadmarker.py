@@ -0,0 +1,75 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:40
+
+import csv
+import glob
+import gzip
+import os
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def _insert(apps, pairs):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Version = apps.get_model('store', 'Version')
+    VersionDownloadMarker = apps.get_model('store', 'VersionDownloadMarker')
+    # Archivierte Zeilen können auf gelöschte Nutzer/Versionen zeigen
+    users = set(User.objects.filter(id__in={u for u, _ in pairs}).values_list('id', flat=True))
+    versions = set(Version.objects.filter(id__in={v for _, v in pairs}).values_list('id', flat=True))
+    VersionDownloadMarker.objects.bulk_create([
+        VersionDownloadMarker(user_id=u, version_id=v)
+        for u, v in pairs if u in users and v in versions
+    ], ignore_conflicts=True)
+
+
+def _archived_pairs():
+    # gzip-CSVs aus store/archive.py: id, user_id, version_id, downloaded_at
+    pattern = os.path.join(settings.DOWNLOAD_ARCHIVE_DIR, 'version_downloads_*.csv.gz')
+    for path in sorted(glob.glob(pattern)):
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+            for row in csv.reader(f):
+                if row and row[0] != 'id':
+                    yield int(row[1]), int(row[2])
+
+
+def backfill_markers(apps, schema_editor):
+    VersionDownload = apps.get_model('store', 'VersionDownload')
+    sources = [
+        VersionDownload.objects.values_list('user_id', 'version_id').iterator(),
+        _archived_pairs(),
+    ]
+    for source in sources:
+        batch = set()
+        for pair in source:
+            batch.add(pair)
+            if len(batch) >= BATCH_SIZE:
+                _insert(apps, batch)
+                batch = set()
+        if batch:
+            _insert(apps, batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0027_checkverdict'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionDownloadMarker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.version')),
+            ],
+            options={
+                'unique_together': {('user', 'version')},
+            },
+        ),
+        migrations.RunPython(backfill_markers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0028_versiondownloadmarker'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='checking_run',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+    ]
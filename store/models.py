@@ -1,7 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from .versioning import version_sort_key
 
 class EmailVerificationCode(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -115,40 +116,234 @@ class App(models.Model):
     published_at = models.DateTimeField(null=True, blank=True)
 
     download_count = models.PositiveIntegerField(default=0)  # NEU
+    # Zeiger auf die neueste freigegebene Version, wird per Signal gepflegt
+    latest_version = models.ForeignKey('Version', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        indexes = [
+            # Keyset-Pagination des Katalogs (siehe pagination.py)
+            models.Index(fields=['published', '-download_count', '-published_at', '-id'], name='app_catalog_keyset_idx'),
+            models.Index(fields=['platform', 'published', '-download_count', '-published_at', '-id'], name='app_platform_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.developer.name}) - {self.platform}"
+
+    def refresh_latest_version(self):
+        latest = self.versions.filter(
+            approved=True,
+            new_version=True
+        ).order_by('-version_sort_key', '-uploaded_at').first()
+        # update() statt save(), damit keine App-Signale ausgelöst werden
+        App.objects.filter(id=self.id).update(latest_version=latest)
+        self.latest_version = latest
+        return latest
     
 class VersionDownload(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     version = models.ForeignKey('Version', on_delete=models.CASCADE)
-    downloaded_at = models.DateTimeField(auto_now_add=True)
+    # Zeitpunkt des Downloads, nicht des (gepufferten) Schreibens – siehe counters.py
+    downloaded_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         unique_together = ('user', 'version')
+        indexes = [models.Index(fields=['downloaded_at'], name='versiondownload_at_idx')]
 
     def __str__(self):
         return f"{self.user.username} downloaded {self.version.app.name} v{self.version.version_number} on {self.downloaded_at.strftime('%Y-%m-%d %H:%M:%S')}"
 
+class VersionDownloadMarker(models.Model):
+    """
+    Dauerhafte Markierung "Nutzer hat Version geladen" für die Zählung (downloads.py).
+    Anders als VersionDownload wird sie nie archiviert.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    version = models.ForeignKey('Version', on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        unique_together = ('user', 'version')
+
+class VersionDownloadDay(models.Model):
+    """Tagessumme archivierter VersionDownload-Zeilen (siehe archive.py)."""
+    version = models.ForeignKey('Version', on_delete=models.CASCADE, related_name='download_days')
+    day = models.DateField()
+    downloads = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('version', 'day')
+
+
+class AppDownloadDay(models.Model):
+    """Downloads pro App und Tag – Grundlage für den Trending-Snapshot."""
+    app = models.ForeignKey(App, on_delete=models.CASCADE, related_name='download_days')
+    day = models.DateField()
+    downloads = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('app', 'day')
+        indexes = [models.Index(fields=['day'], name='appdownloadday_day_idx')]
+
+
+class TrendingSnapshot(models.Model):
+    """Vorberechnete Trending-Liste (Downloads der letzten 7 Tage), wird von Celery beat erneuert."""
+    app = models.OneToOneField(App, on_delete=models.CASCADE, related_name='trending_snapshot')
+    downloads_last_week = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['-downloads_last_week'], name='trending_downloads_idx')]
+
+    def __str__(self):
+        return f"{self.app.name}: {self.downloads_last_week} Downloads (7 Tage)"
+
+
+class AppNeighbour(models.Model):
+    """Top-k ähnliche Apps nach gemeinsamen Downloads (offline berechnet)."""
+    app = models.ForeignKey(App, on_delete=models.CASCADE, related_name='neighbours')
+    neighbour = models.ForeignKey(App, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('app', 'neighbour')
+
+
+class SimilarApp(models.Model):
+    """Vorberechnete "Ähnliche Apps" für die Detailseite (siehe similar.py)."""
+    app = models.ForeignKey(App, on_delete=models.CASCADE, related_name='similar_apps')
+    similar = models.ForeignKey(App, on_delete=models.CASCADE, related_name='+')
+    position = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['position']
+        unique_together = ('app', 'similar')
+
+
+class IngestWatermark(models.Model):
+    """Merkt sich bis zu welcher ID eine Tabelle von einem Hintergrundjob verarbeitet wurde."""
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_id}"
+
+
+class UserInstalledApp(models.Model):
+    """Pro Nutzer und App die installierte (neueste heruntergeladene) Version."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='installed_apps')
+    app = models.ForeignKey(App, on_delete=models.CASCADE, related_name='installations')
+    version = models.ForeignKey('Version', on_delete=models.CASCADE, related_name='installations')
+    installed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('user', 'app')
+
+    def __str__(self):
+        return f"{self.user.username}: {self.app.name} v{self.version.version_number}"
+
+
 class AppScreenshot(models.Model):
     app = models.ForeignKey(App, on_delete=models.CASCADE, related_name='screenshots')
     image = models.ImageField(upload_to='app_screenshots/')
 
+class Artifact(models.Model):
+    """
+    Hochgeladene Datei im inhaltsadressierten Speicher (siehe artifacts.py).
+    Identische Uploads teilen sich eine Datei; ref_count zählt die Versionen.
+    """
+    sha256 = models.CharField(max_length=64, db_index=True)
+    path = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    content_type = models.CharField(max_length=100)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.path} ({self.ref_count} Versionen)"
+
+
 class Version(models.Model):
     app = models.ForeignKey(App, on_delete=models.CASCADE, related_name='versions')
     version_number = models.CharField(max_length=50)
+    # Neue Uploads landen unter artifacts/ (inhaltsadressiert, siehe artifacts.py)
     file = models.FileField(upload_to='app_files/')
+    artifact = models.ForeignKey(Artifact, on_delete=models.PROTECT, null=True, blank=True, related_name='versions')
+    original_filename = models.CharField(max_length=255, blank=True)
     release_notes = models.TextField(blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     checking_status = models.CharField(max_length=10, choices=CHECKING_STATUS, default='pending')
     checking_progress = models.PositiveSmallIntegerField(default=0)
     checking_log = models.TextField(blank=True)  # Protokoll für Prüfungsergebnisse
+    # Kennung des laufenden Prüflaufs; Stufen eines überholten Laufs brechen ab
+    checking_run = models.CharField(max_length=32, blank=True, editable=False)
     approved = models.BooleanField(default=False)  # Ergebnis der Prüfung
     new_version = models.BooleanField(default=False)  # Markierung für neue Version
+    # Wird bei der Prüfung ermittelt (für Update-API und Integritätsprüfung der Clients)
+    file_size = models.BigIntegerField(null=True, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    # Sortierbarer Schlüssel aus version_number (siehe versioning.py), wird in save() gesetzt
+    version_sort_key = models.CharField(max_length=100, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['app', 'version_sort_key'], name='version_app_sort_key_idx'),
+        ]
 
     def __str__(self):
         return f"{self.app.name} v{self.version_number} on {self.app.platform}"
 
+    def save(self, *args, **kwargs):
+        self.version_sort_key = version_sort_key(self.version_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'version_number' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'version_sort_key'}
+        if self.file and not self.file._committed:
+            # Frischer Upload: inhaltsadressiert ablegen statt unter app_files/
+            from .artifacts import store_upload, ARTIFACT_FIELDS
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | set(ARTIFACT_FIELDS)
+            with transaction.atomic():
+                store_upload(self)
+                super().save(*args, **kwargs)
+            return
+        super().save(*args, **kwargs)
+
+class VersionDelta(models.Model):
+    """Binärer Patch (bsdiff) von einer älteren auf eine neuere Version (siehe deltas.py)."""
+    source = models.ForeignKey(Version, on_delete=models.CASCADE, related_name='+')
+    target = models.ForeignKey(Version, on_delete=models.CASCADE, related_name='deltas')
+    file = models.FileField(upload_to='deltas/')
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('source', 'target')
+
+    def __str__(self):
+        return f"{self.target.app.name}: v{self.source.version_number} -> v{self.target.version_number}"
+
+
+class CheckVerdict(models.Model):
+    """
+    Ergebnis einer Prüfstufe für einen Dateiinhalt (siehe checks.py).
+    analyzer_version ändert sich mit der Prüflogik bzw. den ClamAV-Signaturen;
+    nur dann muss die Stufe für denselben Inhalt erneut laufen.
+    """
+    sha256 = models.CharField(max_length=64)
+    stage = models.CharField(max_length=20)
+    analyzer_version = models.CharField(max_length=100)
+    error = models.TextField(blank=True)
+    log = models.TextField(blank=True)
+    checked_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('sha256', 'stage', 'analyzer_version')
+
+    def __str__(self):
+        return f"{self.sha256[:12]} {self.stage} ({self.analyzer_version}): {'Fehler' if self.error else 'OK'}"
+
 # Optional: Warnungen, z.B. Gewalt, Sex, Werbung etc.
 WARNING_TYPES = [
     ('violence', 'Gewalt'),
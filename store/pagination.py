@@ -0,0 +1,83 @@
+# pagination.py
+# Keyset-Pagination (Cursor) für den App-Katalog.
+# Sortiert wird nach (download_count, published_at, id) absteigend – die Kosten
+# pro Seite bleiben damit konstant, egal wie groß der Katalog wird.
+import base64
+import json
+
+from django.db.models import Q
+from django.urls import reverse
+
+CATALOG_PAGE_SIZE = 24
+CATALOG_ORDERING = ('-download_count', '-published_at', '-id')
+
+
+def _cursor_default(value):
+    # Volle Mikrosekunden behalten, sonst stimmt der Gleichheitsvergleich nicht mehr
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"Nicht serialisierbar: {value!r}")
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=_cursor_default, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """
+    Gibt die Sortierwerte der letzten Zeile zurück oder None bei ungültigem Cursor.
+    Datumswerte bleiben ISO-Strings, Django wandelt sie beim Filtern selbst um.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    if not all(isinstance(value, (str, int, float)) for value in values):
+        return None
+    return values
+
+
+def keyset_page(queryset, cursor=None, page_size=CATALOG_PAGE_SIZE, ordering=CATALOG_ORDERING):
+    """
+    Liefert (apps, next_cursor) für eine Seite des Katalogs.
+    Alle Felder in ordering müssen absteigend sortiert sein ('-feld').
+    next_cursor ist None, wenn keine weitere Seite existiert.
+    """
+    fields = [field.lstrip('-') for field in ordering]
+    queryset = queryset.select_related('developer').order_by(*ordering)
+
+    position = decode_cursor(cursor, len(fields))
+    if position:
+        # (a, b, c) < (x, y, z) lexikografisch, ausgeschrieben als OR-Kette
+        after = Q()
+        for i, field in enumerate(fields):
+            equal = {fields[j]: position[j] for j in range(i)}
+            after |= Q(**equal, **{f'{field}__lt': position[i]})
+        queryset = queryset.filter(after)
+
+    # Einen Eintrag mehr holen, um zu wissen ob es weitergeht (kein COUNT nötig)
+    apps = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(apps) > page_size:
+        apps = apps[:page_size]
+        next_cursor = encode_cursor([getattr(apps[-1], field) for field in fields])
+    return apps, next_cursor
+
+
+def serialize_app_card(app):
+    return {
+        'id': app.id,
+        'url': reverse('app_detail', args=[app.id]),
+        'name': app.name,
+        'platform': app.platform,
+        'developer': app.developer.name,
+        'download_count': app.download_count,
+        'published_at': app.published_at,
+        'icon': app.icon.url if app.icon else '',
+    }
@@ -0,0 +1,125 @@
+# recommendations.py
+# Item-zu-Item Empfehlungen auf Basis gemeinsamer Downloads.
+# Die Nachbarschaftsliste wird offline von einem Celery-Job berechnet
+# (build_app_neighbours), die Auslieferung ist nur noch ein Cache-/PK-Lookup.
+import math
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import App, AppNeighbour, UserInstalledApp
+
+NEIGHBOURS_PER_APP = 20
+# Sehr große Download-Historien begrenzen, sonst wächst die Paarbildung quadratisch
+MAX_BASKET_SIZE = 200
+RECOMMENDATIONS_TIMEOUT = 60 * 60
+RECOMMENDATIONS_SIZE = 6
+# Für die Ersatzempfehlung nach Plattform/Kategorie maßgebliche letzte Downloads
+FALLBACK_RECENT_APPS = 5
+
+
+def recommendations_cache_key(user_id):
+    return f'recommendations_{user_id}'
+
+
+def invalidate_recommendations(user_id):
+    cache.delete(recommendations_cache_key(user_id))
+
+
+def build_app_neighbours():
+    """
+    Baut die dünn besetzte Co-Download-Matrix auf und speichert pro App
+    die Top-k Nachbarn (Kosinus-Ähnlichkeit) in AppNeighbour.
+    """
+    # Eine Zeile pro Nutzer und App; VersionDownload enthält nur die jüngeren Downloads
+    rows = UserInstalledApp.objects.order_by('user_id', '-installed_at').values_list(
+        'user_id', 'app_id'
+    )
+
+    app_users = Counter()
+    co_downloads = defaultdict(Counter)
+
+    def add_basket(basket):
+        apps = list(basket)[:MAX_BASKET_SIZE]
+        for app_id in apps:
+            app_users[app_id] += 1
+        for i, a in enumerate(apps):
+            for b in apps[i + 1:]:
+                co_downloads[a][b] += 1
+                co_downloads[b][a] += 1
+
+    current_user = None
+    basket = {}
+    for user_id, app_id in rows.iterator(chunk_size=5000):
+        if user_id != current_user:
+            add_basket(basket)
+            current_user = user_id
+            basket = {}
+        # dict statt set, damit die Reihenfolge (neueste zuerst) erhalten bleibt
+        basket[app_id] = True
+    add_basket(basket)
+
+    neighbours = []
+    for app_id, counts in co_downloads.items():
+        scored = [
+            (other_id, together / math.sqrt(app_users[app_id] * app_users[other_id]))
+            for other_id, together in counts.items()
+        ]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        neighbours.extend(
+            AppNeighbour(app_id=app_id, neighbour_id=other_id, score=score)
+            for other_id, score in scored[:NEIGHBOURS_PER_APP]
+        )
+
+    with transaction.atomic():
+        AppNeighbour.objects.all().delete()
+        AppNeighbour.objects.bulk_create(neighbours, batch_size=1000)
+    return len(neighbours)
+
+
+def recommended_app_ids(user):
+    """
+    Gibt die IDs der empfohlenen Apps für einen Nutzer zurück (gecacht).
+    """
+    key = recommendations_cache_key(user.id)
+    app_ids = cache.get(key)
+    if app_ids is not None:
+        return app_ids
+
+    # UserInstalledApp statt VersionDownload: alte Downloads werden archiviert
+    downloaded = set(
+        UserInstalledApp.objects.filter(user=user).values_list('app_id', flat=True)
+    )
+    scores = Counter()
+    if downloaded:
+        for neighbour_id, score in AppNeighbour.objects.filter(
+            app_id__in=downloaded,
+            neighbour__published=True,
+        ).values_list('neighbour_id', 'score'):
+            if neighbour_id not in downloaded:
+                scores[neighbour_id] += score
+
+    app_ids = [app_id for app_id, _ in scores.most_common(RECOMMENDATIONS_SIZE)]
+    if not app_ids and downloaded:
+        app_ids = _preference_app_ids(user, downloaded)
+    cache.set(key, app_ids, timeout=RECOMMENDATIONS_TIMEOUT)
+    return app_ids
+
+
+def _preference_app_ids(user, downloaded):
+    # Ohne Co-Download-Nachbarn wie früher: beliebte Apps aus Plattform/Kategorie der letzten Downloads
+    recent = list(UserInstalledApp.objects.filter(user=user).order_by('-installed_at').values_list(
+        'app__platform', 'app__category'
+    )[:FALLBACK_RECENT_APPS])
+    platforms = {platform for platform, _ in recent}
+    categories = {category for _, category in recent}
+    return list(
+        App.objects.filter(
+            published=True,
+            published_at__lte=timezone.now(),
+            platform__in=platforms,
+            category__in=categories,
+        ).exclude(id__in=downloaded).order_by('-download_count').values_list('id', flat=True)[:RECOMMENDATIONS_SIZE]
+    )
@@ -0,0 +1,143 @@
+# search.py
+# Volltextsuche für Apps (Name, Entwickler, Beschreibung).
+#  - SQLite:   FTS5-Tabelle store_app_fts, Ranking per bm25()
+#  - Postgres: Tabelle store_app_search mit tsvector + GIN-Index, Ranking per ts_rank()
+# Der Index wird über Signale (siehe signals.py) aktuell gehalten.
+#
+# Einschränkung unter SQLite: FTS5 bringt nur den englischen Porter-Stemmer mit
+# (tokenize 'porter unicode61', Migration 0019). Deutsche Wörter werden dort
+# nicht auf ihren Stamm zurückgeführt; gefunden wird nur über die Präfixsuche
+# ("Spiel" trifft "Spiele", "Spielen", aber "Bäume" nicht "Baum"). ä und a
+# gelten durch remove_diacritics 2 als gleich. Deutsches Stemming gibt es
+# nur mit Postgres ('german'-Konfiguration).
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_ORDERING = ('-search_rank', '-id')
+
+# Gewichtung Name > Entwickler > Beschreibung
+FTS5_WEIGHTS = (10.0, 5.0, 1.0)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _tokens(query):
+    return _TOKEN_RE.findall(query.lower())
+
+
+def _fts5_query(query):
+    # Jedes Wort als Präfix-Phrase, damit Benutzereingaben die FTS-Syntax nicht brechen
+    return ' '.join(f'"{token}"*' for token in _tokens(query))
+
+
+PG_DOCUMENT_SQL = """
+    setweight(to_tsvector('german', a.name), 'A') ||
+    setweight(to_tsvector('english', a.name), 'A') ||
+    setweight(to_tsvector('german', d.name), 'B') ||
+    setweight(to_tsvector('english', d.name), 'B') ||
+    setweight(to_tsvector('german', a.description), 'C') ||
+    setweight(to_tsvector('english', a.description), 'C')
+"""
+
+PG_QUERY_SQL = "(websearch_to_tsquery('german', %s) || websearch_to_tsquery('english', %s))"
+
+
+def search_backend():
+    if connection.vendor in ('sqlite', 'postgresql'):
+        return connection.vendor
+    return None
+
+
+def search_apps(queryset, query):
+    """
+    Filtert ein App-Queryset auf Treffer der Volltextsuche und annotiert
+    search_rank (größer = relevanter). Sortierung über SEARCH_ORDERING.
+    """
+    backend = search_backend()
+
+    if backend == 'sqlite':
+        match = _fts5_query(query)
+        if not match:
+            return _without_rank(queryset).none()
+        weights = ', '.join(str(w) for w in FTS5_WEIGHTS)
+        return queryset.filter(
+            id__in=RawSQL("SELECT rowid FROM store_app_fts WHERE store_app_fts MATCH %s", [match])
+        ).annotate(search_rank=RawSQL(
+            # bm25 ist negativ (kleiner = besser), daher umdrehen
+            f"(SELECT -bm25(store_app_fts, {weights}) FROM store_app_fts "
+            f"WHERE store_app_fts MATCH %s AND rowid = store_app.id)",
+            [match], output_field=FloatField(),
+        ))
+
+    if backend == 'postgresql':
+        if not _tokens(query):
+            return _without_rank(queryset).none()
+        return queryset.filter(
+            id__in=RawSQL(
+                f"SELECT app_id FROM store_app_search WHERE document @@ {PG_QUERY_SQL}",
+                [query, query],
+            )
+        ).annotate(search_rank=RawSQL(
+            f"(SELECT ts_rank(document, {PG_QUERY_SQL}) FROM store_app_search "
+            f"WHERE app_id = store_app.id)",
+            [query, query], output_field=FloatField(),
+        ))
+
+    # Andere Datenbanken: einfache Suche ohne Ranking
+    return _without_rank(queryset.filter(name__icontains=query))
+
+
+def _without_rank(queryset):
+    # search_rank muss existieren, damit SEARCH_ORDERING immer funktioniert
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def _id_filter(app_ids, column):
+    if app_ids is None:
+        return '', []
+    placeholders = ', '.join(['%s'] * len(app_ids))
+    return f" WHERE {column} IN ({placeholders})", list(app_ids)
+
+
+def reindex_apps(app_ids=None):
+    """
+    Schreibt die Suchdokumente der angegebenen Apps neu (None = alle Apps).
+    """
+    backend = search_backend()
+    if backend is None:
+        return
+    if app_ids is not None:
+        app_ids = list(app_ids)
+        if not app_ids:
+            return
+
+    with connection.cursor() as cursor:
+        if backend == 'sqlite':
+            where, params = _id_filter(app_ids, 'rowid')
+            cursor.execute("DELETE FROM store_app_fts" + where, params)
+            where, params = _id_filter(app_ids, 'a.id')
+            cursor.execute(
+                "INSERT INTO store_app_fts (rowid, name, developer, description) "
+                "SELECT a.id, a.name, d.name, a.description FROM store_app a "
+                "JOIN store_developer d ON d.id = a.developer_id" + where,
+                params,
+            )
+        else:
+            where, params = _id_filter(app_ids, 'a.id')
+            cursor.execute(
+                f"INSERT INTO store_app_search (app_id, document) "
+                f"SELECT a.id, {PG_DOCUMENT_SQL} FROM store_app a "
+                f"JOIN store_developer d ON d.id = a.developer_id{where} "
+                f"ON CONFLICT (app_id) DO UPDATE SET document = EXCLUDED.document",
+                params,
+            )
+
+
+def remove_app(app_id):
+    # In Postgres erledigt das ON DELETE CASCADE
+    if search_backend() == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM store_app_fts WHERE rowid = %s", [app_id])
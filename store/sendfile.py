@@ -0,0 +1,215 @@
+# sendfile.py
+# Auslieferung der App-Dateien.
+# Django prüft Login, Freigabe und zählt den Download; die Bytes selbst kann der
+# Webserver übernehmen (DOWNLOAD_OFFLOAD in settings.py):
+#   ''         – Django streamt die Datei selbst (FileResponse)
+#   'nginx'    – X-Accel-Redirect auf eine interne Location, z.B.
+#                    location /protected-media/ { internal; alias /pfad/zu/media/; }
+#   'sendfile' – X-Sendfile mit absolutem Pfad (lighttpd, Apache mod_xsendfile)
+# Ohne passenden Webserver (Entwicklung, Tests) übernimmt SendfileEmulationMiddleware
+# dessen Rolle.
+#
+# Abgebrochene Downloads lassen sich per Range/If-Range fortsetzen; das starke
+# ETag ist der SHA-256 der Datei. (django-ranged-response liest die ganze Datei
+# in den Speicher, um ihre Größe zu bestimmen – für große APK/IPA/EXE ungeeignet.)
+import os
+import re
+from urllib.parse import quote, unquote
+
+from django.conf import settings
+from django.http import (
+    FileResponse, HttpResponse, HttpResponseNotFound, HttpResponseNotModified, StreamingHttpResponse,
+)
+from django.utils.http import content_disposition_header, parse_etags
+
+OFFLOAD_NGINX = 'nginx'
+OFFLOAD_SENDFILE = 'sendfile'
+
+ACCEL_HEADER = 'X-Accel-Redirect'
+SENDFILE_HEADER = 'X-Sendfile'
+
+# Setzt die Emulation selbst
+_EMULATION_SKIP_HEADERS = {
+    ACCEL_HEADER.lower(), SENDFILE_HEADER.lower(), 'content-type', 'content-length', 'etag',
+}
+
+RANGE_CHUNK_SIZE = 64 * 1024
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def artifact_etag(version):
+    # Stark: gleiche Bytes <=> gleicher Hash
+    return f'"{version.sha256}"' if version.sha256 else None
+
+
+def _requested_range(request, etag):
+    """
+    Range-Header, sofern er gilt. Bei If-Range mit anderem (oder ohne) ETag
+    wird die ganze Datei geschickt.
+    """
+    header = request.META.get('HTTP_RANGE', '').strip()
+    if not header:
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and (etag is None or if_range.strip() != etag):
+        return None
+    return header
+
+
+def parse_range(header, size):
+    """
+    (start, stop) mit stop exklusiv. None = ganze Datei (kein oder nicht
+    unterstützter Header, z.B. mehrere Bereiche), ValueError = nicht erfüllbar.
+    """
+    match = _RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix: die letzten N Bytes
+        start, stop = max(size - int(last), 0), size
+    else:
+        start = int(first)
+        stop = min(int(last) + 1, size) if last else size
+        if last and int(last) < start:
+            return None
+    if start >= size:
+        raise ValueError(header)
+    return start, stop
+
+
+def is_resumed_transfer(request, etag):
+    """
+    True, wenn der Request einen begonnenen Download fortsetzt (Range ab Byte > 0).
+    So zählt ein Download nur einmal, egal in wie vielen Teilen er übertragen wird.
+    """
+    header = _requested_range(request, etag)
+    match = _RANGE_RE.match(header or '')
+    if not match:
+        return False
+    first, last = match.groups()
+    return bool(first and int(first) > 0) or bool(not first and last)
+
+
+def _read_range(file_path, start, length):
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _file_response(request, file_path, content_type, etag, chunks=None):
+    """
+    chunks(file_path, start, length) liefert den Inhalt als (ggf. asynchronen)
+    Iterator – z.B. für das asynchrone Streaming unter ASGI (async_downloads.py).
+    """
+    size = os.path.getsize(file_path)
+    try:
+        byte_range = parse_range(_requested_range(request, etag), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None and chunks is None:
+        response = FileResponse(open(file_path, 'rb'), content_type=content_type)
+    elif byte_range is None:
+        response = StreamingHttpResponse(chunks(file_path, 0, size), content_type=content_type)
+        response['Content-Length'] = size
+    else:
+        start, stop = byte_range
+        response = StreamingHttpResponse(
+            (chunks or _read_range)(file_path, start, stop - start), status=206, content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+        response['Content-Length'] = stop - start
+    response['Accept-Ranges'] = 'bytes'
+    if etag:
+        response['ETag'] = etag
+    return response
+
+
+def artifact_content_type(filename):
+    if filename.endswith('.apk'):
+        return 'application/vnd.android.package-archive'
+    # IPA/EXE haben keinen eigenen MIME-Type, oft octet-stream
+    return 'application/octet-stream'
+
+
+def _accel_path(file_path):
+    media_root = os.path.abspath(settings.MEDIA_ROOT)
+    relative = os.path.relpath(os.path.abspath(file_path), media_root)
+    if relative.startswith(os.pardir):
+        return None
+    prefix = settings.DOWNLOAD_ACCEL_PREFIX.rstrip('/')
+    return quote(f"{prefix}/{relative.replace(os.sep, '/')}")
+
+
+def artifact_response(request, file_path, filename=None, content_type=None, etag=None, chunks=None):
+    """
+    Antwort für einen Datei-Download – je nach DOWNLOAD_OFFLOAD mit
+    Webserver-Header statt Dateiinhalt. Unterstützt Range, If-Range und If-None-Match.
+    """
+    filename = filename or os.path.basename(file_path)
+    content_type = content_type or artifact_content_type(filename)
+    mode = getattr(settings, 'DOWNLOAD_OFFLOAD', '')
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if etag and if_none_match and etag in parse_etags(if_none_match):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    header_value = None
+    if mode == OFFLOAD_NGINX:
+        header_value = _accel_path(file_path)
+    elif mode == OFFLOAD_SENDFILE:
+        header_value = os.path.abspath(file_path)
+
+    if header_value is None:
+        if not os.path.exists(file_path):
+            return HttpResponseNotFound("Datei nicht gefunden.")
+        response = _file_response(request, file_path, content_type, etag, chunks)
+    else:
+        # Der Webserver übernimmt Status, Länge, Range und Body; Header wie
+        # Content-Disposition reicht er an den Client durch
+        response = HttpResponse(content_type=content_type)
+        response[ACCEL_HEADER if mode == OFFLOAD_NGINX else SENDFILE_HEADER] = header_value
+        if etag:
+            response['ETag'] = etag
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+class SendfileEmulationMiddleware:
+    """
+    Ersatz für nginx/lighttpd in Entwicklung und Tests: löst X-Accel-Redirect
+    bzw. X-Sendfile auf und liefert die Datei selbst aus.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header(ACCEL_HEADER):
+            prefix = settings.DOWNLOAD_ACCEL_PREFIX.rstrip('/') + '/'
+            relative = unquote(response[ACCEL_HEADER])[len(prefix):]
+            file_path = os.path.join(settings.MEDIA_ROOT, relative)
+        elif response.has_header(SENDFILE_HEADER):
+            file_path = response[SENDFILE_HEADER]
+        else:
+            return response
+
+        if not os.path.isfile(file_path):
+            return HttpResponseNotFound("Datei nicht gefunden.")
+        served = _file_response(request, file_path, response['Content-Type'], response.get('ETag'))
+        # Eigene Header (Content-Disposition, X-Delta-Source, ...) wie der Webserver durchreichen
+        for header, value in response.items():
+            if header.lower() not in _EMULATION_SKIP_HEADERS:
+                served[header] = value
+        return served
@@ -1 +1,167 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from kombu.exceptions import OperationalError as KombuOpError
 
+from .models import App, AppWarning, Developer, Version, VersionDelta, VersionDownload
+from .fragments import invalidate_sections, FACET_SECTION
+from .recommendations import invalidate_recommendations
+from .search import reindex_apps, remove_app
+from .suggest import publish_patch
+from .similar import affected_app_ids
+from .artifacts import release_artifact
+
+
+@receiver(post_save, sender=VersionDownload)
+def invalidate_user_recommendations(sender, instance, created, **kwargs):
+    if created:
+        invalidate_recommendations(instance.user_id)
+
+
+# --- Volltext-Suchindex synchron halten ---
+
+SEARCH_FIELDS = {'name', 'description', 'developer'}
+
+
+@receiver(post_save, sender=App)
+def index_app(sender, instance, update_fields=None, **kwargs):
+    # z.B. download_count-Updates nicht neu indexieren
+    if update_fields and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    reindex_apps([instance.id])
+
+
+@receiver(post_delete, sender=App)
+def unindex_app(sender, instance, **kwargs):
+    remove_app(instance.id)
+
+
+@receiver(post_save, sender=Developer)
+def index_developer_apps(sender, instance, **kwargs):
+    # Entwicklername ist Teil des Suchdokuments jeder App
+    reindex_apps(instance.apps.values_list('id', flat=True))
+
+
+# --- Autovervollständigung (suggest.py) per Patch aktualisieren ---
+
+SUGGEST_FIELDS = {'name', 'published'}
+
+
+@receiver(post_save, sender=App)
+def patch_app_suggestions(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not SUGGEST_FIELDS.intersection(update_fields):
+        return
+    if instance.published:
+        publish_patch('upsert', 'app', instance.id, instance.name, instance.download_count)
+        publish_patch('upsert', 'developer', instance.developer_id, instance.developer.name)
+    else:
+        publish_patch('remove', 'app', instance.id)
+
+
+@receiver(post_delete, sender=App)
+def remove_app_suggestion(sender, instance, **kwargs):
+    publish_patch('remove', 'app', instance.id)
+
+
+@receiver(post_save, sender=Developer)
+def patch_developer_suggestion(sender, instance, **kwargs):
+    publish_patch('rename', 'developer', instance.id, instance.name)
+
+
+@receiver(post_delete, sender=Developer)
+def remove_developer_suggestion(sender, instance, **kwargs):
+    publish_patch('remove', 'developer', instance.id)
+
+
+# --- Gecachte Startseiten-Abschnitte (fragments.py) ---
+
+@receiver(post_save, sender=App)
+def invalidate_app_sections(sender, instance, update_fields=None, **kwargs):
+    # Reine Zähler-Updates laufen über das Timeout, sonst würde jeder Download invalidieren
+    if update_fields and set(update_fields) <= {'download_count'}:
+        return
+    invalidate_sections()
+
+
+@receiver(post_delete, sender=App)
+def invalidate_deleted_app_sections(sender, instance, **kwargs):
+    invalidate_sections()
+
+
+@receiver(post_save, sender=Version)
+def invalidate_version_sections(sender, instance, **kwargs):
+    if instance.approved:
+        invalidate_sections()
+
+
+@receiver(post_save, sender=Developer)
+def invalidate_developer_sections(sender, instance, **kwargs):
+    # Entwicklername steht auf den Karten
+    invalidate_sections()
+
+
+@receiver(post_save, sender=AppWarning)
+@receiver(post_delete, sender=AppWarning)
+def invalidate_warning_facets(sender, instance, **kwargs):
+    invalidate_sections(FACET_SECTION)
+
+
+# --- Vorberechnete "Ähnliche Apps" (similar.py) ---
+
+def _refresh_similar_apps(app_ids):
+    from .tasks import refresh_similar_apps
+
+    app_ids = list(app_ids)
+
+    def run():
+        try:
+            refresh_similar_apps.delay(app_ids)
+        except KombuOpError:
+            # Broker nicht erreichbar – dann eben direkt
+            refresh_similar_apps(app_ids)
+
+    transaction.on_commit(run)
+
+
+SIMILAR_FIELDS = {'published', 'platform', 'category', 'subcategory'}
+
+
+@receiver(post_save, sender=App)
+def refresh_similar_on_save(sender, instance, update_fields=None, **kwargs):
+    # download_count verschiebt die Reihenfolge nur leicht, das holt der tägliche Lauf nach
+    if update_fields and not SIMILAR_FIELDS.intersection(update_fields):
+        return
+    _refresh_similar_apps(affected_app_ids(instance))
+
+
+@receiver(pre_delete, sender=App)
+def refresh_similar_on_delete(sender, instance, **kwargs):
+    app_ids = affected_app_ids(instance)
+    app_ids.discard(instance.id)
+    _refresh_similar_apps(app_ids)
+
+
+# --- Zeiger auf die neueste freigegebene Version ---
+
+@receiver(post_save, sender=Version)
+def refresh_latest_version_on_save(sender, instance, **kwargs):
+    App(id=instance.app_id).refresh_latest_version()
+
+
+@receiver(post_delete, sender=Version)
+def refresh_latest_version_on_delete(sender, instance, **kwargs):
+    App(id=instance.app_id).refresh_latest_version()
+
+
+# --- Referenzzähler der Artifacts ---
+
+@receiver(post_delete, sender=Version)
+def release_version_artifact(sender, instance, **kwargs):
+    if instance.artifact_id:
+        release_artifact(instance.artifact_id)
+
+
+@receiver(post_delete, sender=VersionDelta)
+def delete_delta_file(sender, instance, **kwargs):
+    if instance.file:
+        transaction.on_commit(lambda: instance.file.delete(save=False))
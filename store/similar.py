@@ -0,0 +1,78 @@
+# similar.py
+# "Ähnliche Apps" (gleiche Plattform, gleiche Kategorie oder Unterkategorie)
+# werden beim Veröffentlichen, Bearbeiten und Löschen vorberechnet und in
+# SimilarApp abgelegt, damit die Detailseite nur noch einen Lookup braucht.
+# Apps mit späterem Veröffentlichungstermin kommen mit in die Liste und werden
+# erst in der Detailseite ausgefiltert – so erscheinen sie zum Termin ohne Neuberechnung.
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import App, SimilarApp
+
+SIMILAR_APPS_SIZE = 8
+
+
+def _similarity_filter(platform, category, subcategory):
+    match = Q(category=category)
+    # Leere Unterkategorie verbindet keine Apps miteinander
+    if subcategory and subcategory != 'none':
+        match |= Q(subcategory=subcategory)
+    return Q(platform=platform) & match
+
+
+def compute_similar_apps(app):
+    candidates = (
+        App.objects.filter(published=True, published_at__isnull=False)
+        .filter(_similarity_filter(app.platform, app.category, app.subcategory))
+        .exclude(id=app.id)
+        .order_by('-download_count', '-id')
+        .values_list('download_count', 'id')
+    )
+    now = timezone.now()
+    # Die besten bereits sichtbaren plus die besten geplanten; die Seite zeigt davon SIMILAR_APPS_SIZE
+    rows = (
+        list(candidates.filter(published_at__lte=now)[:SIMILAR_APPS_SIZE])
+        + list(candidates.filter(published_at__gt=now)[:SIMILAR_APPS_SIZE])
+    )
+    rows.sort(key=lambda row: (-row[0], -row[1]))
+    return [app_id for _, app_id in rows]
+
+
+def rebuild_similar_apps(app_ids=None):
+    """
+    Berechnet die Liste für die angegebenen Apps neu (None = alle veröffentlichten).
+    """
+    apps = App.objects.filter(published=True)
+    if app_ids is not None:
+        apps = apps.filter(id__in=list(app_ids))
+    apps = list(apps.only('id', 'platform', 'category', 'subcategory'))
+
+    rows = []
+    for app in apps:
+        rows.extend(
+            SimilarApp(app_id=app.id, similar_id=similar_id, position=position)
+            for position, similar_id in enumerate(compute_similar_apps(app))
+        )
+
+    with transaction.atomic():
+        # Auch nicht (mehr) veröffentlichte Apps aus app_ids leeren
+        stale = SimilarApp.objects.all() if app_ids is None else SimilarApp.objects.filter(app_id__in=list(app_ids))
+        stale.delete()
+        SimilarApp.objects.bulk_create(rows)
+    return len(rows)
+
+
+def affected_app_ids(app):
+    """
+    Apps, deren Liste sich durch eine Änderung an app ändern kann:
+    die App selbst, ihre aktuelle Nachbarschaft und alle, die sie bisher anzeigen.
+    """
+    ids = set(
+        App.objects.filter(published=True)
+        .filter(_similarity_filter(app.platform, app.category, app.subcategory))
+        .values_list('id', flat=True)
+    )
+    ids.update(SimilarApp.objects.filter(similar_id=app.id).values_list('app_id', flat=True))
+    ids.add(app.id)
+    return ids
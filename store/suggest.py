@@ -0,0 +1,159 @@
+# suggest.py
+# Autovervollständigung für die Suchfelder.
+# Alle veröffentlichten App- und Entwicklernamen liegen pro Prozess in einem
+# sortierten Array; die Suche läuft per bisect, ohne Datenbankzugriff.
+# Änderungen (Veröffentlichung, Umbenennung, Löschen) werden als Patch-Ereignisse
+# über den Cache an alle Prozesse verteilt und dort eingespielt.
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+from django.db.models import Sum, Q
+
+SUGGEST_LIMIT = 8
+# Bei sehr kurzen Präfixen nicht den ganzen Index durchlaufen
+SUGGEST_MAX_SCAN = 2000
+# Gewichte (download_count) ändern sich laufend, daher gelegentlich komplett neu laden
+SUGGEST_MAX_AGE = 60 * 60
+SUGGEST_PATCH_TIMEOUT = 60 * 60
+
+SEQ_KEY = 'suggest_patch_seq'
+
+
+def _patch_key(seq):
+    return f'suggest_patch_{seq}'
+
+
+def normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+class PrefixIndex:
+    """
+    Sortiertes Array aus (schlüssel, art, id). Jeder Name wird zusätzlich ab
+    jedem Wortanfang eingetragen, damit auch "blast" "Block Blast" findet.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.entries = {}  # (art, id) -> (label, gewicht, [schlüssel])
+
+    def upsert(self, kind, pk, label, weight):
+        self.remove(kind, pk)
+        words = normalize(label).split(' ')
+        keys = [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+        for key in keys:
+            insort(self.keys, (key, kind, pk))
+        self.entries[(kind, pk)] = (label, weight, keys)
+
+    def remove(self, kind, pk):
+        entry = self.entries.pop((kind, pk), None)
+        if not entry:
+            return
+        for key in entry[2]:
+            i = bisect_left(self.keys, (key, kind, pk))
+            if i < len(self.keys) and self.keys[i] == (key, kind, pk):
+                del self.keys[i]
+
+    def weight(self, kind, pk):
+        entry = self.entries.get((kind, pk))
+        return entry[1] if entry else 0
+
+    def lookup(self, prefix, limit=SUGGEST_LIMIT):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        found = {}
+        i = bisect_left(self.keys, (prefix,))
+        end = min(len(self.keys), i + SUGGEST_MAX_SCAN)
+        while i < end and self.keys[i][0].startswith(prefix):
+            _, kind, pk = self.keys[i]
+            found[(kind, pk)] = self.entries[(kind, pk)]
+            i += 1
+        ranked = sorted(found.items(), key=lambda item: item[1][1], reverse=True)
+        return [
+            {'type': kind, 'id': pk, 'label': label}
+            for (kind, pk), (label, _, _) in ranked[:limit]
+        ]
+
+
+_lock = threading.Lock()
+_index = None
+_built_at = 0.0
+_seq = 0
+
+
+def _build():
+    from .models import App, Developer
+
+    index = PrefixIndex()
+    for pk, name, downloads in App.objects.filter(published=True).values_list('id', 'name', 'download_count'):
+        index.upsert('app', pk, name, downloads)
+    developers = Developer.objects.annotate(
+        downloads=Sum('apps__download_count', filter=Q(apps__published=True))
+    ).filter(downloads__isnull=False).values_list('id', 'name', 'downloads')
+    for pk, name, downloads in developers:
+        index.upsert('developer', pk, name, downloads)
+    return index
+
+
+def get_index():
+    """
+    Liefert den Index dieses Prozesses und spielt ausstehende Patches ein.
+    Die Datenbank wird nur beim (seltenen) Neuaufbau gefragt.
+    """
+    global _index, _built_at, _seq
+
+    current_seq = cache.get(SEQ_KEY, 0)
+    with _lock:
+        stale = (
+            _index is None
+            or time.monotonic() - _built_at > SUGGEST_MAX_AGE
+            or current_seq < _seq  # Cache wurde geleert
+        )
+        if not stale and current_seq > _seq:
+            patches = cache.get_many([_patch_key(n) for n in range(_seq + 1, current_seq + 1)])
+            if len(patches) != current_seq - _seq:
+                # Patches bereits abgelaufen -> lieber komplett neu aufbauen
+                stale = True
+            else:
+                for n in range(_seq + 1, current_seq + 1):
+                    _apply(_index, patches[_patch_key(n)])
+                _seq = current_seq
+        if stale:
+            _index = _build()
+            _built_at = time.monotonic()
+            _seq = current_seq
+        return _index
+
+
+def _apply(index, patch):
+    action, kind, pk, label, weight = patch
+    if action == 'remove':
+        index.remove(kind, pk)
+    elif action == 'rename':
+        # Nur umbenennen, was schon im Index steht
+        if (kind, pk) in index.entries:
+            index.upsert(kind, pk, label, index.weight(kind, pk))
+    else:
+        if weight is None:
+            weight = index.weight(kind, pk)
+        index.upsert(kind, pk, label, weight)
+
+
+def publish_patch(action, kind, pk, label=None, weight=None):
+    """
+    Verteilt eine Änderung an alle Prozesse.
+    action: 'upsert', 'rename' oder 'remove'. weight=None behält das bisherige Gewicht.
+    """
+    try:
+        seq = cache.incr(SEQ_KEY)
+    except ValueError:
+        cache.add(SEQ_KEY, 0, timeout=None)
+        seq = cache.incr(SEQ_KEY)
+    cache.set(_patch_key(seq), (action, kind, pk, label, weight), timeout=SUGGEST_PATCH_TIMEOUT)
+
+
+def suggest(prefix, limit=SUGGEST_LIMIT):
+    return get_index().lookup(prefix, limit)
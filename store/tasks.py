@@ -1,19 +1,20 @@
-import os
-import mimetypes
-import tarfile
-import zipfile
-import time
+import functools
 import random
-import pefile
-import pyclamd
-from celery import shared_task
+import uuid
+from celery import chain, shared_task
+from celery.exceptions import Ignore
+from kombu.exceptions import OperationalError as KombuOpError
 from django.utils import timezone
 from datetime import timedelta
 from django.core.mail import EmailMultiAlternatives
-from .models import Version, Notification, App
+from django.db import transaction
+from django.db.models import Count, Sum, F
+from django.db.models.functions import TruncDate
+from .models import Version, Notification, App, VersionDownload, AppDownloadDay, TrendingSnapshot, IngestWatermark
 from django.template.loader import render_to_string
 from django.conf import settings
 from settings.models import NotificationSettings
+from .checks import check_metadata, inspect_archive, scan_for_malware
 
 def send_check_email(user, subject, message, log_lines, app=None, version=None, level='info', error_msg=None):
     """
@@ -56,497 +57,363 @@ def create_notification(user, title, message, app=None, version=None, level='inf
         level=level
     )
 
-@shared_task
-def start_background_check(version_id):
-    try:
-        version = Version.objects.get(id=version_id)
-    except Version.DoesNotExist:
-        return
+# --- Prüfung hochgeladener Versionen ---
+# Die Prüfung läuft als Celery-Chain aus einzelnen Stufen (Metadaten,
+# Archivprüfung, Virenscan, Benachrichtigung, Veröffentlichung). Gewollte
+# Wartezeiten sind countdowns zwischen den Stufen, kein time.sleep – ein Worker
+# ist also nur während der eigentlichen Arbeit belegt.
+# Das Protokoll wird nach jeder Stufe an Version.checking_log angehängt. Schlägt
+# eine Stufe fehl, wird die Version auf 'failed' gesetzt und die Stufe endet mit
+# Ignore, damit die Chain keine weiteren Stufen einplant.
+# Jeder Lauf bekommt eine eigene Kennung (Version.checking_run). Stufen schreiben
+# per update() nur, solange Kennung und Status noch passen – ein neu gestarteter
+# Lauf oder eine parallele Änderung wird so nicht überschrieben.
 
+# Felder, die eine Stufe an der Version ändern darf
+CHECK_FIELDS = ('checking_status', 'checking_progress', 'checking_log', 'approved', 'new_version')
 
+# Simulierte Prüfdauer zwischen den Stufen bei neuen Apps (Sekunden)
+CHECK_STAGE_DELAY = (60, 3 * 60)
+# Wartezeit zwischen erfolgreicher Prüfung und Veröffentlichung neuer Apps
+CHECK_PUBLISH_DELAY = (5 * 60, 20 * 60)
 
-    version.checking_status = 'running'
-    version.checking_log = ''
-    version.save()
 
-    file_path = version.file.path
-    log = []
+def _notify_failure(version, log, msg, subject=None):
     dev = version.app.developer
     notification = NotificationSettings.objects.filter(user=dev.user).first()
+    if notification and notification.email_notifications:
+        send_check_email(
+            user=dev.user,
+            subject=subject or f"Prüfung fehlgeschlagen: {version.app.name}",
+            message="Die App-Prüfung ist fehlgeschlagen.",
+            log_lines=log,
+            app=version.app,
+            version=version,
+            level='error',
+            error_msg=msg
+        )
+    if notification and notification.push_notifications:
+        create_notification(
+            user=dev.user,
+            title=f"Prüfung fehlgeschlagen: {version.app.name}",
+            message=msg,
+            app=version.app,
+            version=version,
+            level='error'
+        )
+
+
+def _notify_success(version, log, subject, message, title, level):
+    dev = version.app.developer
+    notification = NotificationSettings.objects.filter(user=dev.user).first()
+    if notification and notification.email_notifications:
+        send_check_email(dev, subject, message, log, app=version.app, version=version, level=level)
+    if notification and notification.push_notifications:
+        create_notification(
+            user=dev.user,
+            title=title,
+            message=message,
+            app=version.app,
+            version=version,
+            level=level
+        )
+
+
+def _log_lines(version):
+    return version.checking_log.splitlines() if version.checking_log else []
+
+
+def _save_check(version, run):
+    """Schreibt die Prüffelder, falls der Lauf noch aktuell ist; sonst Ignore."""
+    updated = Version.objects.filter(id=version.id, checking_run=run, checking_status='running').update(
+        **{field: getattr(version, field) for field in CHECK_FIELDS}
+    )
+    if not updated:
+        raise Ignore()
+    # update() löst kein post_save aus
+    App(id=version.app_id).refresh_latest_version()
 
-    def fail(msg):
-        log.append(f"*** FEHLER: {msg}")
-        version.checking_status = 'failed'
-        version.approved = False
-        version.checking_log = "\n".join(log) + "\n\nFEHLER: " + msg
-        version.save()
-        if notification.email_notifications:
-            send_check_email(
-                user=dev.user,
-                subject=f"Prüfung fehlgeschlagen: {version.app.name}",
-                message="Die App-Prüfung ist fehlgeschlagen.",
-                log_lines=log,
-                app=version.app,
-                version=version,
-                level='error',          # <-- hier
-                error_msg=msg
-            )
-            
-        if notification.push_notifications:
-            create_notification(
-                user=dev.user,
-                title=f"Prüfung fehlgeschlagen: {version.app.name}",
-                message=msg,
-                app=version.app,
-                version=version,
-                level='error'
-            )
 
-    try:
-        log.append(f"Starte Prüfung für Datei: {file_path}")
+def _fail_check(version, run, log, msg, unexpected=False):
+    log.append(f"*** FEHLER: {msg}")
+    full_log = _log_lines(version) + log
+    version.checking_status = 'failed'
+    version.approved = False
+    version.checking_log = "\n".join(full_log) + "\n\nFEHLER: " + msg
+    _save_check(version, run)
+    subject = f"Unerwarteter Fehler bei der Prüfung: {version.app.name}" if unexpected else None
+    _notify_failure(version, full_log, msg, subject=subject)
+    raise Ignore()
 
-        mime_type, encoding = mimetypes.guess_type(file_path)
-        log.append(f"Ermittelter MIME-Typ (per mimetypes): {mime_type or 'unbekannt'}")
 
-        ext = os.path.splitext(file_path)[1].lower()
-        log.append(f"Dateiendung: {ext}")
+def check_stage(progress):
+    """
+    Macht aus einer Prüffunktion f(version, log, *args) -> Fehlermeldung|None
+    eine Stufe der Prüf-Chain. Die Stufe bekommt die Kennung des Laufs mit.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(version_id, run, *args):
+            version = Version.objects.select_related('app__developer__user').filter(
+                id=version_id, checking_run=run, checking_status='running'
+            ).first()
+            if version is None:
+                # Gelöscht, fehlgeschlagen oder von einem neueren Lauf abgelöst
+                raise Ignore()
+            log = []
+            try:
+                error = func(version, log, *args)
+            except Exception as e:
+                _fail_check(version, run, log, f"Unerwarteter Fehler: {e}", unexpected=True)
+            if error:
+                _fail_check(version, run, log, error)
+            version.checking_log = "\n".join(_log_lines(version) + log)
+            version.checking_progress = progress
+            _save_check(version, run)
+        return wrapper
+    return decorator
 
-        size = os.path.getsize(file_path)
-        log.append(f"Dateigröße: {size} Bytes")
-        if size > 500 * 1024 * 1024:
-            return fail("Datei ist größer als 500MB.")
 
-        version.checking_progress = 1  # Update den Fortschritt
-        version.save()
-        time.sleep(random.randint(1, 3) * 60)
+@shared_task
+@check_stage(progress=1)
+def check_stage_metadata(version, log):
+    return check_metadata(version, log)
 
-        if ext == '.exe':
-            log.append("Prüfe EXE-Datei (PE-Analyse).")
-            try:
-                pe = pefile.PE(file_path)
-                log.append(f"PE EntryPoint: {hex(pe.OPTIONAL_HEADER.AddressOfEntryPoint)}")
-                if hasattr(pe, 'DIRECTORY_ENTRY_SECURITY') and pe.DIRECTORY_ENTRY_SECURITY:
-                    log.append("Digitales Zertifikat gefunden.")
-                else:
-                    log.append("Kein digitales Zertifikat gefunden.")
-                pe.close()
-            except pefile.PEFormatError as e:
-                return fail(f"Ungültige EXE-Datei: {e}")
-
-        elif ext in ['.ipa', '.apk', '.aab']:
-            log.append(f"Prüfe ZIP-Archiv mit Endung {ext}.")
-            try:
-                with zipfile.ZipFile(file_path, 'r') as z:
-                    names = z.namelist()
-                    log.append(f"ZIP-Archiv enthält {len(names)} Dateien.")
-                    comp_size = sum(info.compress_size for info in z.infolist())
-                    uncomp_size = sum(info.file_size for info in z.infolist())
-                    log.append(f"Komprimierte Größe: {comp_size}, Unkomprimierte Größe: {uncomp_size}")
-                    if comp_size and uncomp_size / comp_size > 100:
-                        return fail("Verdacht auf ZIP-Bombe: Verhältnis unkomprimiert zu komprimiert zu hoch.")
-                    if ext == '.ipa' and not any(n.startswith('Payload/') for n in names):
-                        return fail("Fehlender Payload-Ordner in IPA.")
-                    if ext in ['.apk', '.aab'] and 'AndroidManifest.xml' not in names:
-                        return fail("Fehlende AndroidManifest.xml in APK/AAB.")
-                    for n in names:
-                        if '..' in n or n.startswith('/'):
-                            return fail(f"Unsichere Pfad-Referenz im Archiv: {n}")
-            except zipfile.BadZipFile as e:
-                return fail(f"Ungültiges ZIP-Archiv: {e}")
-
-        elif ext in ['.tar.gz', '.tgz']:
-            log.append("Prüfe tar.gz-Archiv.")
-            try:
-                with tarfile.open(file_path, 'r:gz') as tar:
-                    members = tar.getmembers()
-                    log.append(f"tar.gz enthält {len(members)} Einträge.")
-                    for m in members:
-                        if m.name.startswith('/') or '..' in m.name:
-                            return fail(f"Unsichere Pfad-Referenz im tar.gz: {m.name}")
-            except Exception as e:
-                return fail(f"Fehler beim Entpacken des tar.gz: {e}")
 
-        elif ext == '.gz':
-            log.append("Prüfe .gz-Datei, versuche Entpacken.")
-            try:
-                import gzip, shutil
-                temp_out = file_path + '_ungzipped'
-                with gzip.open(file_path, 'rb') as f_in, open(temp_out, 'wb') as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-                log.append(f".gz entpackt: {temp_out}")
-                if temp_out.endswith('.ipa') or zipfile.is_zipfile(temp_out):
-                    with zipfile.ZipFile(temp_out, 'r') as z:
-                        names = z.namelist()
-                        log.append(f"Entpacktes Archiv enthält {len(names)} Dateien.")
-                        if not any(n.startswith('Payload/') for n in names):
-                            return fail("Entpackte IPA fehlt Payload-Ordner.")
-                else:
-                    log.append("Keine ZIP-Struktur erkannt.")
-                os.remove(temp_out)
-            except Exception as e:
-                return fail(f"Fehler beim Entpacken der .gz-Datei: {e}")
+@shared_task
+@check_stage(progress=2)
+def check_stage_archive(version, log):
+    return inspect_archive(version, log)
 
+
+@shared_task
+@check_stage(progress=3)
+def check_stage_virus_scan(version, log):
+    return scan_for_malware(version, log)
+
+
+@shared_task
+@check_stage(progress=4)
+def check_stage_notify(version, log):
+    version.approved = True
+    version.checking_log = "Erfolgreich geprüft:\n" + version.checking_log
+    message = f"Die Version {version.version_number} Ihrer App wurde erfolgreich geprüft."
+    _notify_success(
+        version, _log_lines(version),
+        subject=f"{version} wurde erfolgreich geprüft",
+        message=message,
+        title=f"Prüfung erfolgreich: {version}",
+        level='success_1',
+    )
+
+
+@shared_task
+@check_stage(progress=5)
+def check_stage_publish(version, log, first_release):
+    app = version.app
+    if first_release:
+        app.published = True
+        app.save()
+        title = f"{app.name} ist jetzt veröffentlicht"
+        message = "Ihre App wurde soeben freigegeben und ist jetzt öffentlich sichtbar."
+    else:
+        old_version = app.versions.filter(
+            approved=True,
+            new_version=True
+        ).exclude(id=version.id).order_by('-version_sort_key', '-uploaded_at').first()
+        if old_version:
+            log.append(f"Gefundene vorherige Version: {old_version.version_number}")
         else:
-            return fail(f"Unbekannter oder nicht erlaubter Dateityp: {ext}")
-
-        version.checking_progress = 2 # Update den Fortschritt
-        version.save()
-        # Wartezeit simulieren, um realistische Prüfungsdauer zu haben
-        time.sleep(random.randint(1, 3) * 60)
-
-        try:
-            log.append("Starte Virenscan mit ClamAV.")
-            cd = pyclamd.ClamdNetworkSocket()
-            if not cd.ping():
-                log.append("Warnung: ClamAV nicht erreichbar.")
-            else:
-                scan = cd.scan_file(file_path)
-                if scan:
-                    return fail(f"Malware erkannt: {scan}")
-                else:
-                    log.append("Kein Malware-Fund im Scan.")
-        except Exception as e:
-            log.append(f"Virenscan-Fehler: {e}")
-
-        version.checking_progress = 3  # Update den Fortschritt
-        version.save()
-        time.sleep(random.randint(1, 3) * 60)
-
-        version.checking_status = 'passed'
-        version.approved = True
-        version.checking_log = "Erfolgreich geprüft:\n" + "\n".join(log)
-        version.save()
-
-        subject = f"{version.app.name} wurde erfolgreich geprüft"
-        message = f"Die Version {version.version_number} Ihrer App wurde erfolgreich geprüft und freigegeben."
-        if notification.email_notifications:
-            # Nach erfolgreicher Prüfung (success_1)
-            send_check_email(
-                dev,
-                subject,
-                message,
-                log,
-                app=version.app,
-                version=version,
-                level='success_1'
-            )
+            log.append("Keine vorherige Version gefunden (Erstveröffentlichung).")
+            app.published = True
+            app.save()
+        title = f"{version} ist jetzt veröffentlicht"
+        message = "Ihre Version wurde soeben freigegeben und ist jetzt öffentlich sichtbar."
 
-        if notification.push_notifications:
-            create_notification(
-                user=dev.user,
-                title=f"Prüfung erfolgreich: {version.app.name}",
-                message=message,
-                app=version.app,
-                version=version,
-                level='success_1'
-            )
+    version.new_version = True  # Markiere die Version als neu
+    version.checking_status = 'passed'
 
-        version.checking_progress = 4  # Update den Fortschritt
-        version.save()
-        time.sleep(random.randint(5, 10, 15, 20) * 60)
-
-        version.checking_progress = 5
-        version.new_version = True  # Markiere die Version als neu
-        version.save
-        version.app.published = True
-        version.app.save()
-        if notification.email_notifications:
-            send_check_email(
-                dev,
-                f"{version.app.name} ist jetzt veröffentlicht",
-                "Ihre App wurde soeben freigegeben und ist jetzt öffentlich sichtbar.",
-                log,
-                app=version.app,
-                version=version,
-                level='success_2'
-            )
+    # Delta-Patches von den Vorgängerversionen erzeugen (eigener Task); ohne
+    # Broker fehlen nur die Patches, die Veröffentlichung bleibt gültig
+    try:
+        generate_version_deltas.delay(version.id)
+    except KombuOpError:
+        log.append("Delta-Patches konnten nicht eingeplant werden (Broker nicht erreichbar).")
 
-        if notification.push_notifications:
-            create_notification(
-                user=dev.user,
-                title=f"{version.app.name} ist jetzt veröffentlicht",
-                message="Ihre App wurde soeben freigegeben und ist jetzt öffentlich sichtbar.",
-                app=version.app,
-                version=version,
-                level='success_2'
-            )
+    _notify_success(
+        version, _log_lines(version) + log,
+        subject=title,
+        message=message,
+        title=title,
+        level='success_2',
+    )
 
-    except Exception as e:
-        error_message = f"Unerwarteter Fehler: {e}"
-        version.checking_status = 'failed'
-        version.approved = False
-        version.checking_log = "\n".join(log) + "\n\nFEHLER: " + error_message
-        version.save()
-        if notification.email_notifications:
-            send_check_email(
-                user=dev.user,
-                subject=f"Unerwarteter Fehler bei der Prüfung: {version.app.name}",
-                message="Die App-Prüfung ist aufgrund eines unerwarteten Fehlers fehlgeschlagen.",
-                log_lines=log,
-                app=version.app,
-                version=version,
-                success=False,
-                error_msg=error_message
-            )
-        if notification.push_notifications:
-            create_notification(
-                user=dev.user,
-                title=f"Prüfung fehlgeschlagen: {version.app.name}",
-                message=error_message,
-                app=version.app,
-                version=version,
-                level='error'
-            )
 
+def _start_check(version_id, first_release):
+    run = uuid.uuid4().hex
+    # 'pending' nach dem Upload, 'running' wenn start_version_check_api den Start schon beansprucht hat
+    updated = Version.objects.filter(id=version_id, checking_status__in=['pending', 'running']).update(
+        checking_status='running',
+        checking_progress=0,
+        checking_log='',
+        checking_run=run,
+        approved=False,
+    )
+    if not updated:
+        return
 
+    stages = [
+        check_stage_metadata.si(version_id, run),
+        check_stage_archive.si(version_id, run),
+        check_stage_virus_scan.si(version_id, run),
+        check_stage_notify.si(version_id, run),
+        check_stage_publish.si(version_id, run, first_release),
+    ]
+    if first_release:
+        for stage in stages[1:4]:
+            stage.set(countdown=random.randint(*CHECK_STAGE_DELAY))
+        stages[4].set(countdown=random.randint(*CHECK_PUBLISH_DELAY))
+    chain(*stages).apply_async()
+
+
+@shared_task
+def start_background_check(version_id):
+    """
+    Prüfung der ersten Version einer neuen App; die App wird danach verzögert veröffentlicht.
+    """
+    _start_check(version_id, first_release=True)
 
 
 @shared_task
 def start_background_check_version(version_id):
-    try:
-        version = Version.objects.get(id=version_id)
-    except Version.DoesNotExist:
-        return
-    
-    old_version = version.app.versions.filter(
-        approved=True,
-        new_version=True
-    ).order_by('-uploaded_at').first()  
-
-    version.checking_status = 'running'
-    version.checking_log = ''
-    version.save()
-
-    file_path = version.file.path
-    log = []
-    dev = version.app.developer
-    notification = NotificationSettings.objects.filter(user=dev.user).first()
-    
-
-    def fail(msg):
-        log.append(f"*** FEHLER: {msg}")
-        version.checking_status = 'failed'
-        version.approved = False
-        version.checking_log = "\n".join(log) + "\n\nFEHLER: " + msg
-        version.save()
-        if notification.email_notifications:
-            send_check_email(
-                user=dev.user,
-                subject=f"Prüfung fehlgeschlagen: {version.app.name}",
-                message="Die App-Prüfung ist fehlgeschlagen.",
-                log_lines=log,
-                app=version.app,
-                version=version,
-                level='error',          # <-- hier
-                error_msg=msg
-            )
+    """
+    Prüfung einer neuen Version einer bestehenden App.
+    """
+    _start_check(version_id, first_release=False)
+
 
-        if notification.push_notifications:
-            create_notification(
-                user=dev.user,
-                title=f"Prüfung fehlgeschlagen: {version.app.name}",
-                message=msg,
-                app=version.app,
-                version=version,
-                level='error'
+
+TRENDING_WINDOW_DAYS = 7
+TRENDING_SIZE = 50
+# AppDownloadDay wird auch für die 30-Tage-Zahlen im Entwickler-Dashboard genutzt
+DOWNLOAD_DAY_RETENTION_DAYS = 30
+
+
+@shared_task
+def refresh_trending_snapshot():
+    """
+    Überträgt neue VersionDownload-Zeilen inkrementell in AppDownloadDay
+    und baut daraus die TrendingSnapshot-Tabelle neu auf.
+    """
+    today = timezone.now().date()
+    window_start = today - timedelta(days=TRENDING_WINDOW_DAYS - 1)
+
+    with transaction.atomic():
+        # Zeile sperren, damit parallele Läufe nichts doppelt zählen
+        watermark, _ = IngestWatermark.objects.get_or_create(name='trending')
+        watermark = IngestWatermark.objects.select_for_update().get(pk=watermark.pk)
+
+        new_downloads = VersionDownload.objects.filter(id__gt=watermark.last_id)
+        if watermark.last_id == 0:
+            # Erster Lauf: nur den aufbewahrten Zeitraum betrachten
+            new_downloads = new_downloads.filter(
+                downloaded_at__date__gt=today - timedelta(days=DOWNLOAD_DAY_RETENTION_DAYS)
             )
 
-    try:
-        log.append(f"Starte Prüfung für Datei: {file_path}")
+        last_id = new_downloads.order_by('-id').values_list('id', flat=True).first()
+        if last_id is not None:
+            buckets = new_downloads.filter(id__lte=last_id).annotate(
+                day=TruncDate('downloaded_at')
+            ).values('version__app', 'day').annotate(downloads=Count('id'))
 
-        mime_type, encoding = mimetypes.guess_type(file_path)
-        log.append(f"Ermittelter MIME-Typ (per mimetypes): {mime_type or 'unbekannt'}")
+            for bucket in buckets:
+                updated = AppDownloadDay.objects.filter(
+                    app_id=bucket['version__app'], day=bucket['day']
+                ).update(downloads=F('downloads') + bucket['downloads'])
+                if not updated:
+                    AppDownloadDay.objects.create(
+                        app_id=bucket['version__app'], day=bucket['day'], downloads=bucket['downloads']
+                    )
 
-        ext = os.path.splitext(file_path)[1].lower()
-        log.append(f"Dateiendung: {ext}")
+            watermark.last_id = last_id
+            watermark.save(update_fields=['last_id', 'updated_at'])
 
-        size = os.path.getsize(file_path)
-        log.append(f"Dateigröße: {size} Bytes")
-        if size > 500 * 1024 * 1024:
-            return fail("Datei ist größer als 500MB.")
+        AppDownloadDay.objects.filter(
+            day__lte=today - timedelta(days=DOWNLOAD_DAY_RETENTION_DAYS)
+        ).delete()
 
-        version.checking_progress = 1  # Update den Fortschritt
-        version.save()
-        #time.sleep(random.randint(1, 3) * 60)
+        top = AppDownloadDay.objects.filter(day__gte=window_start).values('app').annotate(
+            total=Sum('downloads')
+        ).order_by('-total')[:TRENDING_SIZE]
 
-        if ext == '.exe':
-            log.append("Prüfe EXE-Datei (PE-Analyse).")
-            try:
-                pe = pefile.PE(file_path)
-                log.append(f"PE EntryPoint: {hex(pe.OPTIONAL_HEADER.AddressOfEntryPoint)}")
-                if hasattr(pe, 'DIRECTORY_ENTRY_SECURITY') and pe.DIRECTORY_ENTRY_SECURITY:
-                    log.append("Digitales Zertifikat gefunden.")
-                else:
-                    log.append("Kein digitales Zertifikat gefunden.")
-                pe.close()
-            except pefile.PEFormatError as e:
-                return fail(f"Ungültige EXE-Datei: {e}")
-
-        elif ext in ['.ipa', '.apk', '.aab']:
-            log.append(f"Prüfe ZIP-Archiv mit Endung {ext}.")
-            try:
-                with zipfile.ZipFile(file_path, 'r') as z:
-                    names = z.namelist()
-                    log.append(f"ZIP-Archiv enthält {len(names)} Dateien.")
-                    comp_size = sum(info.compress_size for info in z.infolist())
-                    uncomp_size = sum(info.file_size for info in z.infolist())
-                    log.append(f"Komprimierte Größe: {comp_size}, Unkomprimierte Größe: {uncomp_size}")
-                    if comp_size and uncomp_size / comp_size > 100:
-                        return fail("Verdacht auf ZIP-Bombe: Verhältnis unkomprimiert zu komprimiert zu hoch.")
-                    if ext == '.ipa' and not any(n.startswith('Payload/') for n in names):
-                        return fail("Fehlender Payload-Ordner in IPA.")
-                    if ext in ['.apk', '.aab'] and 'AndroidManifest.xml' not in names:
-                        return fail("Fehlende AndroidManifest.xml in APK/AAB.")
-                    for n in names:
-                        if '..' in n or n.startswith('/'):
-                            return fail(f"Unsichere Pfad-Referenz im Archiv: {n}")
-            except zipfile.BadZipFile as e:
-                return fail(f"Ungültiges ZIP-Archiv: {e}")
-
-        elif ext in ['.tar.gz', '.tgz']:
-            log.append("Prüfe tar.gz-Archiv.")
-            try:
-                with tarfile.open(file_path, 'r:gz') as tar:
-                    members = tar.getmembers()
-                    log.append(f"tar.gz enthält {len(members)} Einträge.")
-                    for m in members:
-                        if m.name.startswith('/') or '..' in m.name:
-                            return fail(f"Unsichere Pfad-Referenz im tar.gz: {m.name}")
-            except Exception as e:
-                return fail(f"Fehler beim Entpacken des tar.gz: {e}")
+        TrendingSnapshot.objects.all().delete()
+        TrendingSnapshot.objects.bulk_create([
+            TrendingSnapshot(app_id=row['app'], downloads_last_week=row['total'])
+            for row in top
+        ])
 
-        elif ext == '.gz':
-            log.append("Prüfe .gz-Datei, versuche Entpacken.")
-            try:
-                import gzip, shutil
-                temp_out = file_path + '_ungzipped'
-                with gzip.open(file_path, 'rb') as f_in, open(temp_out, 'wb') as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-                log.append(f".gz entpackt: {temp_out}")
-                if temp_out.endswith('.ipa') or zipfile.is_zipfile(temp_out):
-                    with zipfile.ZipFile(temp_out, 'r') as z:
-                        names = z.namelist()
-                        log.append(f"Entpacktes Archiv enthält {len(names)} Dateien.")
-                        if not any(n.startswith('Payload/') for n in names):
-                            return fail("Entpackte IPA fehlt Payload-Ordner.")
-                else:
-                    log.append("Keine ZIP-Struktur erkannt.")
-                os.remove(temp_out)
-            except Exception as e:
-                return fail(f"Fehler beim Entpacken der .gz-Datei: {e}")
+    from .fragments import invalidate_sections
+    invalidate_sections('trending')
 
-        else:
-            return fail(f"Unbekannter oder nicht erlaubter Dateityp: {ext}")
-
-        version.checking_progress = 2  # Update den Fortschritt
-        version.save()
-        #time.sleep(random.randint(1, 3) * 60)
-
-        try:
-            log.append("Starte Virenscan mit ClamAV.")
-            cd = pyclamd.ClamdNetworkSocket()
-            if not cd.ping():
-                log.append("Warnung: ClamAV nicht erreichbar.")
-            else:
-                scan = cd.scan_file(file_path)
-                if scan:
-                    return fail(f"Malware erkannt: {scan}")
-                else:
-                    log.append("Kein Malware-Fund im Scan.")
-        except Exception as e:
-            log.append(f"Virenscan-Fehler: {e}")
-
-        version.checking_progress = 3  # Update den Fortschritt
-        version.save()
-        #time.sleep(random.randint(1, 2) * 60)
-
-        version.approved = True
-        version.checking_log = "Erfolgreich geprüft:\n" + "\n".join(log)
-        version.save()
-
-        subject = f"{version} wurde erfolgreich geprüft"
-        message = f"Die Version {version.version_number} Ihrer App wurde erfolgreich geprüft."
-        if notification.email_notifications:
-            # Nach erfolgreicher Prüfung (success_1)
-            send_check_email(
-                dev,
-                subject,
-                message,
-                log,
-                app=version.app,
-                version=version,
-                level='success_1'
-            )
 
-        if notification.push_notifications:
-            create_notification(
-                user=dev.user,
-                title=f"Prüfung erfolgreich: {version}",
-                message=message,
-                app=version.app,
-                version=version,
-                level='success_1'
-            )
-        version.checking_progress = 4  # Update den Fortschritt
-        version.save()
-        #time.sleep(random.randint(1, 2, 5, 10, 15, 20) * 60)
+@shared_task
+def rebuild_app_neighbours():
+    """
+    Berechnet die Co-Download-Nachbarn aller Apps neu (siehe recommendations.py).
+    """
+    from .recommendations import build_app_neighbours
+    return build_app_neighbours()
 
-        if old_version:
-            log.append(f"Gefundene vorherige Version: {old_version.version_number}")
-        else:
-            log.append("Keine vorherige Version gefunden (Erstveröffentlichung).")
-            version.app.published = True
-            version.app.save()
-  
-        version.new_version = True  # Markiere die neue Version als neu
-        version.checking_status = 'passed'
-        version.checking_progress = 5  # Update den Fortschritt
-        version.save()
-
-        if notification.email_notifications:
-            send_check_email(
-                dev,
-                f"{version.app.name} ist jetzt veröffentlicht",
-                "Ihre App wurde soeben freigegeben und ist jetzt öffentlich sichtbar.",
-                log,
-                app=version.app,
-                version=version,
-                level='success_2'
-            )
 
-        if notification.push_notifications:
-            create_notification(
-                user=dev.user,
-                title=f"{version} ist jetzt veröffentlicht",
-                message="Ihre Version wurde soeben freigegeben und ist jetzt öffentlich sichtbar.",
-                app=version.app,
-                version=version,
-                level='success_2'
-            )
+@shared_task
+def refresh_similar_apps(app_ids=None):
+    """
+    Aktualisiert die vorberechneten "Ähnliche Apps" (siehe similar.py).
+    """
+    from .similar import rebuild_similar_apps
+    return rebuild_similar_apps(app_ids)
 
-    except Exception as e:
-        error_message = f"Unerwarteter Fehler: {e}"
-        version.checking_status = 'failed'
-        version.approved = False
-        version.checking_log = "\n".join(log) + "\n\nFEHLER: " + error_message
-        version.save()
-        if notification.email_notifications:
-            send_check_email(
-                user=dev.user,
-                subject=f"Unerwarteter Fehler bei der Prüfung: {version.app.name}",
-                message="Die App-Prüfung ist aufgrund eines unerwarteten Fehlers fehlgeschlagen.",
-                log_lines=log,
-                app=version.app,
-                version=version,
-                success=False,
-                error_msg=error_message
-            )
-        if notification.push_notifications:
-            create_notification(
-                user=dev.user,
-                title=f"Prüfung fehlgeschlagen: {version.app.name}",
-                message=error_message,
-                app=version.app,
-                version=version,
-                level='error'
-            )
\ No newline at end of file
+
+@shared_task
+def refresh_category_matrix():
+    """
+    Berechnet die Top-/Neu-Listen aller Kategorie-/Plattform-Seiten neu.
+    """
+    from .category_matrix import refresh_category_matrix as refresh
+    return refresh()
+
+
+@shared_task
+def flush_download_events():
+    """
+    Schreibt gepufferte Downloads gebündelt nach VersionDownload (siehe counters.py).
+    """
+    from .counters import flush_download_events as flush
+    return flush()
+
+
+@shared_task
+def archive_version_downloads():
+    """
+    Verdichtet alte VersionDownload-Zeilen zu Tagessummen und archiviert sie (siehe archive.py).
+    """
+    from .archive import archive_version_downloads as archive
+    return archive()
+
+
+@shared_task
+def flush_download_counts():
+    """
+    Schreibt die Write-behind-Downloadzähler gebündelt nach App.download_count (siehe counters.py).
+    """
+    from .counters import flush_download_counts as flush
+    return flush()
+
+
+@shared_task
+def generate_version_deltas(version_id):
+    """
+    Erzeugt binäre Patches von den letzten freigegebenen Versionen auf diese (siehe deltas.py).
+    """
+    from .deltas import generate_deltas
+    return generate_deltas(version_id)
@@ -1,3 +1,415 @@
-from django.test import TestCase
+import gzip
+import io
+import os
+import tarfile
+import tempfile
+import zipfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from . import inspection
+from .clamav import ClamdError, ClamdScanner
+from .fake_clamd import EICAR, FakeClamdServer
+from .inspection import ArchiveViolation, inspect_gz, inspect_tar_gz, inspect_zip
+from .pagination import decode_cursor, encode_cursor
+from .sendfile import artifact_response, is_resumed_transfer, parse_range
+from .versioning import validate_version_number, version_sort_key
+
+
+class _Unseekable(io.RawIOBase):
+    """Schreibziel ohne seek – zipfile schreibt dann Datendeskriptoren."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += b
+        return len(b)
+
+
+class TempDirMixin:
+
+    def setUp(self):
+        super().setUp()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def path(self, name):
+        return os.path.join(self._tmp.name, name)
+
+    def write_bytes(self, name, data):
+        path = self.path(name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+
+def _zip_bytes(entries, compression=zipfile.ZIP_DEFLATED, comment=b''):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression) as zf:
+        for name, data in entries:
+            zf.writestr(name, data)
+        zf.comment = comment
+    return buffer.getvalue()
+
+
+def _tar_member(name, data=b'', type=tarfile.REGTYPE, linkname=''):
+    info = tarfile.TarInfo(name)
+    info.type = type
+    info.linkname = linkname
+    info.size = len(data) if type == tarfile.REGTYPE else 0
+    return info, data if type == tarfile.REGTYPE else None
+
+
+class InspectZipTests(TempDirMixin, SimpleTestCase):
+
+    def inspect(self, data, **kwargs):
+        return inspect_zip(self.write_bytes('app.apk', data), **kwargs)
+
+    def test_valid_archive(self):
+        data = _zip_bytes([('AndroidManifest.xml', b'<manifest/>'), ('classes.dex', b'dex' * 100)])
+        summary = self.inspect(data, required=lambda path: path == 'AndroidManifest.xml')
+        self.assertEqual(summary['entries'], 2)
+        self.assertEqual(summary['size'], len(b'<manifest/>') + 300)
+        self.assertTrue(summary['found_required'])
+
+    def test_path_traversal(self):
+        for name in ('../evil.so', 'lib/../../evil.so', '/etc/passwd', 'C:/Windows/evil.dll', '..\\evil.dll'):
+            with self.subTest(name=name):
+                with self.assertRaisesMessage(ArchiveViolation, 'Unsichere Pfad-Referenz'):
+                    self.inspect(_zip_bytes([(name, b'x')]))
+
+    def test_entry_ratio(self):
+        data = _zip_bytes([('bomb.bin', b'\0' * (2 * 1024 * 1024))])
+        with self.assertRaisesMessage(ArchiveViolation, 'extrem stark komprimiert'):
+            self.inspect(data)
+
+    def test_small_entries_ignore_entry_ratio(self):
+        data = _zip_bytes([('res/empty.xml', b'\0' * 512 * 1024), ('classes.dex', os.urandom(64 * 1024))])
+        self.assertEqual(self.inspect(data)['entries'], 2)
+
+    def test_total_ratio(self):
+        # Jeder Eintrag liegt unter ZIP_RATIO_MIN_SIZE, zusammen ist das Verhältnis zu hoch
+        data = _zip_bytes([(f'part{i}.bin', b'\0' * (900 * 1024)) for i in range(10)])
+        with self.assertRaisesMessage(ArchiveViolation, 'Verhältnis unkomprimiert zu komprimiert'):
+            self.inspect(data)
+
+    def test_too_many_entries(self):
+        data = _zip_bytes([(f'{i}.txt', b'') for i in range(4)], compression=zipfile.ZIP_STORED)
+        with mock.patch.object(inspection, 'ZIP_MAX_ENTRIES', 3):
+            with self.assertRaisesMessage(ArchiveViolation, 'Zu viele Einträge'):
+                self.inspect(data)
+
+    def test_zip64_entry_count(self):
+        # Ab 65536 Einträgen schreibt zipfile ein ZIP64-Verzeichnisende
+        count = 0x10000
+        data = _zip_bytes([(f'{i}', b'') for i in range(count)], compression=zipfile.ZIP_STORED)
+        self.assertIn(b'PK\x06\x06', data[-200:])
+        self.assertEqual(self.inspect(data)['entries'], count)
+
+    def test_archive_comment(self):
+        data = _zip_bytes([('a.txt', b'a')], comment=b'PK' * 1000)
+        self.assertEqual(self.inspect(data)['entries'], 1)
+
+    def test_prefixed_archive(self):
+        data = b'#!/bin/sh\nexit 0\n' + _zip_bytes([('a.txt', b'a'), ('b.txt', b'b')])
+        self.assertEqual(self.inspect(data)['entries'], 2)
+
+    def test_truncated(self):
+        data = _zip_bytes([('a.txt', b'a' * 1000), ('b.txt', b'b' * 1000)])
+        for broken in (data[:len(data) // 2], data[:-10], data[100:], b''):
+            with self.subTest(size=len(broken)):
+                with self.assertRaises(ArchiveViolation):
+                    self.inspect(broken)
+
+
+class InspectGzTests(TempDirMixin, SimpleTestCase):
+
+    def test_plain_file(self):
+        path = self.write_bytes('notes.gz', gzip.compress(b'hallo welt\n' * 1000))
+        summary = inspect_gz(path)
+        self.assertFalse(summary['is_zip'])
+        self.assertEqual(summary['size'], 11 * 1000)
+
+    def test_small_compressible_file(self):
+        # Unter GZ_RATIO_MIN_SIZE gilt die Ratio nicht
+        path = self.write_bytes('zeros.gz', gzip.compress(b'\0' * (4 * 1024 * 1024)))
+        self.assertEqual(inspect_gz(path)['size'], 4 * 1024 * 1024)
+
+    def test_bomb(self):
+        path = self.write_bytes('bomb.gz', gzip.compress(b'\0' * (20 * 1024 * 1024)))
+        with self.assertRaisesMessage(ArchiveViolation, 'Gzip-Bombe'):
+            inspect_gz(path)
+
+    def test_corrupt(self):
+        data = gzip.compress(b'hallo welt\n' * 1000)
+        path = self.write_bytes('broken.gz', data[:len(data) // 2])
+        with self.assertRaises(ArchiveViolation):
+            inspect_gz(path)
+
+    def test_zip_with_data_descriptors(self):
+        target = _Unseekable()
+        with zipfile.ZipFile(target, 'w') as zf:
+            zf.writestr(zipfile.ZipInfo('Payload/App.app/Info.plist'), b'<plist/>' * 100)
+            stored = zipfile.ZipInfo('Payload/App.app/raw.bin')
+            stored.compress_type = zipfile.ZIP_STORED
+            zf.writestr(stored, b'PK\x07\x08' + b'raw' * 100)
+            deflated = zipfile.ZipInfo('Payload/App.app/code.bin')
+            deflated.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(deflated, b'code' * 1000)
+        path = self.write_bytes('app.ipa.gz', gzip.compress(bytes(target.data)))
+        summary = inspect_gz(path, required=lambda p: p.endswith('Info.plist'))
+        self.assertTrue(summary['is_zip'])
+        self.assertEqual(summary['entries'], 3)
+        self.assertTrue(summary['found_required'])
+
+    def test_zip_traversal(self):
+        data = _zip_bytes([('../evil', b'x')])
+        path = self.write_bytes('app.ipa.gz', gzip.compress(data))
+        with self.assertRaisesMessage(ArchiveViolation, 'Unsichere Pfad-Referenz'):
+            inspect_gz(path)
+
+
+class InspectTarGzTests(TempDirMixin, SimpleTestCase):
+
+    def make_tar_gz(self, name, members):
+        path = self.path(name)
+        with tarfile.open(path, 'w:gz') as tar:
+            for info, data in members:
+                tar.addfile(info, io.BytesIO(data) if data is not None else None)
+        return path
+
+    def test_valid_archive(self):
+        path = self.make_tar_gz('app.tar.gz', [
+            _tar_member('app/bin/run', b'#!/bin/sh\n'),
+            _tar_member('app/run', type=tarfile.SYMTYPE, linkname='bin/run'),
+            _tar_member('app/start', type=tarfile.LNKTYPE, linkname='app/bin/run'),
+        ])
+        self.assertEqual(inspect_tar_gz(path)['entries'], 3)
+
+    def test_bomb(self):
+        path = self.make_tar_gz('bomb.tar.gz', [_tar_member('zeros', b'\0' * (20 * 1024 * 1024))])
+        with self.assertRaisesMessage(ArchiveViolation, 'Gzip-Bombe'):
+            inspect_tar_gz(path)
+
+    def test_path_traversal(self):
+        path = self.make_tar_gz('app.tar.gz', [_tar_member('../evil', b'x')])
+        with self.assertRaisesMessage(ArchiveViolation, 'Unsichere Pfad-Referenz'):
+            inspect_tar_gz(path)
+
+    def test_links(self):
+        for member in (
+            _tar_member('app/passwd', type=tarfile.SYMTYPE, linkname='/etc/passwd'),
+            _tar_member('app/up', type=tarfile.SYMTYPE, linkname='../../etc'),
+            _tar_member('app/hard', type=tarfile.LNKTYPE, linkname='../outside'),
+        ):
+            with self.subTest(linkname=member[0].linkname):
+                path = self.make_tar_gz('links.tar.gz', [member])
+                with self.assertRaisesMessage(ArchiveViolation, 'Unsicherer Link'):
+                    inspect_tar_gz(path)
+
+    def test_devices(self):
+        for type in (tarfile.CHRTYPE, tarfile.BLKTYPE):
+            with self.subTest(type=type):
+                path = self.make_tar_gz('dev.tar.gz', [_tar_member('dev/sda', type=type)])
+                with self.assertRaisesMessage(ArchiveViolation, 'Gerätedatei'):
+                    inspect_tar_gz(path)
+
+    def test_not_a_tar(self):
+        path = self.write_bytes('app.tar.gz', gzip.compress(b'kein tar' * 100))
+        with self.assertRaises(ArchiveViolation):
+            inspect_tar_gz(path)
+
+
+class VersioningTests(SimpleTestCase):
+
+    def test_ordering(self):
+        expected = [
+            '0.9', '1.0.dev1', '1.0a1', '1.0-alpha.2', '1.0b1', '1.0.0-beta.3', '1.0rc1',
+            '1.0', '1.0.post1', '1.0.1', '1.2', 'v1.10', '2.0.0-rc.1', '2.0.0+build.5', '10.0',
+        ]
+        self.assertEqual(sorted(reversed(expected), key=version_sort_key), expected)
+
+    def test_equivalent_spellings(self):
+        self.assertEqual(version_sort_key('1.0'), version_sort_key('1.0.0'))
+        self.assertEqual(version_sort_key('v2.0-BETA.1'), version_sort_key('2.0b1'))
+
+    def test_rejected(self):
+        for value in ('', '   ', 'latest', '1.x', '1..2', '1.0-final', '12345678901'):
+            with self.subTest(value=value):
+                self.assertEqual(version_sort_key(value), '')
+                with self.assertRaises(ValidationError):
+                    validate_version_number(value)
+
+    def test_accepted(self):
+        validate_version_number('2.0.0-beta.3')
+
+
+class CursorTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        cursor = encode_cursor([1500, '2026-10-18T12:00:00.123456+00:00', 42])
+        self.assertNotIn('=', cursor)
+        self.assertEqual(decode_cursor(cursor, 3), [1500, '2026-10-18T12:00:00.123456+00:00', 42])
+
+    def test_datetime_keeps_microseconds(self):
+        from datetime import datetime, timezone
+        value = datetime(2026, 10, 18, 12, 0, 0, 123456, tzinfo=timezone.utc)
+        self.assertEqual(decode_cursor(encode_cursor([value]), 1), [value.isoformat()])
+
+    def test_tampered(self):
+        valid = encode_cursor([1, 'x', 2])
+        for cursor in (
+            '', '!!!', valid[:-3], valid + 'A',
+            encode_cursor([1, 2]),
+            encode_cursor({'a': 1}),
+            encode_cursor([1, {'id__gt': 0}, 2]),
+            encode_cursor([1, None, 2]),
+            encode_cursor([1, [2], 3]),
+        ):
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(decode_cursor(cursor, 3))
+
+
+@override_settings(DOWNLOAD_OFFLOAD='')
+class SendfileTests(TempDirMixin, SimpleTestCase):
+    content = bytes(range(256)) * 40
+    etag = '"abc123"'
+
+    def setUp(self):
+        super().setUp()
+        self.file_path = self.write_bytes('app.apk', self.content)
+        self.factory = RequestFactory()
+
+    def get(self, **headers):
+        response = artifact_response(self.factory.get('/download/', **headers), self.file_path, etag=self.etag)
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_parse_range(self):
+        size = 1000
+        self.assertEqual(parse_range('bytes=0-99', size), (0, 100))
+        self.assertEqual(parse_range('bytes=900-', size), (900, 1000))
+        self.assertEqual(parse_range('bytes=-100', size), (900, 1000))
+        self.assertEqual(parse_range('bytes=-5000', size), (0, 1000))
+        self.assertEqual(parse_range('bytes=500-5000', size), (500, 1000))
+        for header in (None, '', 'bytes=-', 'bytes=0-1,5-6', 'items=0-1', 'bytes=10-5'):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, size))
+        with self.assertRaises(ValueError):
+            parse_range('bytes=1000-', size)
+
+    def test_full_download(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertEqual(self.body(response), self.content)
+
+    def test_range(self):
+        response = self.get(HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(self.body(response), self.content[100:200])
+
+    def test_suffix_range(self):
+        response = self.get(HTTP_RANGE='bytes=-10')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.body(response), self.content[-10:])
+
+    def test_if_range_matches(self):
+        response = self.get(HTTP_RANGE='bytes=5000-', HTTP_IF_RANGE=self.etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.body(response), self.content[5000:])
+
+    def test_if_range_mismatch_sends_whole_file(self):
+        response = self.get(HTTP_RANGE='bytes=5000-', HTTP_IF_RANGE='"veraltet"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.content)
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_if_none_match(self):
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=self.etag).status_code, 304)
+
+    def test_resumed_transfer(self):
+        request = self.factory.get('/download/', HTTP_RANGE='bytes=100-')
+        self.assertTrue(is_resumed_transfer(request, self.etag))
+        request = self.factory.get('/download/', HTTP_RANGE='bytes=0-')
+        self.assertFalse(is_resumed_transfer(request, self.etag))
+        request = self.factory.get('/download/', HTTP_RANGE='bytes=100-', HTTP_IF_RANGE='"veraltet"')
+        self.assertFalse(is_resumed_transfer(request, self.etag))
+
+
+class ClamavTests(TempDirMixin, SimpleTestCase):
+
+    def start_server(self, **kwargs):
+        server = FakeClamdServer(('127.0.0.1', 0), **kwargs)
+        host, port = server.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        scanner = ClamdScanner(host, port, pool_size=2, timeout=10, chunk_size=4096)
+        self.addCleanup(scanner.close)
+        return server, scanner
+
+    def test_clean_file(self):
+        server, scanner = self.start_server()
+        path = self.write_bytes('clean.bin', b'harmlos' * 10000)
+        self.assertIsNone(scanner.scan_file(path))
+        self.assertEqual(server.scanned_bytes, 70000)
+
+    def test_infected_file(self):
+        server, scanner = self.start_server()
+        # Signatur über eine Blockgrenze verteilt
+        path = self.write_bytes('eicar.com', b'x' * 4090 + EICAR)
+        self.assertEqual(scanner.scan_file(path), 'Eicar-Test-Signature')
+
+    def test_ping_and_version(self):
+        _, scanner = self.start_server(version='ClamAV 1.0.5/27480/Mon Nov 18 09:30:00 2024')
+        self.assertTrue(scanner.ping())
+        self.assertEqual(scanner.version(), 'ClamAV 1.0.5/27480/Mon Nov 18 09:30:00 2024')
+
+    def test_connection_reuse(self):
+        server, scanner = self.start_server()
+        path = self.write_bytes('clean.bin', b'harmlos')
+        scanner.scan_file(path)
+        connection = scanner._idle[0]
+        for _ in range(5):
+            self.assertIsNone(scanner.scan_file(path))
+        self.assertEqual(server.scans, 6)
+        self.assertEqual(scanner._open, 1)
+        self.assertIs(scanner._idle[0], connection)
+
+    def test_scan_files_in_parallel(self):
+        server, scanner = self.start_server(delay=0.05)
+        clean = self.write_bytes('clean.bin', b'harmlos')
+        infected = self.write_bytes('eicar.com', EICAR)
+        results = scanner.scan_files([clean, infected, clean, infected])
+        self.assertEqual([r.signature for r in results], [None, 'Eicar-Test-Signature'] * 2)
+        self.assertEqual([r.error for r in results], [None] * 4)
+        self.assertLessEqual(scanner._open, 2)
+
+    def test_size_limit(self):
+        server, scanner = self.start_server(stream_max_length=10000)
+        with self.assertRaisesMessage(ClamdError, 'size limit exceeded'):
+            scanner.scan_file(self.write_bytes('big.bin', b'x' * 100000))
+        # clamd hat die Sitzung beendet; der nächste Scan läuft über eine neue Verbindung
+        self.assertIsNone(scanner.scan_file(self.write_bytes('small.bin', b'x')))
+
+    def test_unreachable(self):
+        scanner = ClamdScanner('127.0.0.1', 1, connect_timeout=1)
+        with self.assertRaisesMessage(ClamdError, 'nicht erreichbar'):
+            scanner.ping()
+        self.assertEqual(scanner._open, 0)
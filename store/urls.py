@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.urls import path
 from . import views
+from .async_downloads import download_file_async
 
 urlpatterns = [
     path('register/', views.register_view, name='register'),
@@ -39,14 +41,23 @@ urlpatterns = [
     path('app/create/', views.create_app_view, name='create_app'),
     path('', views.home, name='home'),
     path('platform/<str:platform_name>/', views.platform_view, name='platform'),
+    path('platform/<str:platform_name>/category/<str:category>/', views.category_view, name='platform_category'),
+    path('category/<str:category>/', views.category_view, name='category'),
+    path('api/catalog/', views.api_catalog_page, name='api_catalog_page'),
+    path('api/search/suggest/', views.api_search_suggest, name='api_search_suggest'),
+    path('browse/', views.browse_view, name='browse'),
+    path('api/browse/', views.api_browse, name='api_browse'),
 
     path('app/<int:app_id>/', views.app_detail_view, name='app_detail'),
     path('app/<int:app_id>/upload-version/', views.upload_version, name='upload_version'),
 
     #download new urls
-    path("api/download/<int:version_id>/", views.download_file_view, name="download_file_view"),
+    # Unter ASGI asynchron gestreamt und begrenzt (DOWNLOAD_ASYNC)
+    path("api/download/<int:version_id>/", download_file_async if settings.DOWNLOAD_ASYNC else views.download_file_view, name="download_file_view"),
     path('api/download_complete/', views.download_complete, name='download_complete'),
     path('api/increment-download/', views.api_increment_download, name='api_increment_download'),
+    path('api/updates/check', views.api_check_updates, name='api_check_updates'),
+    path('api/updates/delta/<int:version_id>/', views.download_delta_view, name='download_delta'),
 
 
     #download old urls
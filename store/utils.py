@@ -3,6 +3,8 @@ from pywebpush import webpush, WebPushException
 from django.conf import settings
 from .models import PushSubscription
 import json
+import hashlib
+import os
 
 def send_push_notification_to_admins(title, body, url):
     payload = {
@@ -29,3 +31,26 @@ def send_push_notification_to_admins(title, body, url):
             )
         except WebPushException as ex:
             print(f"WebPush Error: {ex}")
+
+
+def file_sha256(file_path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def update_file_metadata(version):
+    """
+    Speichert Größe und SHA-256 der Versionsdatei am Model.
+    Für Dateien aus dem Artifact-Speicher sind beide schon beim Upload bekannt;
+    dann genügt der Größenvergleich als Integritätsprüfung.
+    """
+    file_path = version.file.path
+    size = os.path.getsize(file_path)
+    if version.artifact_id and version.sha256 and version.file_size == size:
+        return
+    version.file_size = size
+    version.sha256 = file_sha256(file_path)
+    version.save(update_fields=['file_size', 'sha256'])
@@ -0,0 +1,61 @@
+# versioning.py
+# Wandelt freie Versionsnummern ("1.2", "v2.0.0-beta.3", "1.4rc1") in einen
+# lexikografisch sortierbaren Schlüssel um, damit "neueste Version" und
+# "neuer als X" per Index-Bereichsabfrage beantwortet werden können.
+import re
+
+from django.core.exceptions import ValidationError
+
+RELEASE_PARTS = 6
+PART_WIDTH = 10
+
+# Reihenfolge: dev < alpha < beta < rc < (final) < post
+PRE_RELEASE_RANKS = {
+    'dev': 0,
+    'a': 1, 'alpha': 1,
+    'b': 2, 'beta': 2,
+    'c': 3, 'rc': 3, 'pre': 3, 'preview': 3,
+}
+FINAL_RANK = 4
+POST_RANK = 5
+
+_VERSION_RE = re.compile(
+    r'^v?(?P<release>\d+(?:\.\d+)*)'
+    r'(?:[-_.]?(?P<tag>dev|alpha|a|beta|b|rc|c|pre|preview|post)[-_.]?(?P<tag_number>\d*))?'
+    r'(?:\+.*)?$',
+    re.IGNORECASE,
+)
+
+
+def version_sort_key(version_number):
+    """
+    Liefert den Sortierschlüssel oder '' für nicht interpretierbare Versionsnummern
+    (diese sortieren damit vor allen gültigen).
+    """
+    match = _VERSION_RE.match((version_number or '').strip())
+    if not match:
+        return ''
+    release = [int(part) for part in match.group('release').split('.')][:RELEASE_PARTS]
+    release += [0] * (RELEASE_PARTS - len(release))
+    if any(part >= 10 ** PART_WIDTH for part in release):
+        return ''
+
+    tag = (match.group('tag') or '').lower()
+    if not tag:
+        rank = FINAL_RANK
+    elif tag == 'post':
+        rank = POST_RANK
+    else:
+        rank = PRE_RELEASE_RANKS[tag]
+    tag_number = min(int(match.group('tag_number') or 0), 10 ** PART_WIDTH - 1)
+
+    parts = '.'.join(str(part).zfill(PART_WIDTH) for part in release)
+    return f"{parts}~{rank}{str(tag_number).zfill(PART_WIDTH)}"
+
+
+def validate_version_number(value):
+    """Formular-Validator: nur Versionsnummern mit Sortierschlüssel zulassen."""
+    if not version_sort_key(value):
+        raise ValidationError(
+            "Ungültige Versionsnummer. Erlaubt sind z.B. 1.2, 2.0.0-beta.3 oder 1.4rc1."
+        )
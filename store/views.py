@@ -4,7 +4,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
-from .models import App, Version, PushSubscription, Developer, VersionDownload, Notification, EmailVerificationCode, AppUpdate, RoadmapItem, User
+from .models import App, Version, PushSubscription, Developer, Notification, EmailVerificationCode, AppUpdate, RoadmapItem, User, PLATFORM_CHOICES, CATEGORY_CHOICES, AppDownloadDay, UserInstalledApp, VersionDelta
 from .forms import AppWithVersionForm, VersionForm, DeveloperForm, AppEditForm, CustomUserCreationForm
 from .tasks import start_background_check, start_background_check_version
 from django.http import FileResponse, JsonResponse, HttpResponse, FileResponse, HttpResponseNotFound, HttpResponseForbidden
@@ -17,21 +17,34 @@ import os
 import zipfile
 from io import BytesIO
 from django.utils import timezone
-from django.db.models import F
 from django.db.models import Count
 from datetime import timedelta
-from django.db.models import Q
+from django.db.models import Q, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from .utils import send_push_notification_to_admins
+from .pagination import keyset_page, serialize_app_card, CATALOG_ORDERING
+from .search import search_apps, SEARCH_ORDERING
+from .suggest import suggest
+from .fragments import get_section, platform_section
+from .facets import parse_filters, filter_apps, facet_counts, published_apps
+from .category_matrix import category_lists
+from .similar import SIMILAR_APPS_SIZE
+from .downloads import record_download
+from .sendfile import artifact_response, artifact_etag, is_resumed_transfer
+from .deltas import find_delta
+from .versioning import version_sort_key
+from .recommendations import recommended_app_ids
 from django.core.cache import cache
 from django.conf import settings
 import mimetypes
-import threading
 from django.contrib.auth.views import PasswordResetConfirmView
 from django.contrib.auth.tokens import default_token_generator
-from django.utils.http import urlsafe_base64_encode
+from django.utils.http import urlsafe_base64_encode, quote_etag, parse_etags
+import hashlib
+from urllib.parse import urlencode
 from django.utils.encoding import force_bytes
 from django.core.mail import send_mail
-from django.urls import reverse
+from django.urls import reverse, NoReverseMatch
 import secrets
 from settings.models import UserSecurity
 from . import models
@@ -311,16 +324,25 @@ def start_version_check_api(request, version_id):
     """
     if request.method == "POST":
         version = get_object_or_404(Version, id=version_id, app__developer__user=request.user)
-
-        if version.checking_status not in ['running', 'passed']:
-            def run_check():
-                start_background_check_version(version.id)
-
-            threading.Thread(target=run_check).start()
-            version.checking_status = 'running'
-            version.save()
+        previous_status = version.checking_status
+
+        # Status bedingt setzen: bei Doppelklick startet nur der erste Request die Chain
+        claimed = Version.objects.filter(id=version.id).exclude(
+            checking_status__in=['running', 'passed']
+        ).update(checking_status='running')
+        if claimed:
+            # Die Stufen laufen als Celery-Chain, der Start selbst ist sofort fertig
+            try:
+                start_background_check_version.delay(version.id)
+            except KombuOpError:
+                Version.objects.filter(id=version.id).update(checking_status=previous_status)
+                return JsonResponse(
+                    {"error": "Prüfung konnte nicht gestartet werden (Broker nicht erreichbar)."},
+                    status=503
+                )
             return JsonResponse({"message": "Prüfung gestartet", "status": "running"})
 
+        version.refresh_from_db(fields=['checking_status'])
         return JsonResponse({"message": "Prüfung läuft bereits", "status": version.checking_status})
 
     return JsonResponse({"error": "Nur POST erlaubt"}, status=405)
@@ -341,15 +363,39 @@ def developer_dashboard(request):
     apps = App.objects.filter(developer=developer).order_by('-created_at')
 
     if query:
-        apps = apps.filter(name__icontains=query)
-
-    apps_with_latest = []
-    for app in apps:
-        latest_version = app.versions.order_by('-uploaded_at').first()
-        apps_with_latest.append({
-            'app': app,
-            'latest_version': latest_version
-        })
+        apps = search_apps(apps, query).order_by(*SEARCH_ORDERING)
+
+    # Neueste Version (egal ob geprüft) und Downloads aus AppDownloadDay per Subquery,
+    # damit die Anzahl der Abfragen nicht mit der Zahl der Apps wächst
+    today = timezone.now().date()
+    newest_version_id = Version.objects.filter(
+        app=OuterRef('pk')
+    ).order_by('-uploaded_at', '-id').values('id')[:1]
+
+    def downloads_since(days):
+        return Coalesce(Subquery(
+            AppDownloadDay.objects.filter(
+                app=OuterRef('pk'),
+                day__gt=today - timedelta(days=days)
+            ).values('app').annotate(total=Sum('downloads')).values('total')[:1]
+        ), 0)
+
+    apps = list(apps.annotate(
+        # Nicht latest_version_id – das ist schon die Spalte von App.latest_version
+        newest_version_id=Subquery(newest_version_id),
+        downloads_7_days=downloads_since(7),
+        downloads_30_days=downloads_since(30),
+    ))
+    versions = Version.objects.only(
+        'id', 'version_number', 'uploaded_at', 'checking_status', 'checking_progress', 'approved'
+    ).in_bulk([app.newest_version_id for app in apps if app.newest_version_id])
+
+    apps_with_latest = [{
+        'app': app,
+        'latest_version': versions.get(app.newest_version_id),
+        'downloads_7_days': app.downloads_7_days,
+        'downloads_30_days': app.downloads_30_days,
+    } for app in apps]
 
     return render(request, 'store/developer_dashboard.html', {
         'developer': developer,
@@ -462,6 +508,21 @@ def create_developer_view(request):
 
     return render(request, 'store/create_developer.html', {'form': form})
 
+def _top_downloads(apps):
+    return list(apps.select_related('developer').order_by('-download_count')[:10])
+
+
+def _trending_apps(apps):
+    # Vorberechnet von refresh_trending_snapshot (letzte 7 Tage)
+    return list(apps.select_related('developer').filter(
+        trending_snapshot__downloads_last_week__gt=0
+    ).order_by('-trending_snapshot__downloads_last_week')[:10])
+
+
+def _new_apps(apps):
+    return list(apps.select_related('developer').order_by('-published_at', '-id')[:10])
+
+
 def home(request):
     query = request.GET.get('q', '')
     user = request.user
@@ -473,14 +534,9 @@ def home(request):
         ).order_by('-created_at')
         notifications_count = notifications.count()
     else:
-        notifications = Notification.objects.filter(
-            user__isnull=True,  # Benachrichtigungen für alle Nutzer
-            read=False  # Nur ungelesene Benachrichtigungen
-        ).order_by('-created_at')
-        notifications_count = Notification.objects.filter(
-            user__isnull=True,
-            read=False
-        ).count()
+        # Gäste sehen keine Glocke (base.html), daher keine Abfrage
+        notifications = Notification.objects.none()
+        notifications_count = 0
 
     # Alle veröffentlichten Apps
     all_apps = App.objects.filter(
@@ -488,53 +544,43 @@ def home(request):
         published_at__lte=timezone.now()
     )
 
-    if query:
-        all_apps = all_apps.filter(name__icontains=query)
+    def section(name, builder):
+        # Suchergebnisse werden nicht gecacht, die Standard-Startseite schon
+        if query:
+            return builder(all_apps)
+        return get_section(name, lambda: builder(all_apps))
 
-    # Top Downloads
-    top_downloads = all_apps.order_by('-download_count')[:10]
+    if query:
+        all_apps = search_apps(all_apps, query)
+        catalog_apps, next_cursor = keyset_page(all_apps, ordering=SEARCH_ORDERING)
+    else:
+        # Nur die erste Seite rendern, weitere Seiten per api_catalog_page nachladen
+        catalog_apps, next_cursor = get_section('catalog', lambda: keyset_page(all_apps))
 
-    # Trending Apps (letzte 7 Tage)
-    seven_days_ago = timezone.now() - timedelta(days=7)
-    trending_apps_ids = VersionDownload.objects.filter(
-        downloaded_at__gte=seven_days_ago,
-        version__app__in=all_apps
-    ).values('version__app').annotate(
-        downloads_last_week=Count('id')
-    ).order_by('-downloads_last_week').values_list('version__app', flat=True)[:10]
-    trending_apps = App.objects.filter(id__in=trending_apps_ids)
+    top_downloads = section('top_downloads', _top_downloads)
+    trending_apps = section('trending', _trending_apps)
+    new_apps = section('new_apps', _new_apps)
 
     # --- Empfehlungen für eingeloggte Nutzer ---
     recommended_apps = []
     if user.is_authenticated:
-        # Finde die zuletzt genutzten Apps des Users
-        last_downloads = VersionDownload.objects.filter(
-            user=user
-        ).order_by('-downloaded_at')[:5]
-
-        # Extrahiere Plattform/Kategorie-Präferenzen
-        preferred_platforms = set()
-        preferred_categories = set()
-        for download in last_downloads:
-            app = download.version.app
-            preferred_platforms.add(app.platform)
-            preferred_categories.add(app.category)
-
-        # Finde empfohlene Apps basierend auf diesen Präferenzen
-        recommended_apps = App.objects.filter(
-            published=True,
-            published_at__lte=timezone.now(),
-            platform__in=preferred_platforms,
-            category__in=preferred_categories
-        ).exclude(
-            versions__versiondownload__user=user
-        ).distinct().order_by('-download_count')[:6]
+        # Vorberechnete Co-Download-Nachbarn, pro Nutzer gecacht
+        recommended_ids = recommended_app_ids(user)
+        if recommended_ids:
+            apps_by_id = App.objects.filter(
+                id__in=recommended_ids,
+                published=True,
+                published_at__lte=timezone.now()
+            ).select_related('developer').in_bulk()
+            recommended_apps = [apps_by_id[i] for i in recommended_ids if i in apps_by_id]
 
     context = {
         'query': query,
-        'all_apps': all_apps,
+        'all_apps': catalog_apps,
+        'next_cursor': next_cursor,
         'top_downloads': top_downloads,
         'trending_apps': trending_apps,
+        'new_apps': new_apps,
         'recommended_apps': recommended_apps,
         'notifications': notifications,
         'notifications_count': notifications_count,
@@ -550,10 +596,107 @@ def platform_view(request, platform_name):
         published_at__lte=timezone.now()  # Vergangenheit oder jetzt
     )
     if query:
-        apps = apps.filter(name__icontains=query)
-    context = {'apps': apps, 'platform': platform_name, 'query': query}
+        apps, next_cursor = keyset_page(search_apps(apps, query), ordering=SEARCH_ORDERING)
+    elif platform_name.lower() in dict(PLATFORM_CHOICES):
+        apps, next_cursor = get_section(platform_section(platform_name), lambda: keyset_page(apps))
+    else:
+        apps, next_cursor = keyset_page(apps)
+    context = {'apps': apps, 'platform': platform_name, 'query': query, 'next_cursor': next_cursor}
     return render(request, 'store/platform.html', context)
 
+
+def api_catalog_page(request):
+    """
+    Nächste Katalogseite als JSON (Infinite Scroll auf Startseite und Plattformseiten)
+    """
+    query = request.GET.get('q', '')
+    platform_name = request.GET.get('platform', '')
+    apps = App.objects.filter(
+        published=True,
+        published_at__lte=timezone.now()
+    )
+    if platform_name:
+        apps = apps.filter(platform__iexact=platform_name)
+    ordering = CATALOG_ORDERING
+    if query:
+        apps = search_apps(apps, query)
+        ordering = SEARCH_ORDERING
+
+    page, next_cursor = keyset_page(apps, cursor=request.GET.get('cursor'), ordering=ordering)
+    return JsonResponse({
+        'apps': [serialize_app_card(app) for app in page],
+        'next_cursor': next_cursor,
+    })
+
+def category_view(request, category, platform_name=''):
+    """
+    Kategorieseite (optional je Plattform) – Listen kommen aus der vorberechneten Matrix
+    """
+    categories = dict(CATEGORY_CHOICES)
+    platforms = dict(PLATFORM_CHOICES)
+    platform_name = platform_name.lower()
+    if category not in categories or (platform_name and platform_name not in platforms):
+        return HttpResponseNotFound("Kategorie nicht gefunden.")
+
+    lists = category_lists(category, platform_name)
+    return render(request, 'store/category.html', {
+        'category': category,
+        'category_label': categories[category],
+        'platform': platform_name,
+        'platform_label': platforms.get(platform_name, ''),
+        'top_apps': lists['top'],
+        'new_apps': lists['new'],
+        'categories': CATEGORY_CHOICES,
+        'platforms': PLATFORM_CHOICES,
+    })
+
+
+def browse_view(request):
+    """
+    Facettierte Übersicht – Zählungen kommen aus dem gecachten Facetten-Grid
+    """
+    filters = parse_filters(request.GET)
+    apps, next_cursor = keyset_page(filter_apps(published_apps(), filters))
+    return render(request, 'store/browse.html', {
+        'apps': apps,
+        'next_cursor': next_cursor,
+        'facets': facet_counts(filters),
+        'filters': filters,
+        'more_url': reverse('api_browse') + '?' + urlencode(filters),
+    })
+
+
+def api_browse(request):
+    filters = parse_filters(request.GET)
+    apps, next_cursor = keyset_page(
+        filter_apps(published_apps(), filters),
+        cursor=request.GET.get('cursor')
+    )
+    return JsonResponse({
+        'apps': [serialize_app_card(app) for app in apps],
+        'next_cursor': next_cursor,
+        'facets': facet_counts(filters),
+    })
+
+
+def api_search_suggest(request):
+    """
+    Vorschläge für das Suchfeld – kommt komplett aus dem Prefix-Index im Speicher
+    """
+    query = request.GET.get('q', '')[:100]
+    suggestions = []
+    for item in suggest(query):
+        try:
+            if item['type'] == 'app':
+                url = reverse('app_detail', args=[item['id']])
+            else:
+                url = reverse('developer_detail', args=[item['label']])
+        except NoReverseMatch:
+            url = None
+        suggestions.append({**item, 'url': url})
+    return JsonResponse({'suggestions': suggestions})
+
+
 @login_required
 def notifications_view(request):
     user = request.user
@@ -657,30 +800,30 @@ def upload_version(request, app_id):
 
 
 def app_detail_view(request, app_id):
-    app = get_object_or_404(App, id=app_id, published=True)
-    
-    latest_version = app.versions.filter(
-        approved=True,
-        new_version=True
-    ).order_by('-uploaded_at').first()
-
+    app = get_object_or_404(
+        App.objects.select_related('developer', 'latest_version'),
+        id=app_id,
+        published=True
+    )
 
+    # Gepflegt per Signal (App.refresh_latest_version)
+    latest_version = app.latest_version
 
-    suggestions = App.objects.filter(
-        platform=app.platform,
-        published=True,
-        published_at__lte=timezone.now()
-    ).filter(
-        Q(category=app.category) | Q(subcategory=app.subcategory)
-    ).exclude(id=app.id).distinct()[:8]
+    # Vorberechnet in similar.py
+    suggestions = [
+        entry.similar for entry in app.similar_apps.filter(
+            similar__published=True,
+            similar__published_at__lte=timezone.now()
+        ).select_related('similar__developer')[:SIMILAR_APPS_SIZE]
+    ]
 
     user_installed_version = None
     if request.user.is_authenticated:
-        vd = VersionDownload.objects.filter(
-            user=request.user, version__app=app
-        ).order_by('-version__uploaded_at').first()
-        if vd:
-            user_installed_version = vd.version
+        installed = UserInstalledApp.objects.filter(
+            user=request.user, app=app
+        ).select_related('version').first()
+        if installed:
+            user_installed_version = installed.version
 
     return render(request, 'store/app_detail.html', {
         'app': app,
@@ -689,22 +832,39 @@ def app_detail_view(request, app_id):
         'user_installed_version': user_installed_version,
     })
 
-#Download NEW
 @login_required
-def download_file_view(request, version_id):
+def download_delta_view(request, version_id):
+    """
+    Binärer Patch von der installierten Version (?from=<version_id> oder
+    ?from_version=<versionsnummer>) auf diese Version. Ohne passenden Patch
+    Weiterleitung auf die vollständige Datei.
+    """
     version = get_object_or_404(Version, id=version_id, approved=True)
-    app = version.app
-
-    # Tracking
-    VersionDownload.objects.create(user=request.user, version=version)
-    app.download_count = F('download_count') + 1
-    app.save(update_fields=["download_count"])
-
-    file_path = version.file.path
-    if not os.path.exists(file_path):
-        return HttpResponseNotFound("Datei nicht gefunden.")
+    source_id = request.GET.get('from')
+    delta = find_delta(
+        version,
+        source_id=int(source_id) if source_id and source_id.isdigit() else None,
+        source_version=request.GET.get('from_version'),
+    )
+    if delta is None:
+        return redirect('download_file_view', version_id=version.id)
+
+    etag = f'"{delta.sha256}"'
+    if request.method == 'GET' and not is_resumed_transfer(request, etag):
+        record_download(request.user, version)
+
+    name = os.path.splitext(version.original_filename or os.path.basename(version.file.name))[0]
+    response = artifact_response(
+        request, delta.file.path,
+        filename=f"{name}-{delta.source.version_number}-{version.version_number}.bsdiff",
+        content_type='application/octet-stream',
+        etag=etag,
+    )
+    # Zum Prüfen des gepatchten Ergebnisses auf dem Client
+    response['X-Delta-Source'] = delta.source.version_number
+    response['X-Target-SHA256'] = version.sha256
+    return response
 
-    return FileResponse(open(file_path, 'rb'), as_attachment=True, filename=os.path.basename(file_path))
 
 @csrf_exempt
 @login_required
@@ -713,7 +873,8 @@ def download_complete(request):
         data = json.loads(request.body)
         version_id = data.get('version_id')
         version = get_object_or_404(Version, id=version_id)
-        if version.file and os.path.isfile(version.file.path):
+        # Artifacts teilen sich Versionen und werden nur über den Referenzzähler gelöscht
+        if version.file and not version.artifact_id and os.path.isfile(version.file.path):
             try:
                 os.remove(version.file.path)
             except Exception as e:
@@ -721,6 +882,82 @@ def download_complete(request):
         return JsonResponse({'status': 'ok'})
     return JsonResponse({'status': 'error'}, status=400)
 
+UPDATE_CHECK_MAX_APPS = 500
+
+
+@csrf_exempt
+def api_check_updates(request):
+    """
+    Update-Prüfung für Desktop-/Mobile-Clients in einem Request.
+    Body: {"apps": [{"app_id": 1, "version": "1.2.0"}, ...]}
+    Unterstützt ETag/If-None-Match (304, wenn sich nichts geändert hat).
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Nur POST erlaubt'}, status=405)
+    try:
+        entries = json.loads(request.body).get('apps', [])
+        installed = {int(e['app_id']): str(e['version']) for e in entries}
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return JsonResponse({'error': 'Ungültige Anfrage'}, status=400)
+    if len(installed) > UPDATE_CHECK_MAX_APPS:
+        return JsonResponse({'error': f'Maximal {UPDATE_CHECK_MAX_APPS} Apps pro Anfrage'}, status=400)
+
+    # Eine Abfrage: neueste freigegebene Version pro App (gepflegter Zeiger)
+    apps = App.objects.filter(
+        id__in=installed.keys(),
+        published=True,
+        latest_version__isnull=False
+    ).select_related('latest_version')
+    latest = {app.id: app.latest_version for app in apps}
+
+    # Vorhandene Delta-Patches: (Zielversion, Ausgangsversionsnummer) -> Größe
+    deltas = {
+        (target_id, source_number): size
+        for target_id, source_number, size in VersionDelta.objects.filter(
+            target_id__in=[v.id for v in latest.values()]
+        ).values_list('target_id', 'source__version_number', 'size')
+    }
+
+    etag_source = json.dumps([
+        sorted(installed.items()),
+        sorted((app_id, v.id, v.sha256) for app_id, v in latest.items()),
+        sorted(f'{target_id}:{source_number}' for target_id, source_number in deltas),
+    ])
+    etag = quote_etag(hashlib.sha256(etag_source.encode()).hexdigest()[:32])
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and etag in parse_etags(if_none_match):
+        response = HttpResponse(status=304)
+        response['ETag'] = etag
+        return response
+
+    updates = []
+    for app_id, version in latest.items():
+        # "Neuer als" direkt über den Sortierschlüssel, ohne weitere Abfrage
+        installed_key = version_sort_key(installed[app_id])
+        if version.version_number == installed[app_id]:
+            continue
+        if installed_key and version.version_sort_key and version.version_sort_key <= installed_key:
+            continue
+        updates.append({
+            'app_id': app_id,
+            'installed_version': installed[app_id],
+            'version_id': version.id,
+            'version': version.version_number,
+            'release_notes': version.release_notes,
+            'download_url': request.build_absolute_uri(reverse('download_file_view', args=[version.id])),
+            'size': version.file_size,
+            'sha256': version.sha256 or None,
+        })
+        delta_size = deltas.get((version.id, installed[app_id]))
+        if delta_size is not None:
+            url = reverse('download_delta', args=[version.id]) + '?' + urlencode({'from_version': installed[app_id]})
+            updates[-1]['delta'] = {'url': request.build_absolute_uri(url), 'size': delta_size}
+
+    response = JsonResponse({'updates': updates})
+    response['ETag'] = etag
+    return response
+
+
 @csrf_exempt
 @login_required
 def api_increment_download(request):
@@ -728,10 +965,7 @@ def api_increment_download(request):
         data = json.loads(request.body)
         version_id = data.get('version_id')
         version = get_object_or_404(Version, id=version_id, approved=True)
-        app = version.app
-        VersionDownload.objects.create(user=request.user, version=version)
-        app.download_count = F('download_count') + 1
-        app.save(update_fields=['download_count'])
+        record_download(request.user, version)
         return JsonResponse({'status': 'ok'})
     return JsonResponse({'status': 'error'}, status=400)
 
@@ -766,13 +1000,9 @@ def download_app_view(request, version_id):
 @login_required
 def download_app_start(request, version_id):
     version = get_object_or_404(Version, id=version_id, approved=True)
-    app = version.app
-
-    # Downloadzähler erhöhen
-    App.objects.filter(id=app.id).update(download_count=F('download_count') + 1)
 
-    # User-Download-Tracking
-    VersionDownload.objects.get_or_create(user=request.user, version=version)
+    # Download-Tracking (idempotent, Zähler write-behind)
+    record_download(request.user, version)
 
     # User-Agent erkennen
     user_agent = request.META.get('HTTP_USER_AGENT', '').lower()
@@ -791,23 +1021,23 @@ def download_file_view(request, version_id):
     version = get_object_or_404(Version, id=version_id, approved=True)
 
     file_path = version.file.path
-    filename = os.path.basename(file_path)
-
-    # MIME-Type bestimmen
-    if filename.endswith('.apk'):
-        content_type = 'application/vnd.android.package-archive'
-    elif filename.endswith('.ipa'):
-        content_type = 'application/octet-stream'  # IPA hat keinen offiziellen MIME-Type, oft octet-stream
-    else:
-        content_type = 'application/octet-stream'
+    if not os.path.exists(file_path):
+        return HttpResponseNotFound("Datei nicht gefunden.")
 
-    response = FileResponse(
-        open(file_path, 'rb'),
-        as_attachment=True,
-        filename=filename,
-        content_type=content_type
+    # Tracking – idempotent, zählt nicht doppelt, wenn der Client vorher
+    # schon api_increment_download aufgerufen hat. Fortsetzungen (Range ab
+    # Byte > 0) gehören zum selben Download und werden nicht erneut erfasst.
+    etag = artifact_etag(version)
+    if request.method == 'GET' and not is_resumed_transfer(request, etag):
+        record_download(request.user, version)
+
+    # Die Bytes liefert je nach DOWNLOAD_OFFLOAD der Webserver aus (sendfile.py)
+    return artifact_response(
+        request, file_path,
+        filename=version.original_filename or None,
+        content_type=version.content_type or None,
+        etag=etag,
     )
-    return response
 
 
 
@@ -824,8 +1054,8 @@ def download_complete_1(request):
 
         version = get_object_or_404(Version, id=version_id)
 
-        # APK-Datei löschen
-        if version.file and os.path.isfile(version.file.path):
+        # APK-Datei löschen (Artifacts nur über den Referenzzähler)
+        if version.file and not version.artifact_id and os.path.isfile(version.file.path):
             try:
                 os.remove(version.file.path)
             except Exception as e:
@@ -849,34 +1079,37 @@ def save_push_subscription(request):
         return JsonResponse({"status": "ok"})
     return JsonResponse({"status": "error"}, status=400)
 
-@login_required
-def my_installed_apps(request):
-    latest_installs = VersionDownload.objects.filter(user=request.user)\
-        .select_related('version__app')\
-        .order_by('version__app', '-version__uploaded_at')
+def _is_newer(version, installed):
+    if version.version_sort_key and installed.version_sort_key:
+        return version.version_sort_key > installed.version_sort_key
+    # Nicht interpretierbare Versionsnummern: wie bisher nur auf Gleichheit prüfen
+    return version.version_number != installed.version_number
 
-    seen = set()
-    installed_latest = []
 
-    for item in latest_installs:
-        app_id = item.version.app.id
-        if app_id not in seen:
-            installed_latest.append(item)
-            seen.add(app_id)
+@login_required
+def my_installed_apps(request):
+    # Eine Abfrage: installierte Version + gepflegter latest_version-Zeiger der App
+    missing_versions = Version.objects.filter(
+        app=OuterRef('app'),
+        approved=True,
+        version_sort_key__gt=OuterRef('version__version_sort_key')
+    ).values('app').annotate(n=Count('id')).values('n')[:1]
+
+    installed_latest = list(
+        UserInstalledApp.objects.filter(user=request.user)
+        .select_related('version__app__developer', 'version__app__latest_version')
+        .annotate(missing_versions=Coalesce(Subquery(missing_versions), 0))
+        .order_by('app_id')
+    )
 
     updates = []
     for item in installed_latest:
-        app = item.version.app
-        latest_version = app.versions.filter(
-            approved=True,
-            new_version=True
-        ).order_by('-uploaded_at').first()
-
-        if latest_version and latest_version.version_number != item.version.version_number:
+        latest_version = item.version.app.latest_version
+        if latest_version and _is_newer(latest_version, item.version):
             updates.append({
                 'download': item,
                 'latest_version': latest_version,
-                'missing_versions': Version.objects.filter(app=app, uploaded_at__gt=item.version.uploaded_at).count(),
+                'missing_versions': item.missing_versions,
                 'release_notes': latest_version.release_notes
             })
 